@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+from fastapi import Request, Response
+from starlette.datastructures import Headers
+from services.cache import TTLCache
+from services.instrumentation import register_cache
+
+# Optional brotli support; gzip is always available.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def etag_in_header(header: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value names `etag` (weak or strong) or is '*'."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match header already names `etag`."""
+    return etag_in_header(request.headers.get("if-none-match"), etag)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class HTTPCacheMiddleware:
+    """
+    Conditional-GET, Cache-Control and compression for routes that are pure
+    functions of the data_store contents.
+
+    The strong ETag is derived from the data_store version, the route path,
+    its query string and the Accept header, so it is known *before* the
+    handler runs:
+      - If-None-Match hits return 304 without touching the handler.
+      - Other repeats of an (ETag, encoding) pair are served from an
+        in-process cache of encoded, compressed bodies, bounded to
+        `cache_bytes` in total; bodies over `max_cached_body` are not kept.
+      - Fresh 200 responses over `min_size` bytes are gzip/brotli-compressed.
+    Each content-coding gets its own ETag suffix, as strong validators require.
+    Handlers behind it must not set their own ETag: it is replaced.
+    """
+
+    def __init__(self, app, prefix: str, version_fn, exclude=(), max_age: int = 60,
+                 stale_while_revalidate: int = 600, min_size: int = 1024, cache_size: int = 512,
+                 cache_bytes: int = 64 << 20, max_cached_body: int = 4 << 20, salt: str = ""):
+        self.app = app
+        self.salt = salt   # build id, so a deploy with unchanged data still changes ETags
+        self.prefix = prefix
+        self.version_fn = version_fn
+        self.exclude = {prefix + path for path in exclude}
+        self.cache_control = f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+        self.min_size = min_size
+        self.max_cached_body = max_cached_body
+        self._bodies = TTLCache(maxsize=cache_size, ttl=max_age + stale_while_revalidate,
+                                max_bytes=cache_bytes, sizeof=lambda entry: len(entry[1]))
+        register_cache("http_bodies", self._bodies.stats)
+
+    def _applies(self, scope) -> bool:
+        path = scope.get("path", "")
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and path.startswith(self.prefix)
+            and path not in self.exclude
+        )
+
+    def _base_etag(self, scope, headers: Headers) -> str:
+        key = "|".join((
+            self.salt,
+            self.version_fn(),
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            headers.get("accept", ""),
+        ))
+        return '"b-' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+
+    @staticmethod
+    def _variant(base_etag: str, encoding: str) -> str:
+        return base_etag if encoding == "identity" else f'{base_etag[:-1]}-{encoding}"'
+
+    async def _send_body(self, send, status, headers, body):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        base_etag = self._base_etag(scope, request_headers)
+        encoding = _choose_encoding(request_headers.get("accept-encoding", ""))
+        etag = self._variant(base_etag, encoding)
+        validators = [
+            (b"etag", etag.encode()),
+            (b"cache-control", self.cache_control.encode()),
+            (b"vary", b"Accept, Accept-Encoding"),
+        ]
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and any(
+            etag_in_header(if_none_match, self._variant(base_etag, enc)) for enc in ("identity", "gzip", "br")
+        ):
+            await self._send_body(send, 304, validators, b"")
+            return
+
+        cached = self._bodies.get((base_etag, encoding))
+        if cached is not None:
+            content_headers, body, stored_etag = cached
+            validators[0] = (b"etag", stored_etag.encode())
+            await self._send_body(send, 200, content_headers + validators, body)
+            return
+
+        # Run the handler and capture its complete response
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        status = start.get("status", 500)
+        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() not in (b"content-length", b"etag")]
+
+        if status != 200:
+            await self._send_body(send, status, headers + [(b"content-length", str(len(body)).encode())], body)
+            return
+
+        if encoding != "identity" and len(body) >= self.min_size:
+            body = _compress(body, encoding)
+            headers.append((b"content-encoding", encoding.encode()))
+        else:
+            # Too small to compress: this representation is the identity one
+            etag = base_etag
+            validators[0] = (b"etag", etag.encode())
+        headers.append((b"content-length", str(len(body)).encode()))
+        if len(body) <= self.max_cached_body:
+            self._bodies.set((base_etag, encoding), (headers, body, etag))
+        await self._send_body(send, 200, headers + validators, body)
+
+    def stats(self) -> dict:
+        return self._bodies.stats()
@@ -1,23 +1,91 @@
-from fastapi import APIRouter
-from services.data_loader import get_strategy_metrics, get_raw_returns_series, load_combined_equity_curve, compute_factor_attribution, DATA_STORE
+from fastapi import APIRouter, Query, Request, Response
+from pydantic import BaseModel, Field
+from services.data_loader import get_prefix_index, equity_curve_columns, equity_curve_metrics, compute_factor_attribution, compute_factor_attribution_batch, compute_rolling_attribution, DATA_STORE, RETURNS_STORE, METRICS_SNAPSHOT, STRATEGY_NAMES, STRATEGY_REGISTRY
+from services.executor import run_blocking, executor_stats
+from services.regimes import get_strategy_regimes, get_regime_matrix
+from services.panel import correlation_matrices, SHARED_PLANE
+from services.blend import compute_blend
+from services.factor_refresh import factor_status
+from services.prefix_index import sum_stats
+from services.encoding import negotiate_format, table_response, json_response, columns_to_records
 import numpy as np
 import os
+from datetime import date
+from typing import Literal
 
 router = APIRouter()
 
 @router.get("/debug")
 def debug_paths():
     files = os.listdir(DATA_STORE) if os.path.exists(DATA_STORE) else []
-    return {"data_store_path": DATA_STORE, "exists": os.path.exists(DATA_STORE), "files": files}
+    return {
+        "data_store_path": DATA_STORE,
+        "exists": os.path.exists(DATA_STORE),
+        "files": files,
+        "returns_store": RETURNS_STORE.stats(),
+        "metrics_snapshot": METRICS_SNAPSHOT.stats(),
+        "strategies": STRATEGY_REGISTRY.stats(),
+        "shared_panel": SHARED_PLANE.stats() if SHARED_PLANE is not None else None,
+        "executor": executor_stats(),
+        "factors": factor_status(),
+    }
+
+METRIC_SORT_FIELDS = ("name", "cagr", "volatility", "sharpe", "max_dd", "ytd")
+
 
 @router.get("/metrics")
-def get_metrics():
-    return get_strategy_metrics()
+def get_metrics(
+    sort: Literal[METRIC_SORT_FIELDS] | None = None,
+    order: Literal["asc", "desc"] = "asc",
+    offset: int | None = Query(None, ge=0),
+    limit: int | None = Query(None, ge=1, le=1000),
+):
+    """
+    Headline metrics for every registered strategy. Without paging or sort
+    parameters this is the {strategy_id: row} map the dashboard reads.
+    With any of `sort`, `offset` or `limit` it returns one page:
+    {"total", "offset", "limit", "sort", "order", "items": [{"id", ...row}]}.
+    ETag/304 come from HTTPCacheMiddleware.
+    """
+    STRATEGY_REGISTRY.refresh()
+    # One scandir instead of a stat per strategy while nothing has changed
+    version = (STRATEGY_REGISTRY.generation, RETURNS_STORE.directory_version())
+    if sort is None and offset is None and limit is None:
+        return METRICS_SNAPSHOT.table(version)[1]
+
+    offset = offset or 0
+    _, total, page = METRICS_SNAPSHOT.page(sort, order == "desc", offset, limit, version)
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "sort": sort,
+        "order": order,
+        "items": [{"id": sid, **row} for sid, row in page],
+    }
 
 @router.get("/equity-curve/{strategy_id}")
-def get_equity_curve(strategy_id: str):
-    """Serves the merged Cumulative Returns and Alpha Metrics for the LineChart component."""
-    return load_combined_equity_curve(strategy_id)
+async def get_equity_curve(
+    request: Request,
+    strategy_id: str,
+    start: date | None = None,
+    end: date | None = None,
+    max_points: int | None = Query(None, ge=10, le=20000),
+    format: str | None = Query(None, pattern="^(records|columns|arrow)$"),
+):
+    """
+    Serves the merged Cumulative Returns and Alpha Metrics for the LineChart component.
+    Optional `start`/`end` slice the curve; `max_points` downsamples it (LTTB).
+    `format=columns` (or `Accept: application/octet-stream` for Arrow IPC)
+    returns the series column-wise, encoded straight from the arrays.
+    """
+    columns, metrics = await run_blocking(
+        "equity_curve", equity_curve_columns, strategy_id,
+        start.isoformat() if start else None, end.isoformat() if end else None, max_points,
+    )
+    if columns is None:
+        return {"timeseries": [], "metrics": {}}
+    return table_response(negotiate_format(request, format), "timeseries", columns, {"metrics": metrics})
 
 def calculate_trailing_stats(returns_series, periods_in_year=252):
     """Helper to calculate trailing performance and volatility."""
@@ -46,53 +114,336 @@ def calculate_trailing_stats(returns_series, periods_in_year=252):
         
     return {"performance_pct": round(cum_ret, 2), "volatility_pct": round(volatility, 2), "is_annualized": False}
 
-@router.get("/strategy/{strategy_id}/performance")
-async def get_strategy_performance(strategy_id: str):
+def calculate_period_stats(returns_series, periods_in_year=252):
     """
-    Returns trailing performance (1D, 1W, 1M, 1Q, 1Y, 3Y, 5Y, 10Y, Max)
+    Cumulative (never annualized) return, annualized volatility and max
+    drawdown of a log-return slice, e.g. a market regime.
     """
-    raw_series = get_raw_returns_series(strategy_id)
-    if raw_series.empty:
-        return {"error": "Data not found"}
-        
-    # Standard trailing periods in trading days
-    trailing_periods = {
-        "1 Day": 1,
-        "1 Week": 5,
-        "1 Month": 21,
-        "1 Quarter": 63,
-        "1 Year": 252,
-        "3 Years": 252 * 3,
-        "5 Years": 252 * 5,
-        "10 Years": 252 * 10,
-        "Max": len(raw_series)
+    if len(returns_series) == 0:
+        return {"performance_pct": 0.0, "volatility_pct": 0.0, "max_dd_pct": 0.0, "is_annualized": False}
+    r = np.asarray(returns_series, dtype=np.float64)
+    stats = sum_stats(float(r.sum()), float((r * r).sum()), len(r), periods_in_year, annualize=False)
+    path = np.cumsum(r)
+    peak = np.maximum(np.maximum.accumulate(path), 0.0)
+    stats["max_dd_pct"] = round(float((np.exp((path - peak).min()) - 1) * 100), 2)
+    return stats
+
+# Standard trailing periods in trading days ("Max" is the full history)
+TRAILING_PERIODS = {
+    "1 Day": 1,
+    "1 Week": 5,
+    "1 Month": 21,
+    "1 Quarter": 63,
+    "1 Year": 252,
+    "3 Years": 252 * 3,
+    "5 Years": 252 * 5,
+    "10 Years": 252 * 10,
+    "Max": None,
+}
+
+def _period_row(label_key, label, stats):
+    return {
+        label_key: label,
+        "performance": stats["performance_pct"],
+        "volatility": stats["volatility_pct"],
+        "is_annualized": stats["is_annualized"],
     }
-    
+
+def compute_trailing_performance(strategy_id: str, start: str | None = None, end: str | None = None):
+    """
+    Trailing performance (1D, 1W, 1M, 1Q, 1Y, 3Y, 5Y, 10Y, Max), YTD and
+    calendar-year returns for one strategy. Each window is answered from
+    cached prefix sums of r and r² in O(1). `start`/`end` add a custom window.
+    """
+    index = get_prefix_index(strategy_id)
+    if index is None:
+        return {"error": "Data not found"}
+
+    n = len(index)
     response_data = []
-    for period_name, days in trailing_periods.items():
-        if days > len(raw_series) and period_name != "Max":
+    for period_name, days in TRAILING_PERIODS.items():
+        if days is not None and days > n:
             continue # Skip periods longer than available history
-            
-        slice_data = raw_series.iloc[-days:] if days <= len(raw_series) else raw_series
-        stats = calculate_trailing_stats(slice_data)
-        
-        response_data.append({
-            "period": period_name,
-            "performance": stats["performance_pct"],
-            "volatility": stats["volatility_pct"],
-            "is_annualized": stats["is_annualized"]
-        })
-        
-    return {"performance_analysis": response_data}
+        stats = index.trailing(days if days is not None else n)
+        response_data.append(_period_row("period", period_name, stats))
+
+    result = {
+        "performance_analysis": response_data,
+        "ytd": _period_row("period", "YTD", index.ytd()),
+        "calendar_years": [_period_row("year", year, index.calendar_year(year)) for year in index.years()],
+    }
+    if start or end:
+        i, j = index.bounds(start, end)
+        custom = _period_row("period", "Custom", index.stats(i, j))
+        custom["start"] = str(index.dates[i])[:10] if j > i else start
+        custom["end"] = str(index.dates[j - 1])[:10] if j > i else end
+        custom["days"] = j - i
+        result["custom"] = custom
+    return result
+
+def compute_performance_grid(start: str | None = None, end: str | None = None):
+    """The full period grid for every strategy in STRATEGY_NAMES."""
+    return {sid: compute_trailing_performance(sid, start, end) for sid in STRATEGY_NAMES}
+
+@router.get("/strategy/{strategy_id}/performance")
+async def get_strategy_performance(strategy_id: str, start: date | None = None, end: date | None = None):
+    """
+    Returns trailing performance (1D, 1W, 1M, 1Q, 1Y, 3Y, 5Y, 10Y, Max),
+    plus YTD, calendar years and an optional custom `start`/`end` window.
+    """
+    return await run_blocking(
+        "performance", compute_trailing_performance, strategy_id,
+        start.isoformat() if start else None, end.isoformat() if end else None,
+    )
+
+@router.get("/performance")
+async def get_all_performance(start: date | None = None, end: date | None = None):
+    """Period grid for all strategies in one request, keyed by strategy id."""
+    return await run_blocking(
+        "performance", compute_performance_grid,
+        start.isoformat() if start else None, end.isoformat() if end else None,
+    )
+
+
+def _factor_freshness(response: Response) -> dict:
+    """Factor panel staleness, as X-Factor-As-Of / X-Factor-Stale headers and as a dict for the body."""
+    status = factor_status()
+    response.headers["X-Factor-As-Of"] = status["as_of"] or ""
+    response.headers["X-Factor-Stale"] = "true" if status["stale"] else "false"
+    return status
 
 
 @router.get("/strategy/{strategy_id}/attribution")
-def get_strategy_attribution(strategy_id: str):
+async def get_strategy_attribution(strategy_id: str, response: Response):
     """
     OLS Factor Attribution: r = alpha + beta_mkt*SPY + beta_size*(IWM-SPY) + beta_value*(IVE-IVW)
     Returns annualized alpha, market/size/value betas, R², tracking error, information ratio.
+    `factor_data` reports how fresh the factor panel behind the fit is.
+    """
+    result = await run_blocking("attribution", compute_factor_attribution, strategy_id)
+    freshness = _factor_freshness(response)
+    if not result:
+        return {"error": "Attribution data unavailable", "strategy_id": strategy_id, "factor_data": freshness}
+    return {**result, "factor_data": freshness}
+
+
+@router.get("/strategy/{strategy_id}/attribution/rolling")
+async def get_rolling_attribution(
+    strategy_id: str,
+    response: Response,
+    window: int = Query(252, ge=60, le=2520),
+    step: int = Query(1, ge=1, le=252),
+):
+    """
+    Time-varying factor exposures: alpha, the five betas and R² over a
+    trailing `window` of trading days, plus rolling vol/Sharpe, sampled
+    every `step` days.
+    """
+    result = await run_blocking("attribution", compute_rolling_attribution, strategy_id, window, step)
+    freshness = _factor_freshness(response)
+    if not result:
+        return {"error": "Attribution data unavailable", "strategy_id": strategy_id, "factor_data": freshness}
+    return {**result, "factor_data": freshness}
+
+
+@router.get("/strategy/{strategy_id}/regimes")
+async def get_strategy_regime_stats(strategy_id: str, response: Response):
     """
-    result = compute_factor_attribution(strategy_id)
+    Return, volatility, max drawdown and beta to SPY of a strategy inside each
+    registered stress window (dot-com, GFC, COVID crash, 2022 rate shock).
+    """
+    result = await run_blocking("regimes", get_strategy_regimes, strategy_id)
+    _factor_freshness(response)
     if not result:
-        return {"error": "Attribution data unavailable", "strategy_id": strategy_id}
+        return {"error": "Strategy not found", "strategy_id": strategy_id}
+    return result
+
+
+@router.get("/regimes")
+async def get_regimes_matrix(response: Response):
+    """Strategies x regimes stress-test table for every strategy."""
+    result = await run_blocking("regimes", get_regime_matrix)
+    _factor_freshness(response)
+    return result
+
+
+@router.get("/attribution")
+async def get_all_attributions(response: Response):
+    """
+    Factor attribution for every strategy in one pass, sharing the factor
+    design matrix and its factorization across strategies.
+    """
+    results = await run_blocking("attribution", compute_factor_attribution_batch)
+    _factor_freshness(response)
+    return {
+        sid: result if result else {"error": "Attribution data unavailable", "strategy_id": sid}
+        for sid, result in results.items()
+    }
+
+
+@router.get("/correlation")
+async def get_correlation(
+    response: Response,
+    kind: Literal["corr", "cov"] = "corr",
+    method: Literal["full", "rolling", "ewma"] = "full",
+    assets: str | None = None,
+    window: int = Query(63, ge=20, le=2520),
+    halflife: float = Query(21.0, gt=1.0, le=1260.0),
+    step: int = Query(21, ge=1, le=252),
+):
+    """
+    Correlation or annualized covariance across strategies and factor ETFs
+    (comma-separated `assets`, default all) on their common dates:
+    full-sample, trailing `window` rolling, or EWMA with `halflife` days.
+    Rolling and EWMA series are limited to CORRELATION_SERIES_MAX_ASSETS
+    assets (422 above that); pass `assets` to pick a subset. Long series
+    are thinned to CORRELATION_SERIES_MAX_VALUES values by widening `step`;
+    the response's `step` is the one used.
+    """
+    selected = [a.strip() for a in assets.split(",") if a.strip()] if assets else None
+    try:
+        result = await run_blocking("correlation", correlation_matrices, kind, method, selected, window, halflife, step)
+    except KeyError as exc:
+        return {"error": f"Unknown assets: {exc.args[0]}"}
+    except ValueError as exc:
+        response.status_code = 422
+        return {"error": str(exc)}
+    _factor_freshness(response)
+    return result
+
+
+class BlendRequest(BaseModel):
+    weights: dict[str, float] | None = None
+    objective: Literal["max_sharpe", "min_vol", "risk_parity"] | None = None
+    strategies: list[str] | None = None
+    max_points: int | None = Field(1000, ge=10, le=20000)
+
+
+@router.post("/blend")
+async def post_blend(
+    req: BlendRequest,
+    request: Request,
+    format: str | None = Query(None, pattern="^(records|columns|arrow)$"),
+):
+    """
+    Daily-rebalanced blend of strategies with the same timeseries/metrics
+    shape as /equity-curve. Pass explicit `weights`, or an `objective`
+    (max_sharpe, min_vol, risk_parity) optimized over `strategies`.
+    Built for interactive sliders, so it defaults to the column-wise
+    encoding and 1000 points; ask for format=records or a larger
+    max_points explicitly.
+    """
+    if req.objective is None and not req.weights:
+        return {"error": "Provide weights or an objective"}
+    result = await run_blocking("blend", compute_blend, req.weights, req.objective, req.strategies, req.max_points)
+    if "error" in result:
+        return result
+    extra = {"metrics": result["metrics"], "weights": result["weights"], "objective": result["objective"]}
+    fmt = negotiate_format(request, format)
+    if format is None and fmt == "records":
+        fmt = "columns"
+    return table_response(fmt, "timeseries", result["columns"], extra)
+
+
+BATCH_SECTIONS = ("metrics", "performance", "curve", "attribution", "regimes")
+
+
+class BatchRequest(BaseModel):
+    strategies: list[str] | None = None
+    sections: list[Literal[BATCH_SECTIONS]] = Field(default_factory=lambda: list(BATCH_SECTIONS))
+    start: date | None = None
+    end: date | None = None
+    max_points: int | None = Field(1000, ge=0, le=20000)
+
+
+def compute_batch(strategy_ids, sections, start=None, end=None, max_points=None, fmt="records"):
+    """
+    Every requested section for every requested strategy in one pass. Only
+    the requested metrics rows are checked, attribution is fitted in one batch over
+    the shared factor design, and each strategy's returns, prefix index
+    and SPY-aligned curve are loaded once and reused by every section.
+    `max_points=0` returns curve metrics without the timeseries.
+    """
+    sections = [s for s in BATCH_SECTIONS if s in set(sections)]
+    known = [sid for sid in strategy_ids if sid in STRATEGY_NAMES]
+    out = {sid: {} for sid in known}
+
+    if "metrics" in sections:
+        for sid in known:
+            out[sid]["metrics"] = METRICS_SNAPSHOT.get(sid)[1]
+
+    if "attribution" in sections:
+        for sid, result in compute_factor_attribution_batch(known).items():
+            out[sid]["attribution"] = result or {"error": "Attribution data unavailable", "strategy_id": sid}
+
+    for sid in known:
+        if "performance" in sections:
+            out[sid]["performance"] = compute_trailing_performance(sid, start, end)
+        if "curve" in sections and max_points == 0:
+            out[sid]["curve"] = {"metrics": equity_curve_metrics(sid)}
+        elif "curve" in sections:
+            columns, metrics = equity_curve_columns(sid, start, end, max_points)
+            if columns is None:
+                timeseries = []
+            else:
+                timeseries = columns if fmt == "columns" else columns_to_records(columns)
+            out[sid]["curve"] = {"metrics": metrics, "timeseries": timeseries}
+        if "regimes" in sections:
+            out[sid]["regimes"] = get_strategy_regimes(sid) or {"error": "Strategy not found", "strategy_id": sid}
+
+    return {
+        "sections": sections,
+        "strategies": out,
+        "unknown": [sid for sid in strategy_ids if sid not in STRATEGY_NAMES],
+    }
+
+
+async def _run_batch(response: Response, strategies, sections, start, end, max_points, fmt):
+    ids = list(dict.fromkeys(strategies)) if strategies else list(STRATEGY_NAMES)
+    result = await run_blocking(
+        "batch", compute_batch, ids, sections,
+        start.isoformat() if start else None, end.isoformat() if end else None,
+        max_points, fmt or "records",
+    )
+    if "attribution" in result["sections"] or "regimes" in result["sections"]:
+        result["factor_data"] = _factor_freshness(response)
+    if fmt == "columns":
+        return json_response(result, headers={k: v for k, v in response.headers.items() if k.startswith("x-factor")})
     return result
+
+
+@router.get("/batch")
+async def get_batch(
+    response: Response,
+    strategies: str | None = None,
+    sections: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    max_points: int | None = Query(1000, ge=0, le=20000),
+    format: str | None = Query(None, pattern="^(records|columns)$"),
+):
+    """
+    Metrics, performance, equity curve, attribution and regimes for several
+    strategies in one response keyed by strategy id. `strategies` and
+    `sections` are comma-separated (default: all of each). Each section has
+    the same shape as its single-strategy route; `start`/`end` and
+    `max_points` apply to the performance custom window and the curve, and
+    `max_points=0` returns curve metrics only. A GET, so it is served
+    through the ETag/304 cache like the other backtest reads.
+    """
+    ids = [s.strip() for s in strategies.split(",") if s.strip()] if strategies else None
+    wanted = [s.strip() for s in sections.split(",") if s.strip()] if sections else list(BATCH_SECTIONS)
+    unknown = [s for s in wanted if s not in BATCH_SECTIONS]
+    if unknown:
+        return {"error": f"Unknown sections: {', '.join(unknown)}"}
+    return await _run_batch(response, ids, wanted, start, end, max_points, format)
+
+
+@router.post("/batch")
+async def post_batch(
+    req: BatchRequest,
+    response: Response,
+    format: str | None = Query(None, pattern="^(records|columns)$"),
+):
+    """Body form of GET /batch, for id lists too long for a query string. Not HTTP-cached."""
+    return await _run_batch(response, req.strategies, req.sections, req.start, req.end, req.max_points, format)
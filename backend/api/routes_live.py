@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from datetime import datetime
 import random
-from services.data_loader import get_strategy_metrics
+from services.data_loader import METRICS_SNAPSHOT
+from api.http_cache import etag_matches, not_modified
 
 router = APIRouter()
 
@@ -16,16 +17,21 @@ def get_live_status():
     }
 
 @router.get("/stats/{strategy_id}")
-def get_live_metrics(strategy_id: str):
+def get_live_metrics(strategy_id: str, request: Request, response: Response):
     """Provides the live metrics for the LiveStatsBanner component."""
-    metrics = get_strategy_metrics()
-    
-    if not metrics or strategy_id not in metrics:
+    row_etag, strat_data = METRICS_SNAPSHOT.get(strategy_id)
+    if strat_data is None:
         return {"error": "Strategy not found", "status": "OFFLINE"}
-        
-    strat_data = metrics.get(strategy_id, {})
+
+    # last_updated rolls over daily, so the date is part of the validator
+    today = datetime.now().strftime("%Y-%m-%d")
+    etag = f'{row_etag[:-1]}-{today}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     return {
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
+        "last_updated": today,
         "ytd_return": strat_data.get("ytd", 0.0),
         "current_drawdown": strat_data.get("max_dd", 0.0),
         "rolling_30d_vol": strat_data.get("volatility", 0.0),
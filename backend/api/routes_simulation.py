@@ -1,72 +1,250 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import os
+from typing import Literal
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 import numpy as np
+from services.cache import TTLCache
+from services.instrumentation import register_cache
+from services.executor import run_blocking, ExecutorSaturated
+from services.encoding import negotiate_format, columns_to_records, dumps, arrow_response
+from services.monte_carlo import gbm_quantile_bands, gbm_quantile_bands_multi, bootstrap_quantile_bands, stream_quantile_bands, MAX_SIMULATIONS, SHOCK_BANK
+from services.data_loader import STRATEGY_FILES, RETURNS_STORE, get_monthly_return_pool
 
 router = APIRouter()
 
+# Finished projections keyed by the normalized request. Traffic is dominated by
+# a handful of default slider positions, which are then served from memory.
+_RESULT_CACHE = TTLCache(
+    maxsize=int(os.getenv("SIM_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("SIM_CACHE_TTL_SECONDS", "600")),
+)
+register_cache("simulation_results", _RESULT_CACHE.stats)
+register_cache("shock_bank", SHOCK_BANK.stats)
+
 class SimulationRequest(BaseModel):
     initial_investment: float
     monthly_contribution: float
-    cagr: float
-    volatility: float
+    # Required for "gbm"; ignored by "bootstrap", which draws from history
+    cagr: float | None = None
+    volatility: float | None = None
     base_cagr: float | None = None
     base_volatility: float | None = None
-    years: int = 10
-
-def _run_gbm(initial, contribution, cagr, vol, years, num_simulations=1000):
-    months = years * 12
-    dt = 1/12.0
-    mu = cagr / 100.0
-    sigma = vol / 100.0
-    
-    drift = (mu - 0.5 * sigma**2) * dt
-    shock = sigma * np.sqrt(dt) * np.random.normal(0, 1, size=(num_simulations, months))
-    monthly_returns = np.exp(drift + shock)
-    
-    portfolio_paths = np.zeros((num_simulations, months + 1))
-    portfolio_paths[:, 0] = initial
-    
-    for m in range(1, months + 1):
-        portfolio_paths[:, m] = (portfolio_paths[:, m-1] + contribution) * monthly_returns[:, m-1]
-        
-    p10 = np.percentile(portfolio_paths, 10, axis=0)
-    p50 = np.percentile(portfolio_paths, 50, axis=0)
-    p90 = np.percentile(portfolio_paths, 90, axis=0)
+    years: int = Field(10, ge=1, le=50)
+    num_simulations: int = Field(1000, ge=100, le=MAX_SIMULATIONS)
+    precision: Literal["float64", "float32"] = "float64"
+    seed: int | None = Field(None, ge=0)
+    # "bootstrap" resamples the strategy's historical monthly returns instead
+    # of drawing lognormal shocks from cagr/volatility
+    mode: Literal["gbm", "bootstrap"] = "gbm"
+    strategy_id: str | None = None
+    block_months: float = Field(6.0, ge=1.0, le=60.0)
+
+    @model_validator(mode="after")
+    def _gbm_needs_parameters(self):
+        if self.mode == "gbm" and (self.cagr is None or self.volatility is None):
+            raise ValueError("cagr and volatility are required in gbm mode")
+        return self
+
+def _cache_key(req: SimulationRequest):
+    """
+    Normalized request tuple. Money is rounded to cents and rates to basis
+    points, so float noise from the slider does not fragment the cache.
+    Unseeded requests are cached too: within the TTL, identical inputs get
+    the same sampled projection. Bootstrap runs also key on the strategy
+    file's version, so new returns invalidate them, and leave out cagr and
+    volatility, which they do not use.
+    """
+    has_base = req.base_cagr is not None and req.base_volatility is not None
+    bootstrap = None
+    if req.mode == "bootstrap":
+        files = STRATEGY_FILES.get(req.strategy_id)
+        bootstrap = (req.strategy_id, round(req.block_months, 2),
+                     RETURNS_STORE.version(files[0]) if files else None)
+    return (
+        round(req.initial_investment, 2),
+        round(req.monthly_contribution, 2),
+        round(req.cagr, 4) if bootstrap is None else None,
+        round(req.volatility, 4) if bootstrap is None else None,
+        round(req.base_cagr, 4) if has_base else None,
+        round(req.base_volatility, 4) if has_base else None,
+        req.years,
+        req.seed,
+        req.num_simulations,
+        req.precision,
+        bootstrap,
+    )
+
+def _run_gbm(initial, contribution, cagr, vol, years, num_simulations=1000, seed=None, rng=None, dtype=np.float64):
+    bands = gbm_quantile_bands(initial, contribution, cagr, vol, years,
+                               num_simulations=num_simulations, seed=seed, rng=rng, dtype=dtype)
+    p10, p50, p90 = bands
     return p10, p50, p90
 
+def _simulate(req: SimulationRequest) -> dict:
+    """Projection bands as columns: month index plus one rounded array per band."""
+    months = req.years * 12
+    has_base = req.base_cagr is not None and req.base_volatility is not None
+
+    dtype = np.dtype(req.precision)
+
+    if req.mode == "bootstrap":
+        pool = get_monthly_return_pool(req.strategy_id)
+        if pool is None or len(pool) == 0:
+            return None
+        bands = [bootstrap_quantile_bands(
+            req.initial_investment, req.monthly_contribution, pool, req.years,
+            num_simulations=req.num_simulations, mean_block=req.block_months,
+            seed=req.seed, dtype=dtype,
+        )]
+        if has_base:
+            bands += gbm_quantile_bands_multi(
+                req.initial_investment, req.monthly_contribution,
+                [(req.base_cagr, req.base_volatility)], req.years,
+                num_simulations=req.num_simulations, seed=req.seed, dtype=dtype,
+            )
+    else:
+        # Target and base runs share one shock draw
+        params = [(req.cagr, req.volatility)]
+        if has_base:
+            params.append((req.base_cagr, req.base_volatility))
+        bands = gbm_quantile_bands_multi(
+            req.initial_investment, req.monthly_contribution, params, req.years,
+            num_simulations=req.num_simulations, seed=req.seed, dtype=dtype
+        )
+
+    return _band_columns(months, bands)
+
+def _band_columns(months: int, bands: list) -> dict:
+    """Target bands, plus base bands when present, as the projection columns."""
+    # Rounded for Recharts (Next.js) once per band, not per point
+    tgt = np.round(bands[0], 2)
+    columns = {
+        "month": np.arange(months + 1),
+        "pessimistic": tgt[0],
+        "expected": tgt[1],
+        "optimistic": tgt[2],
+    }
+    if len(bands) > 1:
+        base = np.round(bands[1], 2)
+        columns["base_pessimistic"] = base[0]
+        columns["base_expected"] = base[1]
+        columns["base_optimistic"] = base[2]
+    return columns
+
+class _Projection:
+    """A finished projection; JSON encodings are built once and reused on cache hits."""
+
+    __slots__ = ("columns", "_encoded")
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._encoded = {}
+
+    def encoded(self, fmt: str) -> bytes:
+        body = self._encoded.get(fmt)
+        if body is None:
+            table = self.columns if fmt == "columns" else columns_to_records(self.columns)
+            body = self._encoded[fmt] = dumps({"projection": table})
+        return body
+
 @router.post("/simulate")
-async def run_monte_carlo(req: SimulationRequest):
+async def run_monte_carlo(req: SimulationRequest, request: Request,
+                          format: str | None = Query(None, pattern="^(records|columns|arrow)$")):
     """
     Generates a probabilistic wealth projection based on Geometric Brownian Motion.
     Returns the 10th, 50th, and 90th percentiles for both target and base strategies.
+    Pass `seed` for a reproducible projection. `format=columns` returns one
+    array per band; `Accept: application/octet-stream` returns Arrow IPC.
+    `mode=bootstrap` with a `strategy_id` resamples that strategy's historical
+    monthly returns in blocks (mean length `block_months`) instead.
+    """
+    if req.mode == "bootstrap" and req.strategy_id not in STRATEGY_FILES:
+        return {"error": "Strategy not found", "strategy_id": req.strategy_id}
+    key = _cache_key(req)
+    projection = _RESULT_CACHE.get(key)
+    if projection is None:
+        columns = await run_blocking("simulate", _simulate, req, pool="process")
+        if columns is None:
+            return {"error": "Return history unavailable", "strategy_id": req.strategy_id}
+        projection = _Projection(columns)
+        _RESULT_CACHE.set(key, projection)
+
+    fmt = negotiate_format(request, format)
+    if fmt == "arrow":
+        return arrow_response(projection.columns)
+    return Response(content=projection.encoded(fmt), media_type="application/json")
+
+def _stream_runs(req: SimulationRequest) -> list | None:
+    """Run specs for stream_quantile_bands: target first, then base if requested."""
+    if req.mode == "bootstrap":
+        pool = get_monthly_return_pool(req.strategy_id)
+        if pool is None or len(pool) == 0:
+            return None
+        runs = [("bootstrap", pool, req.block_months)]
+    else:
+        runs = [("gbm", req.cagr, req.volatility)]
+    if req.base_cagr is not None and req.base_volatility is not None:
+        runs.append(("gbm", req.base_cagr, req.base_volatility))
+    return runs
+
+def _sse(event: str, payload) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
+@router.post("/simulate/stream")
+async def stream_monte_carlo(req: SimulationRequest, request: Request,
+                             chunks: int = Query(10, ge=1, le=100)):
     """
+    Server-Sent Events variant of /simulate for large runs. Paths are
+    simulated in `chunks` batches, and a `progress` event with updated bands
+    (columns format) follows each batch. Bands come from mergeable log-bucket
+    sketches (about 0.5% relative error), so the full path matrix is never
+    held. A final `done` event closes the stream. Work stops at the next
+    batch boundary once the client disconnects.
+    """
+    if req.mode == "bootstrap" and req.strategy_id not in STRATEGY_FILES:
+        return {"error": "Strategy not found", "strategy_id": req.strategy_id}
+    runs = await run_blocking("simulate", _stream_runs, req)
+    if runs is None:
+        return {"error": "Return history unavailable", "strategy_id": req.strategy_id}
+
     months = req.years * 12
-    
-    # Run primary simulation
-    tgt_p10, tgt_p50, tgt_p90 = _run_gbm(
-        req.initial_investment, req.monthly_contribution, req.cagr, req.volatility, req.years
+    batches = stream_quantile_bands(
+        req.initial_investment, req.monthly_contribution, runs, req.years,
+        num_simulations=req.num_simulations, chunks=chunks, seed=req.seed,
+        dtype=np.dtype(req.precision),
     )
-    
-    # Run secondary simulation if requested
-    has_base = req.base_cagr is not None and req.base_volatility is not None
-    if has_base:
-        base_p10, base_p50, base_p90 = _run_gbm(
-            req.initial_investment, req.monthly_contribution, req.base_cagr, req.base_volatility, req.years
-        )
-    
-    # Format for Recharts (Next.js)
-    chart_data = []
-    for m in range(months + 1):
-        point = {
-            "month": m,
-            "pessimistic": float(round(tgt_p10[m], 2)),
-            "expected": float(round(tgt_p50[m], 2)),
-            "optimistic": float(round(tgt_p90[m], 2))
-        }
-        if has_base:
-            point["base_pessimistic"] = float(round(base_p10[m], 2))
-            point["base_expected"] = float(round(base_p50[m], 2))
-            point["base_optimistic"] = float(round(base_p90[m], 2))
-        chart_data.append(point)
-        
-    return {"projection": chart_data}
+
+    async def events():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    return
+                try:
+                    step = await run_blocking("simulate", next, batches, None)
+                except ExecutorSaturated:
+                    yield _sse("error", {"error": "Simulator busy, retry shortly"})
+                    return
+                if step is None:
+                    yield _sse("done", {"paths_done": req.num_simulations})
+                    return
+                done, bands = step
+                yield _sse("progress", {
+                    "paths_done": done,
+                    "num_simulations": req.num_simulations,
+                    "projection": _band_columns(months, bands),
+                })
+        finally:
+            # A batch may still be running on the pool if the response was
+            # cancelled mid-await; it then finishes and the generator is dropped.
+            try:
+                batches.close()
+            except ValueError:
+                pass
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    return {"results": _RESULT_CACHE.stats(), "shock_bank": SHOCK_BANK.stats()}
@@ -0,0 +1,60 @@
+"""data_loader hot paths, cold (caches dropped before each round) and warm."""
+import pytest
+from services import data_loader
+from services.metrics_snapshot import MetricsSnapshot
+
+
+def bench_load_raw_df_cold(benchmark, cold, strategy_id):
+    filename = data_loader.STRATEGY_FILES[strategy_id][0]
+    df = benchmark.pedantic(data_loader._load_raw_df, args=(filename,), setup=cold[0], rounds=cold[1])
+    assert not df.empty
+
+
+def bench_load_raw_df_warm(benchmark, strategy_id):
+    filename = data_loader.STRATEGY_FILES[strategy_id][0]
+    data_loader._load_raw_df(filename)
+    assert not benchmark(data_loader._load_raw_df, filename).empty
+
+
+def bench_strategy_metrics_cold(benchmark, cold, strategy_ids):
+    def build():
+        snapshot = MetricsSnapshot(data_loader._metrics_sources, data_loader.RETURNS_STORE.version,
+                                   data_loader._compute_metrics_row)
+        return snapshot.table()[1]
+
+    rows = benchmark.pedantic(build, setup=cold[0], rounds=cold[1])
+    assert len(rows) == len(strategy_ids)
+
+
+def bench_strategy_metrics_warm(benchmark, strategy_ids):
+    data_loader.get_strategy_metrics()
+    assert len(benchmark(data_loader.get_strategy_metrics)) == len(strategy_ids)
+
+
+def bench_equity_curve_cold(benchmark, cold, strategy_id):
+    result = benchmark.pedantic(data_loader.load_combined_equity_curve, args=(strategy_id,),
+                                setup=cold[0], rounds=cold[1])
+    assert result["timeseries"]
+
+
+@pytest.mark.parametrize("max_points", [None, 1000])
+def bench_equity_curve_warm(benchmark, strategy_id, max_points):
+    data_loader.load_combined_equity_curve(strategy_id)
+    result = benchmark(data_loader.load_combined_equity_curve, strategy_id, None, None, max_points)
+    assert result["timeseries"]
+
+
+def bench_factor_attribution_cold(benchmark, cold, strategy_id):
+    result = benchmark.pedantic(data_loader.compute_factor_attribution, args=(strategy_id,),
+                                setup=cold[0], rounds=cold[1])
+    assert result
+
+
+def bench_factor_attribution_warm(benchmark, strategy_id):
+    data_loader.compute_factor_attribution(strategy_id)
+    assert benchmark(data_loader.compute_factor_attribution, strategy_id)
+
+
+def bench_factor_attribution_batch(benchmark, strategy_ids):
+    data_loader.compute_factor_attribution_batch()
+    assert len(benchmark(data_loader.compute_factor_attribution_batch)) == len(strategy_ids)
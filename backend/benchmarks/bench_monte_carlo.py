@@ -0,0 +1,26 @@
+"""Simulator kernels at several (paths, years) sizes, seeded for stable timings."""
+import numpy as np
+import pytest
+from api.routes_simulation import _run_gbm
+from services.monte_carlo import bootstrap_quantile_bands
+
+SIZES = [(1_000, 10), (10_000, 30), (100_000, 40)]
+
+
+@pytest.mark.parametrize("paths,years", SIZES)
+def bench_run_gbm(benchmark, paths, years):
+    p10, p50, p90 = benchmark(_run_gbm, 10_000, 500, 10.0, 15.0, years, num_simulations=paths, seed=42)
+    assert len(p50) == years * 12 + 1
+
+
+@pytest.mark.parametrize("paths,years", SIZES)
+def bench_run_gbm_float32(benchmark, paths, years):
+    bands = benchmark(_run_gbm, 10_000, 500, 10.0, 15.0, years, num_simulations=paths, seed=42, dtype=np.float32)
+    assert len(bands[1]) == years * 12 + 1
+
+
+@pytest.mark.parametrize("paths,years", SIZES)
+def bench_bootstrap(benchmark, paths, years):
+    pool = np.random.default_rng(0).normal(0.008, 0.045, 300)
+    bands = benchmark(bootstrap_quantile_bands, 10_000, 500, pool, years, num_simulations=paths, seed=42)
+    assert bands.shape == (3, years * 12 + 1)
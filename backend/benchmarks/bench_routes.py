@@ -0,0 +1,75 @@
+"""
+End-to-end route latency through the ASGI stack, in process: routing,
+validation, executor hand-off, encoding and middleware. GET backtest routes
+go through the HTTP cache, so repeated calls measure the cached path. The
+`_uncached` variants change the query string each call to force a full
+recomputation of the response.
+"""
+import itertools
+import pytest
+
+SIM_BODY = {
+    "initial_investment": 10_000, "monthly_contribution": 500,
+    "cagr": 10.0, "volatility": 15.0, "base_cagr": 8.0, "base_volatility": 16.0,
+    "years": 30, "num_simulations": 10_000, "seed": 42,
+}
+
+
+def bench_health(benchmark, client):
+    assert benchmark(client.get, "/").status_code == 200
+
+
+def bench_metrics(benchmark, client):
+    assert benchmark(client.get, "/api/v1/backtest/metrics").status_code == 200
+
+
+def bench_metrics_page_uncached(benchmark, client):
+    offsets = itertools.cycle(range(0, 1000))
+    url = "/api/v1/backtest/metrics?sort=sharpe&order=desc&limit=20&offset="
+    assert benchmark(lambda: client.get(url + str(next(offsets)))).status_code == 200
+
+
+@pytest.mark.parametrize("fmt", ["records", "columns"])
+def bench_equity_curve(benchmark, client, strategy_id, fmt):
+    url = f"/api/v1/backtest/equity-curve/{strategy_id}?format={fmt}"
+    assert benchmark(client.get, url).status_code == 200
+
+
+def bench_equity_curve_uncached(benchmark, client, strategy_id):
+    points = itertools.cycle(range(500, 1500))
+    url = f"/api/v1/backtest/equity-curve/{strategy_id}?format=columns&max_points="
+    assert benchmark(lambda: client.get(url + str(next(points)))).status_code == 200
+
+
+def bench_performance(benchmark, client, strategy_id):
+    url = f"/api/v1/backtest/strategy/{strategy_id}/performance"
+    assert benchmark(client.get, url).status_code == 200
+
+
+def bench_attribution(benchmark, client, strategy_id):
+    url = f"/api/v1/backtest/strategy/{strategy_id}/attribution"
+    assert benchmark(client.get, url).status_code == 200
+
+
+def bench_simulate_cached(benchmark, client):
+    client.post("/api/v1/simulation/simulate", json=SIM_BODY)
+    assert benchmark(client.post, "/api/v1/simulation/simulate", json=SIM_BODY).status_code == 200
+
+
+def bench_simulate_uncached(benchmark, client):
+    seeds = itertools.count(1_000)
+    run = lambda: client.post("/api/v1/simulation/simulate", json={**SIM_BODY, "seed": next(seeds)})
+    assert benchmark(run).status_code == 200
+
+
+def bench_blend(benchmark, client, strategy_ids):
+    weights = itertools.cycle(range(1, 100))
+    run = lambda: client.post("/api/v1/backtest/blend", json={
+        "weights": {sid: next(weights) for sid in strategy_ids[:4]}, "max_points": 1000,
+    })
+    assert benchmark(run).status_code == 200
+
+
+def bench_batch_dashboard(benchmark, client, strategy_ids):
+    body = {"strategies": strategy_ids, "sections": ["metrics", "performance", "curve", "attribution"], "max_points": 0}
+    assert benchmark(client.post, "/api/v1/backtest/batch", json=body).status_code == 200
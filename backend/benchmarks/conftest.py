@@ -0,0 +1,86 @@
+"""
+Benchmark suite for the analytics engine and the API routes.
+
+Runs against a synthetic data_store (see synthetic.py) generated into a
+temporary directory before anything from `services` is imported, so the
+real data_store is never touched. Factor downloads are disabled.
+
+    cd backend/benchmarks
+    pip install -r requirements.txt
+    pytest                              # small scale: 2,520 days x 8 strategies
+    BENCH_SCALE=large pytest            # 100,000 days x 120 strategies
+    pytest --benchmark-compare          # compare against the previous saved run
+
+Every run is saved as JSON under .benchmarks/<machine>/, named after the
+run number and commit, and can be diffed across commits with
+`pytest-benchmark compare`.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import time
+import pytest
+
+from synthetic import SCALES, write_data_store
+
+SCALE = os.getenv("BENCH_SCALE", "small")
+N_DAYS, N_STRATEGIES = SCALES[SCALE]
+
+_DATA_STORE = tempfile.mkdtemp(prefix="algoforall-bench-")
+atexit.register(shutil.rmtree, _DATA_STORE, True)
+os.environ["DATA_STORE_PATH"] = _DATA_STORE
+os.environ["FACTOR_SOURCE"] = "off"
+_SHARED_PANEL_DIR = tempfile.mkdtemp(prefix="algoforall-bench-panel-")
+atexit.register(shutil.rmtree, _SHARED_PANEL_DIR, True)
+os.environ["SHARED_PANEL_DIR"] = _SHARED_PANEL_DIR
+# No manifest: the registry discovers the synthetic backtest_Synthetic_*.csv files
+os.environ["STRATEGY_MANIFEST"] = os.path.join(_DATA_STORE, "strategies.json")
+SYNTHETIC_FILES = write_data_store(_DATA_STORE, N_DAYS, N_STRATEGIES)
+
+from services import data_loader  # noqa: E402  (must follow DATA_STORE_PATH)
+
+assert list(data_loader.STRATEGY_FILES) == list(SYNTHETIC_FILES)
+
+# Cold runs repeat less at large scale, where one call can take seconds
+COLD_ROUNDS = 3 if SCALE == "large" else 10
+
+
+def reset_caches():
+    """Drops every parsed file and derived cache, so the next call pays full cost."""
+    data_loader.RETURNS_STORE.invalidate()
+    for cache in (data_loader._prefix_cache, data_loader._monthly_pool_cache, data_loader._curve_cache):
+        cache.clear()
+    data_loader._factor_frame.update(version=None)
+    data_loader._factor_design_cache.update(version=None, design=None)
+
+
+@pytest.fixture(scope="session")
+def cold():
+    """(setup callable, rounds) for benchmark.pedantic cold runs."""
+    return reset_caches, COLD_ROUNDS
+
+
+@pytest.fixture(scope="session")
+def strategy_ids():
+    return list(SYNTHETIC_FILES)
+
+
+@pytest.fixture(scope="session")
+def strategy_id(strategy_ids):
+    return strategy_ids[0]
+
+
+@pytest.fixture(scope="session")
+def client():
+    """In-process ASGI client for main.app, returned once the warmup reports ready."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        deadline = time.monotonic() + 900
+        while test_client.get("/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                pytest.fail("warmup did not finish")
+            time.sleep(0.05)
+        yield test_client
@@ -0,0 +1,69 @@
+"""
+Synthetic data_store generator for the benchmark suite.
+
+Writes strategy backtests and a factor panel in the same CSV layouts as the
+real data_store: `date,Return` strategy files of daily log-returns, and
+factor_returns.csv with one column per factor ETF. Strategies are
+correlated through a shared market factor, so attribution, blends and
+correlations have realistic structure. History runs forward from 1700 on
+business days, so 100k+ days still fits in datetime64[ns].
+"""
+import os
+import numpy as np
+import pandas as pd
+
+FACTOR_TICKERS = ("SPY", "IWM", "IVE", "IVW", "QUAL", "MTUM")
+
+# name -> (days, strategies)
+SCALES = {
+    "small":  (2_520, 8),
+    "medium": (10_000, 32),
+    "large":  (100_000, 120),
+}
+
+
+def business_days(n_days: int) -> pd.DatetimeIndex:
+    return pd.bdate_range("1700-01-01", periods=n_days, name="Date")
+
+
+def factor_returns(n_days: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Daily log-returns for the factor ETFs, driven by one market factor."""
+    market = rng.standard_normal(n_days) * 0.012 + 0.0003
+    cols = {"SPY": market}
+    for ticker, beta in (("IWM", 1.15), ("IVE", 0.95), ("IVW", 1.05), ("QUAL", 0.9), ("MTUM", 1.1)):
+        cols[ticker] = beta * market + rng.standard_normal(n_days) * 0.006
+    return pd.DataFrame(cols, index=business_days(n_days))[list(FACTOR_TICKERS)]
+
+
+def strategy_returns(market: np.ndarray, n_strategies: int, rng: np.random.Generator) -> np.ndarray:
+    """(n_days, n_strategies) daily log-returns with random market betas, alphas and idiosyncratic vol."""
+    n_days = len(market)
+    betas = rng.uniform(0.3, 1.3, n_strategies)
+    alphas = rng.uniform(-0.0001, 0.0004, n_strategies)
+    vols = rng.uniform(0.004, 0.015, n_strategies)
+    noise = rng.standard_normal((n_days, n_strategies)) * vols
+    return market[:, None] * betas + alphas + noise
+
+
+def strategy_filename(i: int) -> str:
+    return f"backtest_Synthetic_{i:04d}.csv"
+
+
+def write_data_store(root: str, n_days: int, n_strategies: int, seed: int = 7) -> dict:
+    """
+    Populates `root` with n_strategies backtests and factor_returns.csv.
+    Returns {strategy_id: filename}.
+    """
+    os.makedirs(root, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    factors = factor_returns(n_days, rng)
+    factors.to_csv(os.path.join(root, "factor_returns.csv"))
+
+    returns = strategy_returns(factors["SPY"].to_numpy(), n_strategies, rng)
+    dates = factors.index.strftime("%Y-%m-%d")
+    files = {}
+    for i in range(n_strategies):
+        filename = strategy_filename(i)
+        pd.DataFrame({"date": dates, "Return": returns[:, i]}).to_csv(os.path.join(root, filename), index=False)
+        files[f"synthetic_{i:04d}"] = filename
+    return files
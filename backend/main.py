@@ -1,8 +1,56 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from api import routes_backtest, routes_simulation, routes_live
+from fastapi.responses import JSONResponse, PlainTextResponse
+from api.http_cache import HTTPCacheMiddleware
+from services import executor
+from services.executor import ExecutorSaturated
+from services.instrumentation import InstrumentationMiddleware, register_routes, render_prometheus
+from services.warmup import WARMUP, run_warmup
 
-app = FastAPI(title="Quant Portal API", version="1.0.0")
+# The API routers pull in pandas, NumPy and the data_store. They are imported
+# and mounted by the background warmup, so `/` answers as soon as uvicorn is up.
+API_PREFIX = "/api/v1"
+_mounted = {"done": False}
+
+
+def _mount_routers():
+    from api import routes_backtest, routes_simulation, routes_live
+    for router, prefix, tag in (
+        (routes_backtest.router, f"{API_PREFIX}/backtest", "Backtest Analytics"),
+        (routes_simulation.router, f"{API_PREFIX}/simulation", "Monte Carlo Simulator"),
+        (routes_live.router, f"{API_PREFIX}/live", "Live Trading Updates"),
+    ):
+        app.include_router(router, prefix=prefix, tags=[tag])
+        register_routes(prefix, router.routes)
+    app.openapi_schema = None
+    _mounted["done"] = True
+
+
+def _data_store_version():
+    from services.data_loader import RETURNS_STORE, STRATEGY_REGISTRY
+    # The manifest lives outside the data_store, so fold the registry in
+    # explicitly; an edit re-registers strategies and changes every ETag
+    # within STRATEGY_REFRESH_SECONDS.
+    STRATEGY_REGISTRY.refresh()
+    return f"{RETURNS_STORE.directory_version()}-{STRATEGY_REGISTRY.version()}"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(asyncio.to_thread(run_warmup, WARMUP, _mount_routers))
+    yield
+    task.cancel()
+    refresh = sys.modules.get("services.factor_refresh")
+    if refresh is not None:
+        refresh.FACTOR_REFRESHER.stop()
+    executor.shutdown()
+
+
+app = FastAPI(title="Quant Portal API", version="1.0.0", lifespan=lifespan)
 
 # Allow Next.js frontend to communicate securely
 ALLOWED_ORIGINS = [
@@ -11,6 +59,43 @@ ALLOWED_ORIGINS = [
     "https://www.algoforall.com",
 ]
 
+# Backtest routes are pure functions of the data_store: ETag/304, Cache-Control
+# and gzip/brotli. Added before CORS so CORS headers wrap every response.
+app.add_middleware(
+    HTTPCacheMiddleware,
+    prefix=f"{API_PREFIX}/backtest",
+    version_fn=_data_store_version,
+    exclude=("/debug",),
+    max_age=int(os.getenv("HTTP_CACHE_MAX_AGE", "60")),
+    stale_while_revalidate=int(os.getenv("HTTP_CACHE_SWR", "600")),
+    cache_bytes=int(os.getenv("HTTP_CACHE_BYTES", str(64 << 20))),
+    salt=os.getenv("RENDER_GIT_COMMIT", os.getenv("BUILD_ID", "")),
+)
+
+class WarmupGate:
+    """
+    Until the routers are mounted, API calls get a retryable 503 instead of a
+    404. Plain ASGI, so streaming responses and disconnect detection pass
+    through untouched. Sits outside the HTTP cache, so nothing touches the
+    data_store before then.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not _mounted["done"] and scope["path"].startswith(API_PREFIX):
+            response = JSONResponse(
+                status_code=503,
+                content={"error": "Server warming up, please retry", "warmup": WARMUP.snapshot()},
+                headers={"Retry-After": "2"},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+app.add_middleware(WarmupGate)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
@@ -19,14 +104,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(routes_backtest.router, prefix="/api/v1/backtest", tags=["Backtest Analytics"])
-app.include_router(routes_simulation.router, prefix="/api/v1/simulation", tags=["Monte Carlo Simulator"])
-app.include_router(routes_live.router, prefix="/api/v1/live", tags=["Live Trading Updates"])
+# Outermost, so request timings include every other middleware
+app.add_middleware(InstrumentationMiddleware)
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server busy, please retry", "route": exc.route},
+        headers={"Retry-After": "1"},
+    )
 
 @app.get("/")
 def health_check():
     return {"status": "ok", "message": "Quant Engine is online"}
 
+@app.get("/metrics/internal", include_in_schema=False)
+def internal_metrics():
+    """Prometheus text: per-route and per-stage latency histograms, cache hit/miss counters."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def readiness_check():
+    """200 once the data_store is loaded and the caches are warm, 503 until then."""
+    snapshot = WARMUP.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,245 @@
+import threading
+import numpy as np
+import pandas as pd
+from services.cache import TTLCache
+from services.instrumentation import timed, register_cache
+from services.data_loader import STRATEGY_FILES, RISK_FREE_RATE, _curve_metrics
+from services.downsample import downsample_indices
+from services.panel import get_returns_panel, TRADING_DAYS
+
+OBJECTIVES = ("max_sharpe", "min_vol", "risk_parity")
+
+
+class _BlendUniverse:
+    """
+    A set of strategies and SPY. Holds everything a blend needs: daily
+    simple returns (n, k) on the dates where all of them exist, for the
+    matrix-vector product, plus annualized mean and covariance for the
+    optimizers, estimated on each series' (and pair's) own history.
+    """
+
+    __slots__ = ("ids", "dates", "labels", "simple", "spy", "spy_cum", "mu", "cov")
+
+    def __init__(self, ids, dates, log_returns, spy, mu, cov):
+        self.ids = list(ids)
+        self.dates = dates
+        self.labels = np.asarray(pd.DatetimeIndex(dates).strftime("%Y-%m-%d"), dtype=object)
+        self.simple = np.expm1(log_returns)
+        self.spy = spy
+        self.spy_cum = np.expm1(np.cumsum(spy))
+        self.mu = mu
+        self.cov = cov
+
+
+def _pairwise_moments(log_returns: np.ndarray):
+    """
+    Annualized mean and covariance of simple returns with NaN gaps. Each
+    mean uses every day its series exists and each covariance every day
+    both series exist, so one short history does not truncate the others.
+    The pairwise matrix is projected back onto the positive semi-definite
+    cone, which the optimizers rely on.
+    """
+    present = np.isfinite(log_returns)
+    x = np.where(present, np.expm1(np.where(present, log_returns, 0.0)), 0.0)
+    m = present.astype(np.float64)
+    counts = m.T @ m
+    sums = x.T @ m                          # sums[i, j]: x_i over days where j exists
+    cross = x.T @ x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (cross - sums * sums.T / counts) / (counts - 1)
+        mu = np.diagonal(sums) / np.diagonal(counts)
+    cov = np.nan_to_num(cov)
+    cov = (cov + cov.T) / 2
+    vals, vecs = np.linalg.eigh(cov)
+    cov = (vecs * np.clip(vals, 1e-12, None)) @ vecs.T
+    return np.nan_to_num(mu) * TRADING_DAYS, cov * TRADING_DAYS
+
+
+_universe_cache = {}        # strategy ids -> (panel key, _BlendUniverse)
+_universe_lock = threading.Lock()
+_blend_cache = TTLCache(maxsize=512, ttl=600)
+register_cache("blend", _blend_cache.stats)
+
+
+def _get_universe(ids):
+    panel = get_returns_panel()
+    key = tuple(ids)
+    with _universe_lock:
+        cached = _universe_cache.get(key)
+    if cached is not None and cached[0] == panel.key:
+        return cached[1]
+
+    if "SPY" not in panel.columns:
+        return None
+    _, dates, block = panel.common_rows(list(ids) + ["SPY"])
+    if len(dates) < 2:
+        return None
+    _, history = panel.select(list(ids))
+    mu, cov = _pairwise_moments(history)
+    universe = _BlendUniverse(ids, dates, block[:, :-1], block[:, -1], mu, cov)
+    with _universe_lock:
+        _universe_cache[key] = (panel.key, universe)
+    return universe
+
+
+# ── Optimizers (long-only, fully invested) ────────────────────────────────────
+
+def _solve_on(cov: np.ndarray, target: np.ndarray, free: np.ndarray) -> np.ndarray:
+    """min ½ y'Σy s.t. target'y = 1 over the `free` assets only (others held at 0)."""
+    sub = np.ix_(free, free)
+    try:
+        x = np.linalg.solve(cov[sub], target[free])
+    except np.linalg.LinAlgError:
+        x = np.linalg.pinv(cov[sub]) @ target[free]
+    y = np.zeros(len(target))
+    y[free] = x / (target[free] @ x)
+    return y
+
+
+def _long_only(cov: np.ndarray, target: np.ndarray, tol: float = 1e-12) -> np.ndarray:
+    """
+    Solves min ½ y'Σy s.t. target'y = 1, y >= 0 with a primal active-set
+    method and returns y normalized to sum to 1. With target = 1 that is the
+    long-only minimum-variance portfolio; with target = excess return it is
+    the long-only tangency (max Sharpe) portfolio.
+
+    Starting from the single asset with the largest target, each iteration
+    solves the equality-constrained problem on the free assets. If that
+    solution is infeasible, the iterate steps toward it until the first
+    weight hits zero and that asset is fixed at 0. Otherwise the KKT
+    multipliers of the fixed assets, (Σy)_i - ν target_i with ν = y'Σy,
+    are checked, and the most negative one is freed. It stops when all are
+    non-negative, which is optimal for this convex problem.
+    """
+    k = len(target)
+    if k == 0 or target.max() <= 0:
+        # No portfolio with positive target exposure: the single best asset.
+        w = np.zeros(k)
+        if k:
+            w[int(np.argmax(target))] = 1.0
+        return w
+
+    free = np.zeros(k, dtype=bool)
+    start = int(np.argmax(target))
+    free[start] = True
+    y = np.zeros(k)
+    y[start] = 1.0 / target[start]
+    scale = np.abs(np.diagonal(cov)).max() * max(1.0, np.abs(target).max())
+
+    for _ in range(50 * k + 50):
+        z = _solve_on(cov, target, free)
+        negative = free & (z < 0)
+        if negative.any():
+            # Step toward z until the first free weight reaches zero
+            idx = np.flatnonzero(negative)
+            ratios = y[idx] / (y[idx] - z[idx])
+            j = int(np.argmin(ratios))
+            y = y + ratios[j] * (z - y)
+            y[idx[j]] = 0.0
+            free[idx[j]] = False
+            y[~free] = 0.0
+            continue
+
+        y = z
+        grad = cov @ y
+        nu = y @ grad
+        multipliers = grad - nu * target
+        multipliers[free] = 0.0
+        i = int(np.argmin(multipliers))
+        if multipliers[i] >= -tol * scale:
+            break
+        free[i] = True
+
+    y = np.clip(y, 0.0, None)
+    return y / y.sum()
+
+
+def _risk_parity(cov: np.ndarray, tol: float = 1e-10, max_iter: int = 500) -> np.ndarray:
+    """
+    Equal risk contribution by cyclical coordinate descent: each step solves
+    cov_ii x_i² + (cov x - cov_ii x_i)_i x_i = 1/k for x_i > 0. The result
+    is then normalized.
+    """
+    k = len(cov)
+    diag = np.clip(np.diagonal(cov), 1e-18, None)
+    x = 1.0 / np.sqrt(diag)
+    b = 1.0 / k
+    for _ in range(max_iter):
+        prev = x.copy()
+        for i in range(k):
+            c = cov[i] @ x - diag[i] * x[i]
+            x[i] = (-c + np.sqrt(c * c + 4.0 * diag[i] * b)) / (2.0 * diag[i])
+        if np.abs(x - prev).max() < tol * x.max():
+            break
+    return x / x.sum()
+
+
+def optimize_weights(universe: _BlendUniverse, objective: str) -> np.ndarray:
+    if objective == "min_vol":
+        return _long_only(universe.cov, np.ones(len(universe.ids)))
+    if objective == "max_sharpe":
+        return _long_only(universe.cov, universe.mu - RISK_FREE_RATE)
+    return _risk_parity(universe.cov)
+
+
+# ── Blend ─────────────────────────────────────────────────────────────────────
+
+@timed("blend")
+def compute_blend(weights: dict | None = None, objective: str | None = None, strategies=None,
+                  max_points: int | None = None) -> dict:
+    """
+    Daily-rebalanced blend of strategies vs SPY, in the same shape as
+    load_combined_equity_curve plus the weights used. Either explicit
+    `weights` (normalized to sum to 1) or an `objective` solved over
+    `strategies` (default: the strategies in `weights`, else every
+    registered strategy). The curve covers the dates all of them share;
+    the optimizer inputs use each series' full history.
+    """
+    if objective is not None:
+        blending = [sid for sid, v in (weights or {}).items() if v]
+        ids = list(strategies or blending or STRATEGY_FILES)
+    else:
+        weights = {k: v for k, v in (weights or {}).items() if v}
+        ids = list(weights)
+    unknown = [sid for sid in ids if sid not in STRATEGY_FILES]
+    if unknown:
+        return {"error": f"Unknown strategies: {', '.join(unknown)}"}
+    if not ids:
+        return {"error": "No strategies selected"}
+
+    universe = _get_universe(ids)
+    if universe is None:
+        return {"error": "Blend data unavailable"}
+
+    if objective is not None:
+        w = optimize_weights(universe, objective)
+    else:
+        w = np.array([weights[sid] for sid in ids], dtype=np.float64)
+        if (w < 0).any() or w.sum() <= 0:
+            return {"error": "Weights must be non-negative and not all zero"}
+        w = w / w.sum()
+
+    cache_key = (get_returns_panel().key, tuple(ids), tuple(np.round(w, 6)), objective, max_points)
+    cached = _blend_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    blended = np.log1p(universe.simple @ w)
+    stgt = np.expm1(np.cumsum(blended))
+    relative = (1 + stgt) / (1 + universe.spy_cum) - 1
+    metrics = _curve_metrics(pd.Series(blended), pd.Series(universe.spy))
+
+    idx = downsample_indices(stgt, (universe.spy_cum, relative), max_points)
+    result = {
+        "weights": {sid: round(float(x), 6) for sid, x in zip(ids, w)},
+        "objective": objective,
+        "columns": {
+            "date":     universe.labels[idx].tolist(),
+            "STGT":     stgt[idx],
+            "Baseline": universe.spy_cum[idx],
+            "Relative": relative[idx],
+        },
+        "metrics": metrics,
+    }
+    _blend_cache.set(cache_key, result)
+    return result
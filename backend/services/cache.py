@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Used for request-level results (simulation projections, encoded responses)
+    where the key fully determines the value and memory must stay bounded.
+    With `max_bytes`, entries are also evicted until the `sizeof` of all
+    values fits in it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600.0, max_bytes: int | None = None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof if max_bytes is not None else None
+        self._data = OrderedDict()    # key -> (expires_at, value, size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING or item[0] < now:
+                if item is not _MISSING:
+                    del self._data[key]
+                    self.bytes -= item[2]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self.bytes -= self._data.popitem(last=False)[1][2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+            if self.max_bytes is not None:
+                stats.update(bytes=self.bytes, max_bytes=self.max_bytes)
+            return stats
@@ -0,0 +1,145 @@
+"""
+Columnar on-disk copy of the data_store CSVs.
+
+Each CSV gets a directory under data_store/columnar/<stem>/ containing:
+  dates.npy   int64 day ordinals (days since 1970-01-01), shape (n,)
+  values.npy  float64, shape (n, k)
+  meta.json   column names, row count and the (mtime_ns, size) of the CSV it was built from
+
+Both arrays are opened with np.load(mmap_mode="r"), so a cold start maps the
+files instead of parsing dates. ReturnsStore only uses a copy whose recorded
+source signature still matches the CSV, which means a CSV edited or appended
+by live_updater is never shadowed by stale binary data.
+
+Convert everything once with:
+    python -m services.columnar_store [data_store_path]
+"""
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+COLUMNAR_DIR = "columnar"
+_FORMAT_VERSION = 3     # 3: floats parsed round-trip exact; 2: all CSV columns (1 dropped derived ones)
+
+
+def _target_dir(root: str, filename: str) -> str:
+    return os.path.join(root, COLUMNAR_DIR, os.path.splitext(filename)[0])
+
+
+def _normalize(filename: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    float64 values under the CSV's own column names. The copy must carry
+    exactly the CSV's columns: ReturnsStore sizes appended rows from them,
+    and readers rename the first column to Return themselves.
+    """
+    df = df.astype(np.float64)
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def _csv_columns(path: str):
+    """Data column names from the CSV header line, or None if unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n")
+    except OSError:
+        return None
+    return tuple(header.split(",")[1:]) if header else None
+
+
+def _atomic_save(path: str, write):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_columnar(root: str, filename: str, dates, columns, values, source_signature):
+    target = _target_dir(root, filename)
+    os.makedirs(target, exist_ok=True)
+    ordinals = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    values = np.ascontiguousarray(values, dtype=np.float64).reshape(len(ordinals), -1)
+
+    _atomic_save(os.path.join(target, "dates.npy"), lambda f: np.save(f, ordinals))
+    _atomic_save(os.path.join(target, "values.npy"), lambda f: np.save(f, values))
+    meta = {
+        "format": _FORMAT_VERSION,
+        "source": filename,
+        "source_signature": list(source_signature) if source_signature else None,
+        "columns": list(columns),
+        "rows": int(len(ordinals)),
+    }
+    # meta.json is written last and acts as the commit marker
+    _atomic_save(os.path.join(target, "meta.json"), lambda f: f.write(json.dumps(meta).encode()))
+
+
+def open_columnar(root: str, filename: str, source_signature=None):
+    """
+    Memory-maps the columnar copy of `filename`.
+
+    Returns (dates as datetime64[ns], columns, values memmap), or None if no
+    usable copy exists. When `source_signature` is given, the copy must have
+    been built from exactly that version of the CSV and carry the same
+    columns as its header.
+    """
+    target = _target_dir(root, filename)
+    try:
+        with open(os.path.join(target, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != _FORMAT_VERSION:
+        return None
+    if source_signature is not None and meta.get("source_signature") != list(source_signature):
+        return None
+    try:
+        ordinals = np.load(os.path.join(target, "dates.npy"), mmap_mode="r")
+        values = np.load(os.path.join(target, "values.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if values.ndim != 2 or len(ordinals) != meta["rows"] or len(values) != meta["rows"]:
+        return None
+    if values.shape[1] != len(meta["columns"]):
+        return None
+    if source_signature is not None and _csv_columns(os.path.join(root, filename)) != tuple(meta["columns"]):
+        return None
+    dates = np.asarray(ordinals).view("datetime64[D]").astype("datetime64[ns]")
+    return dates, tuple(meta["columns"]), values
+
+
+def columnar_signature(root: str, filename: str):
+    """Signature of a standalone columnar copy (used when its CSV is absent)."""
+    try:
+        st = os.stat(os.path.join(_target_dir(root, filename), "meta.json"))
+    except OSError:
+        return None
+    return ("columnar", st.st_mtime_ns, st.st_size)
+
+
+def convert_csv(root: str, filename: str) -> int:
+    path = os.path.join(root, filename)
+    st = os.stat(path)
+    df = pd.read_csv(path, index_col=0, parse_dates=True, float_precision="round_trip")
+    df = _normalize(filename, df)
+    write_columnar(root, filename, pd.DatetimeIndex(df.index).values, df.columns, df.to_numpy(), (st.st_mtime_ns, st.st_size))
+    return len(df)
+
+
+def convert_data_store(root: str) -> dict:
+    """One-shot conversion of every CSV in the data_store. Returns {filename: rows}."""
+    converted = {}
+    for filename in sorted(os.listdir(root)):
+        if filename.endswith(".csv"):
+            converted[filename] = convert_csv(root, filename)
+    return converted
+
+
+if __name__ == "__main__":
+    from services.data_loader import DATA_STORE
+    root = sys.argv[1] if len(sys.argv) > 1 else DATA_STORE
+    for name, rows in convert_data_store(root).items():
+        print(f"[COLUMNAR] {name}: {rows} rows")
@@ -1,72 +1,76 @@
 import pandas as pd
 import os
+import threading
 import numpy as np
-from functools import lru_cache
+from services.returns_store import ReturnsStore
+from services.metrics_snapshot import MetricsSnapshot
+from services.rolling_metrics import RollingMetrics
+from services.downsample import downsample_indices
+from services.prefix_index import PrefixIndex
+from services.strategy_registry import StrategyRegistry
+from services.instrumentation import timed, register_cache
 
 # Bind to Docker persistent volume path if present, otherwise calculate local path dynamically
 _local_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_store")
 DATA_STORE = os.getenv("DATA_STORE_PATH", _local_path)
 
+# Process-wide parsed-file cache; re-reads a file only when its mtime/size changes.
+RETURNS_STORE = ReturnsStore(DATA_STORE)
+register_cache("returns_store", RETURNS_STORE.stats)
+
 # Current US risk-free rate (approximate Fed Funds / T-Bill yield).
 RISK_FREE_RATE = 0.04  # 4.0% annualized
 
-# ── 6-Model taxonomy ──────────────────────────────────────────────────────────
-STRATEGY_NAMES = {
-    "sector_rotation": "Multiscale Sector Rotation",
-    "large_cap_100":   "Multiscale Large Cap 100",
-    "mag7_momentum":   "Multiscale Mag 7",
-    "stgt_ensemble":   "STGT Ensemble",
-    "risk_parity":     "Multi-Horizon Risk Parity",
-    "quality_factor":  "S&P 500 Quality",
-}
-
-# Each strategy file + its comparison baseline for the equity-curve overlay
-STRATEGY_FILES = {
-    "sector_rotation": ("backtest_Sector_Rotation.csv",  "backtest_Risk_Parity.csv"),
-    "large_cap_100":   ("backtest_Large_Cap_100.csv",    "backtest_Risk_Parity.csv"),
-    "mag7_momentum":   ("backtest_Mag7_Momentum.csv",    "backtest_Risk_Parity.csv"),
-    "stgt_ensemble":   ("backtest_STGT_Ensemble.csv",    "backtest_Sector_Rotation.csv"),
-    "risk_parity":     ("backtest_Risk_Parity.csv",      "backtest_Risk_Parity.csv"),
-    "quality_factor":  ("backtest_Quality_Factor.csv",   "backtest_Risk_Parity.csv"),
-}
+# ── Strategy registry ─────────────────────────────────────────────────────────
+# Display names, and each strategy file + its comparison baseline for the
+# equity-curve overlay. Filled from strategies.json plus any other
+# backtest_*.csv in the data_store; see services/strategy_registry.py.
+STRATEGY_REGISTRY = StrategyRegistry(DATA_STORE)
+STRATEGY_REGISTRY.refresh()
+STRATEGY_NAMES = STRATEGY_REGISTRY.names
+STRATEGY_FILES = STRATEGY_REGISTRY.files
 
 
-def get_strategy_metrics():
-    """Dynamically calculates CAGR, Vol, Sharpe, MaxDD, YTD for all 6 models."""
+@timed("metrics.row")
+def _compute_metrics_row(strategy_id: str, name: str, state=None):
+    """
+    Headline metrics row plus the RollingMetrics state behind it. If the
+    cached file was only extended since `state` was built, just the new
+    rows are folded in.
+    """
+    source = STRATEGY_FILES.get(strategy_id)
+    entry = RETURNS_STORE.get(source[0]) if source is not None else None
+    if entry is None or len(entry.dates) == 0:
+        state = RollingMetrics()
+    elif state is not None and state.lineage == entry.lineage and state.n <= len(entry.dates):
+        state = state.copy()
+        state.extend(entry.dates[state.n:], entry.values[state.n:, 0])
+    else:
+        state = RollingMetrics.from_arrays(entry.dates, entry.values[:, 0], lineage=entry.lineage)
+    c, v, s, d, y = state.headline(RISK_FREE_RATE)
+    return {"name": name, "cagr": c, "volatility": v, "sharpe": s, "max_dd": d, "ytd": y}, state
 
-    def _calc(returns):
-        if returns.empty:
-            return 0.0, 0.0, 0.0, 0.0, 0.0
-        cm = np.exp(returns.sum())
-        yrs = len(returns) / 252.0
-        cagr = (cm ** (1 / yrs) - 1) * 100 if yrs > 0 else 0
 
-        ann_vol = returns.std() * np.sqrt(252)
-        ann_ret_approx = returns.mean() * 252
-        sharpe = (ann_ret_approx - RISK_FREE_RATE) / ann_vol if ann_vol > 0 else 0
+def _metrics_sources():
+    names, files = STRATEGY_REGISTRY.snapshot()
+    return {key: (name, files[key][0]) for key, name in names.items()}
 
-        cum_ret = np.exp(returns.cumsum())
-        max_dd = (cum_ret / cum_ret.cummax() - 1).min() * 100
 
-        current_year = returns.index[-1].year
-        ytd_returns = returns[returns.index.year == current_year]
-        ytd = (np.exp(ytd_returns.sum()) - 1) * 100 if not ytd_returns.empty else 0.0
+# Headline metrics are computed once per data version; see services/metrics_snapshot.py
+METRICS_SNAPSHOT = MetricsSnapshot(_metrics_sources, RETURNS_STORE.version, _compute_metrics_row)
 
-        return round(cagr, 2), round(ann_vol * 100, 2), round(sharpe, 2), round(max_dd, 2), round(ytd, 2)
 
-    metrics_dict = {}
-    for key, name in STRATEGY_NAMES.items():
-        ret = get_raw_returns_series(key)
-        c, v, s, d, y = _calc(ret)
-        metrics_dict[key] = {"name": name, "cagr": c, "volatility": v, "sharpe": s, "max_dd": d, "ytd": y}
-    return metrics_dict
+def get_strategy_metrics():
+    """CAGR, Vol, Sharpe, MaxDD, YTD for every registered strategy, served from the metrics snapshot."""
+    _, rows = METRICS_SNAPSHOT.table()
+    return rows
 
 
+@timed("load_raw_df")
 def _load_raw_df(filename: str):
-    path = os.path.join(DATA_STORE, filename)
-    if not os.path.exists(path):
-        return pd.DataFrame()
-    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df = RETURNS_STORE.get_frame(filename)
+    if df.empty:
+        return df
     if "0" in df.columns:
         df.rename(columns={"0": "Return"}, inplace=True)
     elif len(df.columns) > 0:
@@ -86,46 +90,71 @@ def get_raw_returns_series(strategy_id: str):
     return df["Return"]
 
 
-def _get_spy_returns() -> pd.Series:
-    """
-    Returns SPY daily log-returns from the factor cache (already downloaded
-    for FF5 attribution). Falls back to an empty Series if unavailable.
-    """
-    factors = _load_or_download_factors()
-    if factors.empty or "SPY" not in factors.columns:
-        return pd.Series(dtype=float)
-    return factors["SPY"].dropna()
+_prefix_cache = {}
+_prefix_cache_lock = threading.Lock()
 
 
-def load_combined_equity_curve(strategy_id: str):
-    """
-    Returns merged cumulative returns timeseries + advanced metrics
-    for the ChartInteractive.tsx component.
-    Baseline is SPY (S&P 500) — aligned to the strategy date range.
-    """
-    files = STRATEGY_FILES.get(strategy_id, STRATEGY_FILES["sector_rotation"])
-    target_file = files[0]
+def get_prefix_index(strategy_id: str):
+    """Cached PrefixIndex of a strategy's returns, or None if it has no data."""
+    files = STRATEGY_FILES.get(strategy_id)
+    if not files:
+        return None
+    entry = RETURNS_STORE.get(files[0])
+    if entry is None or len(entry.dates) == 0:
+        return None
+    key = (entry.lineage, len(entry.dates))
+    with _prefix_cache_lock:
+        index = _prefix_cache.get(strategy_id)
+    if index is None or index.key != key:
+        index = PrefixIndex(entry.dates, entry.values[:, 0], key=key)
+        with _prefix_cache_lock:
+            _prefix_cache[strategy_id] = index
+    return index
 
-    df_stgt = _load_raw_df(target_file)
-    if df_stgt.empty:
-        return {"timeseries": [], "metrics": {}}
 
-    # Use SPY as the universal benchmark
-    spy_returns = _get_spy_returns()
-    if spy_returns.empty:
-        return {"timeseries": [], "metrics": {}}
+_monthly_pool_cache = {}    # strategy_id -> (prefix key, read-only array)
+_monthly_pool_lock = threading.Lock()
 
-    # Align SPY to strategy index (inner join on dates)
-    df_stgt["Cumulative"] = np.exp(df_stgt["Return"].cumsum()) - 1
-    spy_aligned = spy_returns.reindex(df_stgt.index).ffill().dropna()
 
-    # Trim strategy to dates where SPY is available
-    df_stgt = df_stgt.loc[spy_aligned.index]
-    spy_cum = np.exp(spy_aligned.cumsum()) - 1
+def get_monthly_return_pool(strategy_id: str):
+    """
+    Calendar-month log-returns of a strategy, for bootstrap resampling.
+    Each month is a difference of the prefix index at month boundaries.
+    The first and last months are dropped because they are usually partial.
+    Returns None when there is no data.
+    """
+    index = get_prefix_index(strategy_id)
+    if index is None:
+        return None
+    with _monthly_pool_lock:
+        cached = _monthly_pool_cache.get(strategy_id)
+    if cached is not None and cached[0] == index.key:
+        return cached[1]
+
+    months = index.dates.astype("datetime64[M]")
+    bounds = np.concatenate(([0], np.flatnonzero(months[1:] != months[:-1]) + 1, [len(index)]))
+    pool = np.diff(index.cs1[bounds])
+    if len(pool) > 3:
+        pool = pool[1:-1]
+    pool.setflags(write=False)
+    with _monthly_pool_lock:
+        _monthly_pool_cache[strategy_id] = (index.key, pool)
+    return pool
+
+
+def _get_spy_returns() -> pd.Series:
+    """
+    Returns SPY daily log-returns from the factor panel (shared with FF5
+    attribution). Falls back to an empty Series if unavailable.
+    """
+    factors = _load_factors()
+    if factors.empty or "SPY" not in factors.columns:
+        return pd.Series(dtype=float)
+    return factors["SPY"].dropna()
 
-    target_returns = df_stgt["Return"].copy()
-    base_returns = spy_aligned.copy()
 
+def _curve_metrics(target_returns: pd.Series, base_returns: pd.Series) -> dict:
+    """Risk/return metrics of a daily log-return series against an aligned benchmark."""
     ann_vol = target_returns.std() * np.sqrt(252)
     ann_ret = target_returns.mean() * 252
 
@@ -155,7 +184,7 @@ def load_combined_equity_curve(strategy_id: str):
     base_ann_ret = base_returns.mean() * 252
     alpha = ann_ret - base_ann_ret
 
-    metrics = {
+    return {
         "sharpe":             float(round(sharpe, 2)),
         "sortino":            float(round(sortino, 2)),
         "calmar":             float(round(calmar, 2)),
@@ -165,21 +194,124 @@ def load_combined_equity_curve(strategy_id: str):
         "max_dd_duration":    max_dd_duration,
     }
 
-    df_combined = pd.DataFrame(index=df_stgt.index)
-    df_combined["STGT"] = df_stgt["Cumulative"]
-    df_combined["Baseline"] = spy_cum
-    df_combined["Relative"] = ((1 + df_combined["STGT"]) / (1 + df_combined["Baseline"])) - 1
-    df_combined = df_combined.reset_index()
 
-    if "Date" in df_combined.columns:
-        df_combined.rename(columns={"Date": "date"}, inplace=True)
-    elif "index" in df_combined.columns:
-        df_combined.rename(columns={"index": "date"}, inplace=True)
+class _EquityCurve:
+    """Full-resolution equity curve of one strategy vs SPY, as aligned arrays."""
+
+    __slots__ = ("dates", "labels", "stgt", "baseline", "relative", "metrics")
+
+    def __init__(self, dates, stgt, baseline, relative, metrics):
+        self.dates = dates                                               # datetime64[ns]
+        self.labels = np.asarray(pd.DatetimeIndex(dates).strftime("%Y-%m-%d"), dtype=object)
+        self.stgt = stgt
+        self.baseline = baseline
+        self.relative = relative
+        self.metrics = metrics
+
+
+_curve_cache = {}
+_curve_cache_lock = threading.Lock()
+
+
+@timed("equity_curve.build")
+def _build_equity_curve(target_file: str):
+    df_stgt = _load_raw_df(target_file)
+    if df_stgt.empty:
+        return None
+
+    # Use SPY as the universal benchmark
+    spy_returns = _get_spy_returns()
+    if spy_returns.empty:
+        return None
+
+    # Align SPY to strategy index (inner join on dates)
+    df_stgt["Cumulative"] = np.exp(df_stgt["Return"].cumsum()) - 1
+    spy_aligned = spy_returns.reindex(df_stgt.index).ffill().dropna()
+
+    # Trim strategy to dates where SPY is available
+    df_stgt = df_stgt.loc[spy_aligned.index]
+    spy_cum = np.exp(spy_aligned.cumsum()) - 1
+
+    metrics = _curve_metrics(df_stgt["Return"].copy(), spy_aligned.copy())
+
+    stgt = df_stgt["Cumulative"].to_numpy(dtype=np.float64)
+    baseline = spy_cum.to_numpy(dtype=np.float64)
+    relative = ((1 + stgt) / (1 + baseline)) - 1
+    stgt, baseline, relative = (np.nan_to_num(a, nan=0.0, posinf=0.0, neginf=0.0) for a in (stgt, baseline, relative))
+    return _EquityCurve(np.asarray(df_stgt.index.values, dtype="datetime64[ns]"), stgt, baseline, relative, metrics)
+
+
+def _get_equity_curve(target_file: str):
+    """Cached full-resolution curve, rebuilt when the strategy file or the factor cache changes."""
+    version = (RETURNS_STORE.version(target_file), RETURNS_STORE.version(os.path.basename(_get_factor_cache_path())))
+    with _curve_cache_lock:
+        cached = _curve_cache.get(target_file)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    curve = _build_equity_curve(target_file)
+    with _curve_cache_lock:
+        _curve_cache[target_file] = (version, curve)
+    return curve
+
 
-    df_combined["date"] = pd.to_datetime(df_combined["date"]).dt.strftime("%Y-%m-%d")
-    df_combined.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
+def _strategy_curve(strategy_id: str):
+    files = STRATEGY_FILES.get(strategy_id) or STRATEGY_FILES.get("sector_rotation")
+    return _get_equity_curve(files[0]) if files is not None else None
+
+
+def equity_curve_metrics(strategy_id: str) -> dict:
+    """The full-history metrics of equity_curve_columns, without slicing the curve."""
+    curve = _strategy_curve(strategy_id)
+    return dict(curve.metrics) if curve is not None else {}
+
+
+@timed("equity_curve.slice")
+def equity_curve_columns(strategy_id: str, start: str | None = None, end: str | None = None,
+                         max_points: int | None = None):
+    """
+    Column-oriented equity curve: ({"date": [...], "STGT": array, "Baseline": array,
+    "Relative": array}, metrics), or (None, {}) when data is unavailable.
 
-    return {"timeseries": df_combined.to_dict(orient="records"), "metrics": metrics}
+    `start`/`end` (YYYY-MM-DD, inclusive) slice the cached full-resolution
+    curve by binary search. `max_points` downsamples the slice with LTTB,
+    keeping the deepest drawdown trough and each series' extremes. Metrics
+    always describe the full history.
+    """
+    curve = _strategy_curve(strategy_id)
+    if curve is None:
+        return None, {}
+
+    lo = int(np.searchsorted(curve.dates, np.datetime64(start, "ns"), side="left")) if start else 0
+    hi = int(np.searchsorted(curve.dates, np.datetime64(end, "ns") + np.timedelta64(1, "D"), side="left")) if end else len(curve.dates)
+    idx = lo + downsample_indices(curve.stgt[lo:hi], (curve.baseline[lo:hi], curve.relative[lo:hi]), max_points)
+
+    columns = {
+        "date":     curve.labels[idx].tolist(),
+        "STGT":     curve.stgt[idx],
+        "Baseline": curve.baseline[idx],
+        "Relative": curve.relative[idx],
+    }
+    return columns, dict(curve.metrics)
+
+
+def load_combined_equity_curve(strategy_id: str, start: str | None = None, end: str | None = None,
+                               max_points: int | None = None):
+    """
+    Returns merged cumulative returns timeseries + advanced metrics
+    for the ChartInteractive.tsx component.
+    Baseline is SPY (S&P 500) — aligned to the strategy date range.
+    See equity_curve_columns for slicing and downsampling.
+    """
+    columns, metrics = equity_curve_columns(strategy_id, start, end, max_points)
+    if columns is None:
+        return {"timeseries": [], "metrics": {}}
+
+    timeseries = [
+        {"date": d, "STGT": s, "Baseline": b, "Relative": r}
+        for d, s, b, r in zip(columns["date"], columns["STGT"].tolist(),
+                              columns["Baseline"].tolist(), columns["Relative"].tolist())
+    ]
+    return {"timeseries": timeseries, "metrics": metrics}
 
 
 # ── Factor Attribution ────────────────────────────────────────────────────────
@@ -190,118 +322,133 @@ def _get_factor_cache_path():
     return os.path.join(DATA_STORE, "factor_returns.csv")
 
 
-def _load_or_download_factors() -> pd.DataFrame:
+FACTOR_TICKERS = ("SPY", "IWM", "IVE", "IVW", "QUAL", "MTUM")
+
+# Last good factor panel held in memory. Requests only ever read this; the
+# file behind it is replaced atomically by services.factor_refresh.
+_factor_frame = {"version": None, "frame": pd.DataFrame(), "loaded_at": None}
+_factor_frame_lock = threading.Lock()
+
+
+def _load_factors() -> pd.DataFrame:
     """
-    Load or download factor ETF daily log-returns for FF5 attribution.
-    Tickers:
+    Factor ETF daily log-returns for FF5 attribution, from
+    data_store/factor_returns.csv:
       SPY  — market
       IWM  — size (SMB proxy: Russell 2000)
       IVE  — value leg (HML proxy: S&P 500 Value)
       IVW  — growth leg (HML proxy: S&P 500 Growth)
       QUAL — profitability (RMW proxy: iShares MSCI USA Quality Factor)
       MTUM — momentum (MOM proxy: iShares MSCI USA Momentum Factor)
-    Cached to data_store/factor_returns.csv on first call.
+
+    Never downloads and never deletes: the file is produced by the background
+    refresher. If the file is missing or unreadable, the last good panel
+    keeps being served (empty only if none was ever loaded).
     """
-    cache_path = _get_factor_cache_path()
-    if os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, index_col=0, parse_dates=True)
-        # Regenerate cache if it's missing the new FF5 columns
-        if "QUAL" not in df.columns or "MTUM" not in df.columns:
-            os.remove(cache_path)
-        else:
-            return df
-
-    # Download from yfinance
+    filename = os.path.basename(_get_factor_cache_path())
+    version = RETURNS_STORE.version(filename)
+    with _factor_frame_lock:
+        if version is None or version == _factor_frame["version"]:
+            return _factor_frame["frame"]
     try:
-        import yfinance as yf
-        tickers = ["SPY", "IWM", "IVE", "IVW", "QUAL", "MTUM"]
-        raw = yf.download(tickers, start="1999-01-01", end="2026-12-31",
-                          auto_adjust=True, progress=False)
-        if isinstance(raw.columns, pd.MultiIndex):
-            prices = raw["Close"]
-        else:
-            prices = raw
-        prices = prices.ffill().dropna(how="all")
-        log_returns = np.log(prices / prices.shift(1)).dropna(how="all")
-        log_returns.to_csv(cache_path)
-        return log_returns
-    except Exception as e:
-        return pd.DataFrame()
+        df = RETURNS_STORE.get_frame(filename)
+    except Exception:
+        df = pd.DataFrame()
+    with _factor_frame_lock:
+        if df.empty or "SPY" not in df.columns:
+            return _factor_frame["frame"]
+        _factor_frame.update(version=version, frame=df, loaded_at=pd.Timestamp.now(tz="UTC"))
+        return df
+
+
+def factor_frame_info() -> dict:
+    """Coverage of the in-memory factor panel: last date, tickers and load time."""
+    with _factor_frame_lock:
+        df, loaded_at = _factor_frame["frame"], _factor_frame["loaded_at"]
+    return {
+        "as_of": str(df.index[-1])[:10] if not df.empty else None,
+        "tickers": [t for t in FACTOR_TICKERS if t in df.columns],
+        "loaded_at": loaded_at.isoformat() if loaded_at is not None else None,
+    }
 
 
-def compute_factor_attribution(strategy_id: str) -> dict:
+class _FactorDesign:
     """
-    OLS Fama-French 5-Factor attribution for a strategy.
-
-    Model (FF5 with momentum):
-      r_t = alpha_d
-            + beta_mkt  * r_SPY
-            + beta_size * (r_IWM  - r_SPY)   # SMB: small-minus-big
-            + beta_value* (r_IVE  - r_IVW)   # HML: high-minus-low
-            + beta_prof * (r_QUAL - r_SPY)   # RMW: robust-minus-weak profitability
-            + beta_mom  * (r_MTUM - r_SPY)   # MOM: momentum
-            + eps_t
-
-    Returns annualized alpha, all five betas, R-squared,
-    tracking error vs SPY, information ratio, and win rate.
-    QUAL/MTUM data starts ~2013, so shorter strategies may have
-    fewer observations for the FF5 factors.
+    Factor spread columns built once per factor-file version:
+    SPY, SMB = IWM-SPY, HML = IVE-IVW, RMW = QUAL-SPY, MOM = MTUM-SPY.
+    Missing tickers contribute zeros, as before; rows where a ticker has no
+    data yet (e.g. QUAL/MTUM before 2013) stay NaN and are excluded per fit.
     """
-    files = STRATEGY_FILES.get(strategy_id)
-    if not files:
-        return {}
 
-    df_strat = _load_raw_df(files[0])
-    if df_strat.empty:
-        return {}
+    def __init__(self, factors: pd.DataFrame):
+        self.dates = np.asarray(pd.DatetimeIndex(factors.index).values, dtype="datetime64[ns]")
 
-    strategy_returns = df_strat["Return"].dropna()
+        def _col(name):
+            if name in factors.columns:
+                return factors[name].to_numpy(dtype=np.float64)
+            return np.zeros(len(factors))
 
-    # Load factor returns (FF5: SPY, IWM, IVE, IVW, QUAL, MTUM)
-    factors = _load_or_download_factors()
-    if factors.empty:
-        return {"error": "Factor data unavailable"}
+        spy, iwm, ive, ivw, qual, mtum = (_col(t) for t in ("SPY", "IWM", "IVE", "IVW", "QUAL", "MTUM"))
+        self.spy = spy
+        # columns: const, SPY, SMB (size), HML (value), RMW (profitability), MOM (momentum)
+        self.X = np.column_stack([np.ones(len(spy)), spy, iwm - spy, ive - ivw, qual - spy, mtum - spy])
+        self.X.setflags(write=False)
+        self.ff3_valid = np.isfinite(self.X[:, :4]).all(axis=1)
+        self.ff5_valid = self.ff3_valid & np.isfinite(self.X[:, 4:]).all(axis=1)
 
-    # Align strategy with factors
-    aligned = strategy_returns.to_frame("strategy").join(factors, how="inner")
-    if len(aligned) < 60:
-        return {}
 
-    y = aligned["strategy"].values
+_factor_design_cache = {"version": None, "design": None}
+_factor_design_lock = threading.Lock()
 
-    def _col(name):
-        return aligned[name].values if name in aligned.columns else np.zeros(len(aligned))
 
-    spy  = _col("SPY")
-    iwm  = _col("IWM")
-    ive  = _col("IVE")
-    ivw  = _col("IVW")
-    qual = _col("QUAL")
-    mtum = _col("MTUM")
+def _get_factor_design():
+    """Returns the cached _FactorDesign, rebuilding it only when factor_returns.csv changes."""
+    factors = _load_factors()
+    if factors.empty:
+        return None
+    version = RETURNS_STORE.version(os.path.basename(_get_factor_cache_path()))
+    with _factor_design_lock:
+        if _factor_design_cache["design"] is not None and _factor_design_cache["version"] == version:
+            return _factor_design_cache["design"]
+    design = _FactorDesign(factors)
+    with _factor_design_lock:
+        _factor_design_cache.update(version=version, design=design)
+    return design
+
+
+def _align_to_factors(strategy_id: str, design: _FactorDesign):
+    """Strategy returns placed on the factor date index (NaN where the strategy has no data)."""
+    files = STRATEGY_FILES.get(strategy_id)
+    if not files:
+        return None
+    entry = RETURNS_STORE.get(files[0])
+    if entry is None or len(entry.dates) == 0:
+        return None
+    y = np.full(len(design.dates), np.nan)
+    _, strat_idx, factor_idx = np.intersect1d(entry.dates, design.dates, assume_unique=True, return_indices=True)
+    y[factor_idx] = entry.values[strat_idx, 0]
+    return y
 
-    smb = iwm  - spy   # Small-minus-Big  (size)
-    hml = ive  - ivw   # High-minus-Low   (value)
-    rmw = qual - spy   # Robust-minus-Weak profitability (QUAL proxy)
-    mom = mtum - spy   # Momentum         (MTUM proxy)
 
-    # Determine which factors are non-zero (QUAL/MTUM may not exist pre-2013)
-    has_rmw = np.any(rmw != 0)
-    has_mom = np.any(mom != 0)
+def _select_model(y: np.ndarray, design: _FactorDesign):
+    """
+    Chooses FF5 when profitability/momentum data exists over the strategy's
+    window, FF3 otherwise. Returns (model, row mask, column count).
+    """
+    has_y = np.isfinite(y)
+    rows5 = has_y & design.ff5_valid
+    if np.any(design.X[rows5, 4] != 0) and np.any(design.X[rows5, 5] != 0):
+        return "FF5", rows5, 6
+    return "FF3", has_y & design.ff3_valid, 4
 
-    if has_rmw and has_mom:
-        # Full FF5 model
-        X = np.column_stack([np.ones(len(y)), spy, smb, hml, rmw, mom])
-        factor_model = "FF5"
-    else:
-        # Fallback to 3-factor if quality/momentum data not available
-        X = np.column_stack([np.ones(len(y)), spy, smb, hml])
-        factor_model = "FF3"
 
-    try:
-        betas, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
-    except np.linalg.LinAlgError:
-        return {}
+def _qr_solve(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """Least-squares coefficients for every column of Y from one QR factorization of X."""
+    Q, R = np.linalg.qr(X)
+    return np.linalg.solve(R, Q.T @ Y)
+
 
+def _attribution_result(betas, X, y, spy, factor_model) -> dict:
     alpha_daily = float(betas[0])
     beta_mkt    = float(betas[1])
     beta_size   = float(betas[2])
@@ -338,3 +485,168 @@ def compute_factor_attribution(strategy_id: str) -> dict:
         "n_observations":     int(len(y)),
         "factor_model":       factor_model,
     }
+
+
+@timed("attribution")
+def compute_factor_attribution(strategy_id: str) -> dict:
+    """
+    OLS Fama-French 5-Factor attribution for a strategy.
+
+    Model (FF5 with momentum):
+      r_t = alpha_d
+            + beta_mkt  * r_SPY
+            + beta_size * (r_IWM  - r_SPY)   # SMB: small-minus-big
+            + beta_value* (r_IVE  - r_IVW)   # HML: high-minus-low
+            + beta_prof * (r_QUAL - r_SPY)   # RMW: robust-minus-weak profitability
+            + beta_mom  * (r_MTUM - r_SPY)   # MOM: momentum
+            + eps_t
+
+    Returns annualized alpha, all five betas, R-squared,
+    tracking error vs SPY, information ratio, and win rate.
+    QUAL/MTUM data starts ~2013, so shorter strategies may have
+    fewer observations for the FF5 factors.
+    """
+    if strategy_id not in STRATEGY_FILES:
+        return {}
+    return compute_factor_attribution_batch([strategy_id]).get(strategy_id, {})
+
+
+@timed("attribution.batch")
+def compute_factor_attribution_batch(strategy_ids=None) -> dict:
+    """
+    Factor attribution for many strategies in one pass over the cached
+    factor design. Strategies with the same model and the same usable date
+    range share one QR factorization and are solved together. A strategy
+    whose range differs from the others gets its own fit on the same
+    cached design.
+    Returns {strategy_id: result}; result is {} when a fit is not possible.
+    """
+    strategy_ids = list(STRATEGY_FILES) if strategy_ids is None else list(strategy_ids)
+    results = {sid: {} for sid in strategy_ids}
+
+    design = _get_factor_design()
+    if design is None:
+        return {sid: {"error": "Factor data unavailable"} for sid in strategy_ids}
+
+    # Group strategies by (model, usable rows) so identical designs are factored once
+    groups = {}
+    for sid in strategy_ids:
+        y = _align_to_factors(sid, design)
+        if y is None:
+            continue
+        factor_model, rows, k = _select_model(y, design)
+        if rows.sum() < 60:
+            continue
+        key = (factor_model, rows.tobytes())
+        groups.setdefault(key, (factor_model, rows, k, []))[3].append((sid, y))
+
+    for factor_model, rows, k, members in groups.values():
+        X = design.X[rows, :k]
+        Y = np.column_stack([y[rows] for _, y in members])
+        try:
+            B = _qr_solve(X, Y)
+        except np.linalg.LinAlgError:
+            continue
+        spy = design.spy[rows]
+        for j, (sid, _) in enumerate(members):
+            results[sid] = _attribution_result(B[:, j], X, Y[:, j], spy, factor_model)
+    return results
+
+
+def _window_sums(cum: np.ndarray, window: int) -> np.ndarray:
+    """Sums over every trailing window from a prefix-sum array with a leading zero row."""
+    return cum[window:] - cum[:-window]
+
+
+@timed("attribution.rolling")
+def compute_rolling_attribution(strategy_id: str, window: int = 252, step: int = 1) -> dict:
+    """
+    Rolling-window factor regression plus rolling vol/Sharpe.
+
+    Every window's normal equations come from differences of cumulative
+    cross-product sums: X'X, X'y, y'y and sum(y) are prefix-summed once.
+    All windows are then solved as one batched linear solve, instead of
+    running lstsq once per window. R² follows from the same sums:
+    SSR = y'y - 2b'X'y + b'X'Xb and SST = y'y - (sum y)^2 / w.
+    """
+    design = _get_factor_design()
+    if design is None:
+        return {"error": "Factor data unavailable"}
+    y_full = _align_to_factors(strategy_id, design)
+    if y_full is None:
+        return {}
+
+    factor_model, rows, k = _select_model(y_full, design)
+    X = design.X[rows, :k]
+    y = y_full[rows]
+    dates = design.dates[rows]
+    n = len(y)
+    if n < max(window, 60):
+        return {}
+
+    def _prefix(a):
+        out = np.zeros((n + 1,) + a.shape[1:])
+        np.cumsum(a, axis=0, out=out[1:])
+        return out
+
+    XtX = _window_sums(_prefix(np.einsum("ni,nj->nij", X, X)), window)
+    Xty = _window_sums(_prefix(X * y[:, None]), window)
+    yty = _window_sums(_prefix(y * y), window)
+    ysum = _window_sums(_prefix(y), window)
+
+    try:
+        betas = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        betas = (np.linalg.pinv(XtX) @ Xty[..., None])[..., 0]
+
+    ss_res = yty - 2 * np.einsum("wi,wi->w", betas, Xty) + np.einsum("wi,wij,wj->w", betas, XtX, betas)
+    ss_tot = yty - ysum ** 2 / window
+    r_squared = np.clip(1.0 - ss_res / np.maximum(ss_tot, 1e-12), 0.0, 1.0)
+
+    sel = np.arange(len(betas) - 1, -1, -step)[::-1]
+    window_dates = pd.DatetimeIndex(dates[window - 1:][sel]).strftime("%Y-%m-%d")
+    b = betas[sel]
+    columns = {
+        "alpha_ann_pct":      np.round(b[:, 0] * 252 * 100, 2),
+        "beta_market":        np.round(b[:, 1], 3),
+        "beta_size":          np.round(b[:, 2], 3),
+        "beta_value":         np.round(b[:, 3], 3),
+        "beta_profitability": np.round(b[:, 4], 3) if k > 4 else np.zeros(len(sel)),
+        "beta_momentum":      np.round(b[:, 5], 3) if k > 5 else np.zeros(len(sel)),
+        "r_squared":          np.round(r_squared[sel], 4),
+    }
+    names = list(columns)
+    series = [
+        dict(zip(["date"] + names, values))
+        for values in zip(window_dates, *(columns[c].tolist() for c in names))
+    ]
+
+    return {
+        "strategy_id":  strategy_id,
+        "window":       window,
+        "factor_model": factor_model,
+        "series":       series,
+        "rolling_risk": _rolling_risk(strategy_id, window, step),
+    }
+
+
+def _rolling_risk(strategy_id: str, window: int, step: int) -> list:
+    """Rolling annualized vol and Sharpe over the full strategy history, from prefix sums of r and r²."""
+    entry = RETURNS_STORE.get(STRATEGY_FILES[strategy_id][0])
+    r = entry.values[:, 0]
+    if len(r) < window or window < 2:
+        return []
+    s1 = _window_sums(np.concatenate(([0.0], np.cumsum(r))), window)
+    s2 = _window_sums(np.concatenate(([0.0], np.cumsum(r * r))), window)
+    var = np.maximum(s2 - s1 ** 2 / window, 0.0) / (window - 1)
+    vol = np.sqrt(var) * np.sqrt(252)
+    ann_ret = s1 / window * 252
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(vol > 0, (ann_ret - RISK_FREE_RATE) / vol, 0.0)
+
+    sel = np.arange(len(vol) - 1, -1, -step)[::-1]
+    dates = pd.DatetimeIndex(entry.dates[window - 1:][sel]).strftime("%Y-%m-%d")
+    return [
+        {"date": d, "volatility": v, "sharpe": s}
+        for d, v, s in zip(dates, np.round(vol[sel] * 100, 2).tolist(), np.round(sharpe[sel], 2).tolist())
+    ]
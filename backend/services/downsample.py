@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets over an evenly spaced series.
+
+    Keeps the first and last points and, from each of the n_out - 2 buckets
+    in between, picks the point forming the largest triangle with the
+    previously selected point and the average of the next bucket. Returns
+    sorted indices into `y`.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+
+    prev = 0
+    for b in range(n_out - 2):
+        lo = int(b * every) + 1
+        hi = int((b + 1) * every) + 1
+        nxt_lo = hi
+        nxt_hi = min(int((b + 2) * every) + 1, n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        out[b + 1] = prev
+    return out
+
+
+def drawdown_trough(cumulative: np.ndarray):
+    """(peak index, trough index) of the deepest drawdown of a cumulative-return series."""
+    wealth = 1.0 + cumulative
+    running_peak = np.maximum.accumulate(wealth)
+    trough = int(np.argmin(wealth / running_peak))
+    peak = int(np.argmax(wealth[:trough + 1])) if trough > 0 else 0
+    return peak, trough
+
+
+def downsample_indices(primary: np.ndarray, others, max_points: int) -> np.ndarray:
+    """
+    LTTB on the primary curve, plus the points a chart must not lose: the
+    primary's deepest drawdown (peak and trough) and the min/max of every
+    series. The result has at most max_points indices (a handful more
+    only when max_points is tiny).
+    """
+    n = len(primary)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+
+    keep = set(drawdown_trough(primary))
+    for series in (primary, *others):
+        keep.add(int(np.argmin(series)))
+        keep.add(int(np.argmax(series)))
+
+    base = lttb_indices(primary, max(3, max_points - len(keep)))
+    return np.unique(np.concatenate([base, np.fromiter(keep, dtype=np.int64)]))
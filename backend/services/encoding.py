@@ -0,0 +1,97 @@
+import json
+import numpy as np
+from fastapi import Request, Response
+from services.instrumentation import timed
+
+# Optional fast encoders. orjson serializes NumPy arrays natively; pyarrow is
+# only needed for the Arrow IPC variant.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+_BINARY_ACCEPT = (ARROW_MEDIA_TYPE, "application/octet-stream")
+
+FORMATS = ("records", "columns", "arrow")
+
+
+def negotiate_format(request: Request, fmt: str | None) -> str:
+    """
+    Picks the response shape: an explicit ?format= wins. Otherwise an Accept
+    header asking for Arrow/octet-stream selects the binary variant. The
+    default is the legacy list-of-records JSON.
+    """
+    if fmt in FORMATS:
+        return fmt
+    accept = request.headers.get("accept", "")
+    if any(media in accept for media in _BINARY_ACCEPT):
+        return "arrow"
+    return "records"
+
+
+def _to_builtin(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    return value
+
+
+@timed("encode.json")
+def dumps(payload) -> bytes:
+    """JSON bytes for a payload that may contain NumPy arrays; orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_to_builtin(payload), separators=(",", ":")).encode()
+
+
+def json_response(payload, headers=None) -> Response:
+    return Response(content=dumps(payload), media_type="application/json", headers=headers)
+
+
+def columns_to_records(columns: dict) -> list:
+    """Legacy row-oriented shape: [{col: value, ...}, ...]."""
+    names = list(columns)
+    lists = [_to_builtin(columns[name]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*lists)]
+
+
+@timed("encode.arrow")
+def arrow_response(columns: dict, metadata: dict | None = None, headers=None) -> Response:
+    """Arrow IPC stream of the columns; non-tabular fields travel as JSON schema metadata."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return Response(
+            content=dumps({"error": "Arrow encoding unavailable on this server"}),
+            status_code=406,
+            media_type="application/json",
+        )
+    arrays = {name: pa.array(np.asarray(values) if isinstance(values, np.ndarray) else values)
+              for name, values in columns.items()}
+    schema_meta = {"meta": dumps(metadata or {})}
+    table = pa.table(arrays).replace_schema_metadata(schema_meta)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+
+def table_response(fmt: str, table_key: str, columns: dict, extra: dict | None = None):
+    """
+    Encodes a time-series table in the negotiated format:
+      records  {table_key: [{...}, ...], **extra}     (legacy, FastAPI-encoded)
+      columns  {table_key: {col: [...], ...}, **extra} straight from the arrays
+      arrow    Arrow IPC stream, `extra` in the schema metadata
+    """
+    extra = extra or {}
+    if fmt == "arrow":
+        return arrow_response(columns, extra)
+    if fmt == "columns":
+        return json_response({table_key: columns, **extra})
+    return {table_key: columns_to_records(columns), **extra}
@@ -0,0 +1,174 @@
+"""
+Executor layer for CPU-bound analytics.
+
+Route handlers stay `async def` and hand their NumPy/pandas work to a pool
+via `run_blocking`, so the event loop keeps answering /live/status and the
+health check while a simulation is running.
+
+Every route has a concurrency limit and a bounded wait queue. When both are
+full, the call is rejected with ExecutorSaturated, which main.py maps to a
+503 with Retry-After. Excess load then fails fast instead of stretching
+everyone's tail latency.
+
+Configuration (environment):
+  ANALYTICS_THREADS   worker threads for the shared thread pool   (default 4)
+  SIM_EXECUTOR        "thread" or "process" for the simulator      (default thread)
+  SIM_PROCESSES       worker processes when SIM_EXECUTOR=process   (default 2)
+  ROUTE_LIMITS        per-route overrides, "route=concurrency/queue,..."
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from services.instrumentation import QUEUE_SECONDS, current_profile
+
+ANALYTICS_THREADS = int(os.getenv("ANALYTICS_THREADS", "4"))
+SIM_EXECUTOR = os.getenv("SIM_EXECUTOR", "thread").lower()
+SIM_PROCESSES = int(os.getenv("SIM_PROCESSES", "2"))
+
+# route -> (max concurrent executions, max callers waiting for a slot)
+DEFAULT_ROUTE_LIMITS = {
+    "simulate":     (2, 8),
+    "equity_curve": (4, 16),
+    "performance":  (4, 16),
+    "attribution":  (2, 8),
+    "correlation":  (2, 8),
+    "blend":        (4, 16),
+    "batch":        (2, 8),
+}
+_FALLBACK_LIMIT = (4, 16)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a route's concurrency slots and wait queue are both full."""
+
+    def __init__(self, route: str):
+        super().__init__(f"Route '{route}' is saturated")
+        self.route = route
+
+
+def _parse_route_limits(spec: str) -> dict:
+    limits = dict(DEFAULT_ROUTE_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, value = item.split("=")
+            concurrency, queue = value.split("/")
+            limits[name.strip()] = (max(1, int(concurrency)), max(0, int(queue)))
+        except ValueError:
+            continue
+    return limits
+
+
+ROUTE_LIMITS = _parse_route_limits(os.getenv("ROUTE_LIMITS", ""))
+
+
+class RouteLimiter:
+    """Async admission control for one route: N running, at most Q waiting."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._sem = None
+
+    async def __aenter__(self):
+        if self.active + self.waiting >= self.concurrency + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(self.name)
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self.completed += 1
+        self._sem.release()
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+_limiters = {}
+_thread_pool = None
+_process_pool = None
+_pool_lock = threading.Lock()
+
+
+def _limiter(route: str) -> RouteLimiter:
+    limiter = _limiters.get(route)
+    if limiter is None:
+        concurrency, max_queue = ROUTE_LIMITS.get(route, _FALLBACK_LIMIT)
+        limiter = _limiters.setdefault(route, RouteLimiter(route, concurrency, max_queue))
+    return limiter
+
+
+def _get_pool(kind: str):
+    global _thread_pool, _process_pool
+    with _pool_lock:
+        if kind == "process" and SIM_EXECUTOR == "process":
+            if _process_pool is None:
+                # spawn, not fork: the parent is a threaded server
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=SIM_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+                )
+            return _process_pool
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=ANALYTICS_THREADS, thread_name_prefix="analytics")
+        return _thread_pool
+
+
+async def run_blocking(route: str, fn, *args, pool: str = "thread", **kwargs):
+    """
+    Runs fn(*args, **kwargs) on the configured pool under `route`'s limits.
+    pool="process" uses the process pool when SIM_EXECUTOR=process, and
+    falls back to the thread pool otherwise; fn and its arguments must then
+    be picklable.
+    """
+    profile = current_profile()
+    if profile is not None:
+        # Profiler state cannot cross into a worker process
+        fn, pool = profile.wrap(fn), "thread"
+    t0 = time.perf_counter()
+    async with _limiter(route):
+        QUEUE_SECONDS.observe(time.perf_counter() - t0, route)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(pool), functools.partial(fn, *args, **kwargs))
+
+
+def executor_stats() -> dict:
+    return {
+        "threads": ANALYTICS_THREADS,
+        "sim_executor": SIM_EXECUTOR,
+        "routes": {name: limiter.stats() for name, limiter in _limiters.items()},
+    }
+
+
+def shutdown():
+    global _thread_pool, _process_pool
+    with _pool_lock:
+        for pool in (_thread_pool, _process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+        _process_pool = None
@@ -0,0 +1,183 @@
+"""
+Background refresh of data_store/factor_returns.csv.
+
+Requests never download factor data. A FactorRefresher thread asks a
+pluggable source for a fresh panel of daily log-returns, validates it,
+writes it next to the cache under a temporary name and os.replace()s it
+into place. Readers therefore see either the old file or the new one,
+never a partial or missing file. data_loader keeps serving the last good
+in-memory panel throughout, and `factor_status()` reports how fresh it is.
+
+Configuration (environment):
+  FACTOR_SOURCE          "yfinance" (default), "file:<path>" or "off"
+  FACTOR_REFRESH_HOURS   interval between refreshes        (default 24)
+  FACTOR_STALE_DAYS      calendar days before data is stale (default 5)
+"""
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from services.data_loader import RETURNS_STORE, FACTOR_TICKERS, _get_factor_cache_path, _load_factors, factor_frame_info
+
+FACTOR_SOURCE = os.getenv("FACTOR_SOURCE", "yfinance")
+FACTOR_REFRESH_HOURS = float(os.getenv("FACTOR_REFRESH_HOURS", "24"))
+FACTOR_STALE_DAYS = int(os.getenv("FACTOR_STALE_DAYS", "5"))
+
+
+class YFinanceFactorSource:
+    """Adjusted closes from Yahoo Finance, converted to daily log-returns."""
+
+    name = "yfinance"
+
+    def __init__(self, tickers=FACTOR_TICKERS, start="1999-01-01"):
+        self.tickers = list(tickers)
+        self.start = start
+
+    def fetch(self) -> pd.DataFrame:
+        import yfinance as yf
+        raw = yf.download(self.tickers, start=self.start, auto_adjust=True, progress=False)
+        prices = raw["Close"] if isinstance(raw.columns, pd.MultiIndex) else raw
+        prices = prices.ffill().dropna(how="all")
+        return np.log(prices / prices.shift(1)).dropna(how="all")
+
+
+class FileFactorSource:
+    """
+    A CSV of daily log-returns in the factor_returns.csv layout (Date index,
+    one column per ticker). Serves as an offline or test stand-in for yfinance.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"file:{path}"
+
+    def fetch(self) -> pd.DataFrame:
+        return pd.read_csv(self.path, index_col=0, parse_dates=True)
+
+
+def source_from_env(spec: str = FACTOR_SOURCE):
+    """Factor source named by FACTOR_SOURCE, or None when refresh is disabled."""
+    if spec == "off":
+        return None
+    if spec.startswith("file:"):
+        return FileFactorSource(spec[len("file:"):])
+    return YFinanceFactorSource()
+
+
+def _validate(frame: pd.DataFrame) -> pd.DataFrame:
+    if frame is None or frame.empty:
+        raise ValueError("source returned no rows")
+    missing = [t for t in FACTOR_TICKERS if t not in frame.columns]
+    if missing:
+        raise ValueError(f"source is missing tickers: {', '.join(missing)}")
+    frame = frame[list(FACTOR_TICKERS)].sort_index()
+    frame.index = pd.DatetimeIndex(frame.index, name="Date")
+    if frame.index.has_duplicates:
+        raise ValueError("source returned duplicate dates")
+    if not np.isfinite(frame["SPY"].dropna()).all():
+        raise ValueError("source returned non-finite SPY returns")
+    return frame
+
+
+def write_factor_cache(frame: pd.DataFrame, path: str | None = None):
+    """Writes the panel to a temp file in the same directory, fsyncs, then renames over `path`."""
+    path = path or _get_factor_cache_path()
+    fd, tmp = tempfile.mkstemp(prefix=".factor_returns.", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            frame.to_csv(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    RETURNS_STORE.invalidate(os.path.basename(path))
+
+
+class FactorRefresher:
+    """Periodic refresh on a daemon thread; also usable synchronously via refresh()."""
+
+    def __init__(self, source, interval_hours: float = FACTOR_REFRESH_HOURS):
+        self.source = source
+        self.interval = interval_hours * 3600
+        self.last_attempt = None
+        self.last_success = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Fetches, validates and atomically installs a new panel. Never raises."""
+        if self.source is None:
+            return False
+        with self._lock:
+            self.last_attempt = time.time()
+            try:
+                frame = _validate(self.source.fetch())
+                write_factor_cache(frame)
+                _load_factors()
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                return False
+            self.last_success = time.time()
+            self.last_error = None
+            return True
+
+    def _due(self) -> bool:
+        path = _get_factor_cache_path()
+        if not os.path.exists(path):
+            return True
+        return time.time() - os.path.getmtime(path) >= self.interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._due():
+                self.refresh()
+            self._stop.wait(min(self.interval, 3600) if self.interval > 0 else 3600)
+
+    def start(self):
+        if self.source is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="factor-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        def _iso(ts):
+            return pd.Timestamp(ts, unit="s", tz="UTC").isoformat() if ts else None
+        return {
+            "source": self.source.name if self.source is not None else None,
+            "last_attempt": _iso(self.last_attempt),
+            "last_success": _iso(self.last_success),
+            "last_error": self.last_error,
+        }
+
+
+FACTOR_REFRESHER = FactorRefresher(source_from_env())
+
+
+def factor_status() -> dict:
+    """
+    Freshness of the factor panel requests are served from: last date
+    covered, its age in calendar days, whether that exceeds
+    FACTOR_STALE_DAYS, and the refresher's last outcome.
+    """
+    _load_factors()
+    info = factor_frame_info()
+    age = None
+    if info["as_of"] is not None:
+        age = int((pd.Timestamp.now().normalize() - pd.Timestamp(info["as_of"])).days)
+    return {
+        "as_of": info["as_of"],
+        "age_days": age,
+        "stale": age is None or age > FACTOR_STALE_DAYS,
+        "tickers": info["tickers"],
+        "refresh": FACTOR_REFRESHER.stats(),
+    }
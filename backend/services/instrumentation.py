@@ -0,0 +1,271 @@
+"""
+Low-overhead request and stage instrumentation.
+
+  - `@timed("stage")` wraps a function with a perf_counter timer feeding a
+    per-stage latency histogram: CSV load, pandas compute, simulation
+    kernels, JSON encoding. The cost is two clock reads, a bisect and a
+    short lock.
+  - `InstrumentationMiddleware` times every request by its route template
+    (so /api/v1/backtest/equity-curve/{strategy_id} is one series), method
+    and status. Templates are registered with `register_routes` when the
+    routers are mounted and matched on the path, so responses served before
+    routing (HTTP cache hits, 304s, the warmup gate) keep their route.
+  - `register_cache(name, stats_fn)` exposes hit/miss counters the caches
+    already keep.
+  - `render_prometheus()` renders all of it in the Prometheus text format
+    for /metrics/internal.
+
+Opt-in profiling: with PROFILING_ENABLED=1, adding `?profile=1` to a request
+replaces its response with a cProfile report for that request. The report
+covers the event-loop thread plus every `run_blocking` call the request
+made. Those calls run on the thread pool while profiled, since profiler
+state cannot cross into worker processes. The loop-thread share includes
+whatever else the loop ran meanwhile, so profile on a quiet instance.
+
+Timings of calls executed in the simulator's worker processes
+(SIM_EXECUTOR=process) stay in those processes and are not exported.
+"""
+import bisect
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from urllib.parse import parse_qs
+from starlette.routing import compile_path
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# Upper bounds in seconds, from sub-millisecond cache hits to multi-second simulations
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}       # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(BUCKETS) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            running = 0
+            for bound, count in zip(BUCKETS, series):
+                running += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {running}')
+            running += series[len(BUCKETS)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {running}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {running}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram("algoforall_request_duration_seconds",
+                            "End-to-end request latency by route template.", ("route", "method", "status"))
+STAGE_SECONDS = Histogram("algoforall_stage_duration_seconds",
+                          "Latency of instrumented internal stages.", ("stage",))
+QUEUE_SECONDS = Histogram("algoforall_executor_wait_seconds",
+                          "Time spent waiting for an executor slot, by route.", ("route",))
+
+_caches = {}        # name -> stats() callable returning a dict with hits/misses
+_caches_lock = threading.Lock()
+
+
+def register_cache(name: str, stats_fn):
+    with _caches_lock:
+        _caches[name] = stats_fn
+
+
+# ── Profiling ─────────────────────────────────────────────────────────────────
+
+class _RequestProfile:
+    """cProfile runs collected for one request: the loop thread plus each offloaded call."""
+
+    def __init__(self):
+        self.loop_profile = cProfile.Profile()
+        self._worker_profiles = []
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        @functools.wraps(fn)
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per interpreter; the
+                # loop-thread profile then already sees this thread.
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._worker_profiles.append(profile)
+        return profiled
+
+    def report(self, limit: int = 60) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self.loop_profile, stream=out)
+        with self._lock:
+            for profile in self._worker_profiles:
+                stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+def current_profile():
+    """The active request's profile, or None. Read by executor.run_blocking."""
+    return _current_profile.get()
+
+
+# ── Timers ────────────────────────────────────────────────────────────────────
+
+def timed(stage: str):
+    """Decorator recording the wrapped function's latency under `stage`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - t0, stage)
+        return wrapper
+    return decorate
+
+
+_ROUTE_TEMPLATES = []           # (compiled path regex, full template), in mount order
+
+
+def register_routes(prefix: str, routes):
+    """Registers the path templates of a router mounted under `prefix`, for request labels."""
+    for route in routes:
+        path = getattr(route, "path", None)
+        if path is not None:
+            _ROUTE_TEMPLATES.append((compile_path(prefix + path)[0], prefix + path))
+    _match_route.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def _match_route(path: str):
+    for regex, template in _ROUTE_TEMPLATES:
+        if regex.match(path):
+            return template
+    return None
+
+
+def _route_label(scope) -> str:
+    template = _match_route(scope.get("path", ""))
+    if template is not None:
+        return template
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Pure-ASGI request timer, and the ?profile=1 hook when PROFILING_ENABLED."""
+
+    def __init__(self, app, profiling: bool = PROFILING_ENABLED):
+        self.app = app
+        self.profiling = profiling
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.profiling and "1" in parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", []):
+            await self._profiled(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, _route_label(scope), scope["method"], status["code"])
+
+    async def _profiled(self, scope, receive, send):
+        profile = _RequestProfile()
+        token = _current_profile.set(profile)
+
+        async def swallow(message):
+            pass
+
+        try:
+            profile.loop_profile.enable()
+            enabled = True
+        except ValueError:
+            enabled = False     # another request is being profiled (Python 3.12+)
+        try:
+            await self.app(scope, receive, swallow)
+        finally:
+            if enabled:
+                profile.loop_profile.disable()
+            _current_profile.reset(token)
+
+        body = profile.report().encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+
+def render_prometheus() -> str:
+    lines = []
+    for histogram in (REQUEST_SECONDS, STAGE_SECONDS, QUEUE_SECONDS):
+        lines.extend(histogram.render())
+
+    with _caches_lock:
+        caches = dict(_caches)
+    rows = []
+    for name, stats_fn in sorted(caches.items()):
+        try:
+            stats = stats_fn()
+        except Exception:
+            continue
+        rows.append((name, stats))
+    for metric, key, help_text in (
+        ("algoforall_cache_hits_total", "hits", "Cache hits."),
+        ("algoforall_cache_misses_total", "misses", "Cache misses."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, stats in rows:
+            if key in stats:
+                lines.append(f'{metric}{{cache="{_escape(name)}"}} {int(stats[key])}')
+    return "\n".join(lines) + "\n"
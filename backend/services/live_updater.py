@@ -1,20 +1,93 @@
-import time
 import datetime
-import os
+import numpy as np
+from services.data_loader import STRATEGY_FILES, RETURNS_STORE, METRICS_SNAPSHOT
 
-def run_live_update_job():
+
+# Columns some backtests carry after the return, recomputed for appended rows
+# from the last stored value: (last value, new returns) -> new values
+_DERIVED_COLUMNS = {
+    "Cumulative_Return": lambda last, r: last * np.cumprod(1.0 + r),
+}
+
+
+def _with_derived_columns(filename: str, values: np.ndarray) -> np.ndarray:
+    """(n, columns) rows for `filename`: the returns plus any derived columns its CSV has."""
+    entry = RETURNS_STORE.get(filename)
+    if entry is None or len(entry.columns) <= 1:
+        return values.reshape(-1, 1)
+    out = [values]
+    for j, column in enumerate(entry.columns[1:], start=1):
+        derive = _DERIVED_COLUMNS.get(column)
+        if derive is None:
+            raise ValueError(f"{filename} has column '{column}', which cannot be derived for appended rows")
+        last = entry.values[-1, j] if len(entry.dates) and np.isfinite(entry.values[-1, j]) else 1.0
+        out.append(derive(last, values))
+    return np.column_stack(out)
+
+
+def append_strategy_returns(strategy_id: str, rows):
+    """
+    Appends (date, log_return) rows to a strategy's data_store CSV.
+
+    The rows go to disk in a single O_APPEND write and are folded into the
+    cached arrays and the strategy's RollingMetrics state. Each new day
+    updates CAGR, vol, Sharpe, drawdown and YTD in constant time, without
+    rescanning the history. Returns the refreshed headline metrics row.
+    """
+    files = STRATEGY_FILES.get(strategy_id)
+    if not files:
+        raise KeyError(f"Unknown strategy '{strategy_id}'")
+
+    rows = sorted(rows)
+    if not rows:
+        return METRICS_SNAPSHOT.get(strategy_id)[1]
+    dates = np.array([np.datetime64(d, "D") for d, _ in rows], dtype="datetime64[ns]")
+    values = np.array([float(r) for _, r in rows], dtype=np.float64)
+    if not np.all(np.isfinite(values)):
+        raise ValueError("Daily returns must be finite")
+
+    RETURNS_STORE.append(files[0], dates, _with_derived_columns(files[0], values))
+    return METRICS_SNAPSHOT.get(strategy_id)[1]
+
+
+def run_live_update_job(daily_returns=None):
     """
-    Cron-job wrapper to fetch daily market closes from yfinance, 
-    run the STGT forward step, and securely append the new daily PnL and 
+    Cron-job wrapper to fetch daily market closes from yfinance,
+    run the STGT forward step, and securely append the new daily PnL and
     30-Day realized volatility metrics back into the persistent DATA_STORE.
+
+    `daily_returns` maps strategy_id -> [(date, log_return), ...] as produced
+    by the forward step; rows already on disk are skipped.
     """
     print(f"[{datetime.datetime.now()}] [LIVE_UPDATER] Executing daily STGT forward walk...")
-    data_path = os.getenv("DATA_STORE_PATH", "data_store")
-    
+
     # In production, this imports the STGT model, gets the target weights,
-    # queries the latest live prices, calculates the daily friction-adjusted return,
-    # and appends the new row to the data_store CSVs.
-    pass
+    # queries the latest live prices and calculates the daily friction-adjusted
+    # return for each strategy; the resulting rows are appended below.
+    daily_returns = daily_returns or {}
+
+    updated = {}
+    for strategy_id, rows in daily_returns.items():
+        files = STRATEGY_FILES.get(strategy_id)
+        if not files:
+            print(f"[LIVE_UPDATER] Skipping unknown strategy '{strategy_id}'")
+            continue
+        entry = RETURNS_STORE.get(files[0])
+        last = entry.dates[-1] if entry is not None and len(entry.dates) else None
+        fresh = [(d, r) for d, r in rows if last is None or np.datetime64(d, "D") > last]
+        if not fresh:
+            continue
+        updated[strategy_id] = append_strategy_returns(strategy_id, fresh)
+        print(f"[LIVE_UPDATER] {strategy_id}: appended {len(fresh)} row(s)")
+
+    if updated:
+        # Publish the next panel generation now, so API workers swap to it
+        # instead of each rebuilding it on their next request.
+        from services.panel import get_returns_panel, SHARED_PLANE
+        get_returns_panel()
+        if SHARED_PLANE is not None:
+            print(f"[LIVE_UPDATER] Published panel generation {SHARED_PLANE.stats()['published_generation']}")
+    return updated
 
 if __name__ == "__main__":
     run_live_update_job()
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+
+
+class MetricsSnapshot:
+    """
+    Versioned table of headline metrics, one row per strategy.
+
+    Rows are computed once per data version and served from memory. A row is
+    rebuilt only when the (mtime, size) signature of its source file changes,
+    so an append to one strategy CSV does not recompute the other strategies.
+    `compute` receives the state it returned last time for that strategy, so
+    it can fold in just the appended rows.
+
+      sources()                 -> {strategy_id: (display_name, filename)}
+      version_of(file)          -> hashable signature, or None if the file is missing
+      compute(id, name, state)  -> (metrics row dict, new state)
+    """
+
+    def __init__(self, sources, version_of, compute):
+        self._sources = sources
+        self._version_of = version_of
+        self._compute = compute
+        self._rows = {}          # strategy_id -> (signature, row, state)
+        self._orders = {}        # (etag, field, descending) -> ordered strategy ids
+        self._table = None       # (caller version, self.version, etag, rows) of the last table()
+        self._lock = threading.Lock()
+        self.version = 0         # bumped every time any row is rebuilt
+        self.rebuilds = 0
+
+    def _refresh_one(self, strategy_id, name, filename):
+        signature = (name, filename, self._version_of(filename))
+        with self._lock:
+            cached = self._rows.get(strategy_id)
+        if cached is not None and cached[0] == signature:
+            return signature, cached[1]
+
+        row, state = self._compute(strategy_id, name, cached[2] if cached is not None else None)
+        with self._lock:
+            self._rows[strategy_id] = (signature, row, state)
+            self.version += 1
+            self.rebuilds += 1
+        return signature, row
+
+    @staticmethod
+    def _etag(parts) -> str:
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+        return f'"m-{digest}"'
+
+    def table(self, version=None):
+        """
+        Returns (etag, {strategy_id: row}) for every registered strategy.
+
+        With a `version` (anything that changes when the registry or the
+        data files do), the table built at that version is returned without
+        re-checking each strategy's file; the rows are then shared, so treat
+        them as read-only.
+        """
+        if version is not None:
+            with self._lock:
+                cached = self._table
+            if cached is not None and cached[:2] == (version, self.version):
+                return cached[2], cached[3]
+
+        sources = self._sources()
+        signatures = []
+        rows = {}
+        for strategy_id, (name, filename) in sources.items():
+            signature, row = self._refresh_one(strategy_id, name, filename)
+            signatures.append((strategy_id, signature))
+            rows[strategy_id] = dict(row)
+
+        with self._lock:
+            for stale in set(self._rows) - set(sources):
+                del self._rows[stale]
+        etag = self._etag(signatures)
+        if version is not None:
+            with self._lock:
+                self._table = (version, self.version, etag, rows)
+        return etag, rows
+
+    def _ordering(self, etag: str, rows: dict, field, descending: bool):
+        """
+        Strategy ids ordered by `field` (registry order for None), built once
+        per table etag and direction. Missing values sort last either way.
+        """
+        key = (etag, field, descending)
+        with self._lock:
+            order = self._orders.get(key)
+        if order is not None:
+            return order
+        if field is None:
+            order = list(rows)[::-1] if descending else list(rows)
+        else:
+            present = sorted((sid for sid in rows if rows[sid].get(field) is not None),
+                             key=lambda sid: (rows[sid][field], sid), reverse=descending)
+            order = present + [sid for sid in rows if rows[sid].get(field) is None]
+        with self._lock:
+            # Indexes for older table versions can never be asked for again
+            for stale in [k for k in self._orders if k[0] != etag]:
+                del self._orders[stale]
+            self._orders[key] = order
+        return order
+
+    def page(self, sort=None, descending: bool = False, offset: int = 0, limit=None, version=None):
+        """
+        Returns (etag, total, [(strategy_id, row), ...]) for one page of the
+        table ordered by `sort`. The sort index is precomputed per table
+        version, so a page costs a slice rather than a sort; `version` is
+        passed on to table().
+        """
+        etag, rows = self.table(version)
+        order = self._ordering(etag, rows, sort, descending)
+        stop = None if limit is None else offset + limit
+        return etag, len(order), [(sid, rows[sid]) for sid in order[offset:stop]]
+
+    def get(self, strategy_id: str):
+        """Returns (etag, row) for one strategy, or (None, None) if it is unknown."""
+        source = self._sources().get(strategy_id)
+        if source is None:
+            return None, None
+        signature, row = self._refresh_one(strategy_id, *source)
+        return self._etag((strategy_id, signature)), dict(row)
+
+    def state(self, strategy_id: str):
+        """The compute state behind a strategy's current row, if it has been built."""
+        with self._lock:
+            cached = self._rows.get(strategy_id)
+        return cached[2] if cached is not None else None
+
+    def etag(self) -> str:
+        return self.table()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"version": self.version, "rebuilds": self.rebuilds, "strategies": len(self._rows),
+                    "sort_indexes": len(self._orders)}
@@ -0,0 +1,355 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from services.quantile_sketch import LogBucketSketch
+from services.instrumentation import timed
+
+# Percentile bands returned to ProjectionCalc: pessimistic / expected / optimistic
+QUANTILES = (0.10, 0.50, 0.90)
+
+MAX_SIMULATIONS = 200_000
+
+# Upper bound on the working set of one simulation call. Paths are generated in
+# blocks of months sized to stay under this ceiling, so memory no longer grows
+# with years * num_simulations.
+SIM_MEMORY_LIMIT_BYTES = int(os.getenv("SIM_MEMORY_LIMIT_MB", "256")) * 1024 * 1024
+
+# Live (block_months x num_simulations) arrays per block, including the copy
+# np.quantile makes while partitioning.
+_ARRAYS_PER_BLOCK = 4
+
+
+def _block_months(num_simulations: int, months: int, itemsize: int, max_bytes: int) -> int:
+    per_month = _ARRAYS_PER_BLOCK * num_simulations * itemsize
+    return int(max(1, min(months, max_bytes // per_month)))
+
+
+class ShockBank:
+    """
+    Bounded LRU of seeded standard-normal shock matrices, shape (months, n).
+
+    Shocks are drawn time-major, so the first m rows of a longer draw are
+    exactly the draw for m months. One entry per (seed, n, dtype) therefore
+    serves every horizon up to the longest one requested so far. Slider moves
+    that change only CAGR, contribution or years reuse the same draw, and the
+    target and base runs of a request share it.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()   # (seed, n, dtype) -> read-only array
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, seed, months: int, n: int, dtype):
+        """Returns a read-only (months, n) shock matrix, or None if it exceeds the entry budget."""
+        dtype = np.dtype(dtype)
+        if months * n * dtype.itemsize > self.max_entry_bytes:
+            return None
+        key = (seed, n, dtype.str)
+        with self._lock:
+            shocks = self._entries.get(key)
+            if shocks is not None and len(shocks) >= months:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return shocks[:months]
+            self.misses += 1
+
+        shocks = np.random.default_rng(seed).standard_normal((months, n), dtype=dtype)
+        shocks.setflags(write=False)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or len(current) < months:
+                self._entries[key] = shocks
+            self._entries.move_to_end(key)
+            while sum(a.nbytes for a in self._entries.values()) > self.max_bytes and len(self._entries) > 1:
+                self._entries.popitem(last=False)
+        return shocks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": int(sum(a.nbytes for a in self._entries.values())),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+SHOCK_BANK = ShockBank(
+    max_bytes=int(os.getenv("SHOCK_BANK_MB", "128")) * 1024 * 1024,
+    max_entry_bytes=int(os.getenv("SHOCK_BANK_ENTRY_MB", "32")) * 1024 * 1024,
+)
+
+
+def _shock_source(seed, rng, months, n, dtype):
+    """Returns draw(start, stop) -> standard normals for months [start, stop), called in order."""
+    if seed is not None and rng is None:
+        banked = SHOCK_BANK.get(seed, months, n, dtype)
+        if banked is not None:
+            return lambda start, stop: banked[start:stop]
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    return lambda start, stop: rng.standard_normal((stop - start, n), dtype=dtype)
+
+
+class WealthPaths:
+    """
+    Monthly wealth paths with a fixed monthly contribution, advanced one block
+    of log-returns at a time and reduced to quantile bands as it goes.
+
+    The recurrence P_m = (P_{m-1} + c) * R_m is evaluated in closed form.
+    With L_m = sum_{k<=m} log R_k (L_0 = 0):
+
+        P_m = exp(L_m) * (P_0 + c * sum_{j<m} exp(-L_j))
+
+    so each block of months is two cumulative sums and a few element-wise
+    ops, with no Python loop over months.
+
+    The running sums are carried into the first row of each block before
+    accumulating. The summation order is then the same as a single
+    full-matrix pass, so the output does not depend on the block size.
+
+    With a `sketch` (see quantile_sketch.LogBucketSketch), wealth values are
+    added to it instead of being reduced to exact bands, so several runs
+    over chunks of paths can share one mergeable summary.
+    """
+
+    def __init__(self, initial, contribution, months, n, dtype=np.float64, quantiles=QUANTILES, sketch=None):
+        self.dtype = np.dtype(dtype)
+        self.p0 = self.dtype.type(initial)
+        self.c = self.dtype.type(contribution)
+        self.quantiles = quantiles
+        self.sketch = sketch
+        self.log_g = np.zeros(n, dtype=self.dtype)   # L_start, carried between blocks
+        self.acc = np.zeros(n, dtype=self.dtype)     # sum_{j<start} exp(-L_j)
+        self.bands = np.empty((len(quantiles), months + 1), dtype=np.float64)
+        self.bands[:, 0] = initial
+
+    def advance(self, log_path, start: int):
+        """
+        Consumes monthly log-returns for months [start, start + len(log_path)).
+        log_path is overwritten; callers hand in a scratch array.
+        """
+        stop = start + len(log_path)
+
+        # Cumulative log-growth L_m for this block
+        log_path[0] += self.log_g
+        np.cumsum(log_path, axis=0, out=log_path)
+
+        # Discount factors exp(-L_{m-1}), accumulated into sum_{j<m} exp(-L_j)
+        disc = np.empty_like(log_path)
+        np.negative(self.log_g, out=disc[0])
+        np.negative(log_path[:-1], out=disc[1:])
+        np.exp(disc, out=disc)
+        disc[0] += self.acc
+        np.cumsum(disc, axis=0, out=disc)
+
+        self.log_g = log_path[-1].copy()
+        self.acc = disc[-1].copy()
+
+        # P_m = exp(L_m) * (P_0 + c * A_m)
+        disc *= self.c
+        disc += self.p0
+        np.exp(log_path, out=log_path)
+        log_path *= disc
+        del disc
+
+        if self.sketch is not None:
+            self.sketch.add(start, log_path)
+        else:
+            self.bands[:, start + 1:stop + 1] = np.quantile(log_path, self.quantiles, axis=1)
+
+
+@timed("simulate.gbm")
+def gbm_quantile_bands_multi(initial, contribution, params, years, num_simulations=1000,
+                             seed=None, rng=None, dtype=np.float64, quantiles=QUANTILES,
+                             max_bytes=SIM_MEMORY_LIMIT_BYTES):
+    """
+    Monthly GBM wealth paths (see WealthPaths), reduced to quantile bands of
+    shape (len(quantiles), months + 1) for every (cagr, vol) pair in
+    `params`. All pairs are driven by the same shocks.
+
+    Shocks are drawn time-major in blocks of months, so for a fixed seed the
+    output is bit-identical whatever block size the memory ceiling picks.
+    A seed therefore means default_rng(seed).standard_normal((months, n)),
+    path j taking column j. The original per-path loop drew (n, months)
+    from the unseeded global generator, so seeded projections have no
+    earlier counterpart to match; drawing path-major again would require
+    holding every month of every path at once.
+    """
+    months = int(years) * 12
+    dtype = np.dtype(dtype)
+    n = int(num_simulations)
+    draw = _shock_source(seed, rng, months, n, dtype)
+
+    dt = 1 / 12.0
+    runs = []
+    for cagr, vol in params:
+        mu = cagr / 100.0
+        sigma = vol / 100.0
+        runs.append((
+            dtype.type((mu - 0.5 * sigma**2) * dt),
+            dtype.type(sigma * np.sqrt(dt)),
+            WealthPaths(initial, contribution, months, n, dtype, quantiles),
+        ))
+
+    block = _block_months(n, months, dtype.itemsize, max_bytes)
+
+    for start in range(0, months, block):
+        stop = min(months, start + block)
+        shocks = draw(start, stop)
+
+        for drift, scale, paths in runs:
+            log_path = np.multiply(shocks, scale, dtype=dtype)
+            log_path += drift
+            paths.advance(log_path, start)
+            del log_path
+
+    return [paths.bands for _, _, paths in runs]
+
+
+def stationary_bootstrap_indices(rng, pool_size: int, n: int, mean_block: float):
+    """
+    Stationary (Politis-Romano) bootstrap over a circular pool, one column
+    per path. Returns next(start, stop) -> int64 indices of shape
+    (stop - start, n), called in order.
+
+    Each month starts a new block with probability 1/mean_block, at a uniform
+    random position; otherwise it continues the previous month's block.
+    Within a call, the index of month t is anchor + (t - t_anchor) mod N,
+    where the anchor is the latest block start. That is a maximum.accumulate
+    over the block-start months, so there is no per-path loop. The anchor is
+    carried across calls.
+    """
+    p_new = 1.0 / max(float(mean_block), 1.0)
+    anchor_pos = np.zeros(n, dtype=np.int64)
+    anchor_t = np.zeros(n, dtype=np.int64)
+
+    def next_block(start, stop):
+        rows = stop - start
+        t = np.arange(start, stop, dtype=np.int64)[:, None]
+        is_new = rng.random((rows, n)) < p_new
+        if start == 0:
+            is_new[0] = True
+        new_pos = rng.integers(0, pool_size, size=(rows, n), dtype=np.int64)
+
+        last = np.where(is_new, np.arange(rows)[:, None], -1)
+        np.maximum.accumulate(last, axis=0, out=last)
+        carried = last < 0
+        last_row = np.where(carried, 0, last)
+        cols = np.arange(n)[None, :]
+        pos = np.where(carried, anchor_pos[None, :], new_pos[last_row, cols])
+        t0 = np.where(carried, anchor_t[None, :], start + last_row)
+        idx = (pos + (t - t0)) % pool_size
+
+        anchor_pos[:] = pos[-1]
+        anchor_t[:] = t0[-1]
+        return idx
+
+    return next_block
+
+
+@timed("simulate.bootstrap")
+def bootstrap_quantile_bands(initial, contribution, pool, years, num_simulations=1000,
+                             mean_block=6.0, seed=None, rng=None, dtype=np.float64,
+                             quantiles=QUANTILES, max_bytes=SIM_MEMORY_LIMIT_BYTES):
+    """
+    Wealth bands from historical monthly log-returns (`pool`) resampled with
+    a stationary block bootstrap, instead of lognormal shocks. Each block of
+    months is one fancy-index gather from the pool, so fat tails and
+    drawdown clustering carry over without a per-path loop.
+    """
+    months = int(years) * 12
+    dtype = np.dtype(dtype)
+    n = int(num_simulations)
+    pool = np.asarray(pool, dtype=dtype)
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    next_indices = stationary_bootstrap_indices(rng, len(pool), n, mean_block)
+    paths = WealthPaths(initial, contribution, months, n, dtype, quantiles)
+
+    # Random draws, anchors and the gathered int64 indices roughly triple the
+    # per-month footprint of the GBM kernel
+    block = _block_months(n, months, 3 * max(dtype.itemsize, 8), max_bytes)
+    for start in range(0, months, block):
+        stop = min(months, start + block)
+        paths.advance(pool[next_indices(start, stop)], start)
+
+    return paths.bands
+
+
+def gbm_quantile_bands(initial, contribution, cagr, vol, years, num_simulations=1000,
+                       seed=None, rng=None, dtype=np.float64, quantiles=QUANTILES,
+                       max_bytes=SIM_MEMORY_LIMIT_BYTES):
+    """Single-strategy form of gbm_quantile_bands_multi."""
+    return gbm_quantile_bands_multi(initial, contribution, [(cagr, vol)], years,
+                                    num_simulations=num_simulations, seed=seed, rng=rng,
+                                    dtype=dtype, quantiles=quantiles, max_bytes=max_bytes)[0]
+
+
+def stream_quantile_bands(initial, contribution, runs, years, num_simulations=1000, chunks=10,
+                          seed=None, dtype=np.float64, quantiles=QUANTILES,
+                          max_bytes=SIM_MEMORY_LIMIT_BYTES, relative_accuracy=0.005):
+    """
+    Generator form of the simulator for progressive results. Paths are
+    simulated in `chunks` batches. Each run feeds a per-month LogBucketSketch
+    instead of keeping its paths. After every batch the generator yields
+    (paths_done, [bands per run]), with the same band shape as
+    gbm_quantile_bands_multi. Memory stays at one batch plus the sketches,
+    whatever num_simulations is.
+
+    `runs` holds ("gbm", cagr, vol) or ("bootstrap", pool, mean_block)
+    entries. GBM runs share one shock draw per block, as in the batch
+    kernel. Each batch has its own child seed, so a fixed seed reproduces
+    the whole stream.
+    """
+    months = int(years) * 12
+    dtype = np.dtype(dtype)
+    n_total = int(num_simulations)
+    chunks = max(1, min(int(chunks), n_total))
+    sizes = [n_total // chunks + (1 if i < n_total % chunks else 0) for i in range(chunks)]
+    child_seeds = np.random.SeedSequence(seed).spawn(chunks)
+    sketches = [LogBucketSketch(months, relative_accuracy) for _ in runs]
+
+    dt = 1 / 12.0
+    done = 0
+    for size, child in zip(sizes, child_seeds):
+        rng = np.random.default_rng(child)
+        states = []
+        for run, sketch in zip(runs, sketches):
+            paths = WealthPaths(initial, contribution, months, size, dtype, quantiles, sketch=sketch)
+            if run[0] == "bootstrap":
+                pool = np.asarray(run[1], dtype=dtype)
+                states.append((paths, pool, stationary_bootstrap_indices(rng, len(pool), size, run[2])))
+            else:
+                mu, sigma = run[1] / 100.0, run[2] / 100.0
+                states.append((paths, dtype.type((mu - 0.5 * sigma**2) * dt), dtype.type(sigma * np.sqrt(dt))))
+
+        block = _block_months(size, months, 3 * max(dtype.itemsize, 8), max_bytes)
+        for start in range(0, months, block):
+            stop = min(months, start + block)
+            shocks = None
+            for run, state in zip(runs, states):
+                if run[0] == "bootstrap":
+                    paths, pool, next_indices = state
+                    paths.advance(pool[next_indices(start, stop)], start)
+                else:
+                    paths, drift, scale = state
+                    if shocks is None:
+                        shocks = rng.standard_normal((stop - start, size), dtype=dtype)
+                    log_path = np.multiply(shocks, scale, dtype=dtype)
+                    log_path += drift
+                    paths.advance(log_path, start)
+                    del log_path
+
+        done += size
+        bands = []
+        for sketch in sketches:
+            b = np.empty((len(quantiles), months + 1), dtype=np.float64)
+            b[:, 0] = initial
+            b[:, 1:] = sketch.quantiles(quantiles)
+            bands.append(b)
+        yield done, bands
+
@@ -0,0 +1,261 @@
+import os
+import threading
+import numpy as np
+from services.cache import TTLCache
+from services.instrumentation import timed, register_cache
+from services.data_loader import STRATEGY_FILES, RETURNS_STORE, DATA_STORE, _get_factor_cache_path, _load_factors
+from services.shared_panel import SHARED_PANEL, SharedPanelPlane, default_directory
+
+TRADING_DAYS = 252
+
+
+class ReturnsPanel:
+    """
+    Every strategy in STRATEGY_FILES plus every factor ETF in
+    factor_returns.csv, on one sorted union date index.
+
+    values has shape (T, K) with NaN where a series has no observation.
+    Columns are strategy ids followed by factor tickers.
+    """
+
+    __slots__ = ("dates", "columns", "values", "key", "_col_index")
+
+    def __init__(self, dates, columns, values, key):
+        self.dates = dates
+        self.columns = list(columns)
+        self.values = values
+        self.values.setflags(write=False)
+        self.key = key
+        self._col_index = {c: i for i, c in enumerate(self.columns)}
+
+    def select(self, assets=None):
+        """(column names, (T, k) view) for a subset of columns, in the requested order."""
+        if not assets:
+            return self.columns, self.values
+        missing = [a for a in assets if a not in self._col_index]
+        if missing:
+            raise KeyError(", ".join(missing))
+        idx = [self._col_index[a] for a in assets]
+        return list(assets), self.values[:, idx]
+
+    def common_rows(self, assets=None):
+        """(dates, (n, k) matrix) restricted to days where every selected series exists."""
+        names, block = self.select(assets)
+        rows = np.isfinite(block).all(axis=1)
+        return names, self.dates[rows], np.ascontiguousarray(block[rows])
+
+
+_panel_lock = threading.Lock()
+_panel_cache = {"panel": None}
+
+
+def _panel_key():
+    strategy_versions = tuple((sid, RETURNS_STORE.version(files[0])) for sid, files in STRATEGY_FILES.items())
+    return strategy_versions, RETURNS_STORE.version(os.path.basename(_get_factor_cache_path()))
+
+
+@timed("panel.build")
+def _align_series():
+    """(dates, columns, values) on the union date index, parsed from the data_store."""
+    series = []
+    for sid, files in STRATEGY_FILES.items():
+        entry = RETURNS_STORE.get(files[0])
+        if entry is not None and len(entry.dates):
+            series.append((sid, entry.dates, entry.values[:, 0]))
+
+    factors = _load_factors()
+    if not factors.empty:
+        factor_dates = np.asarray(factors.index.values, dtype="datetime64[ns]")
+        for ticker in factors.columns:
+            series.append((str(ticker), factor_dates, factors[ticker].to_numpy(dtype=np.float64)))
+
+    if not series:
+        return np.array([], dtype="datetime64[ns]"), [], np.empty((0, 0))
+
+    dates = np.unique(np.concatenate([d for _, d, _ in series]))
+    values = np.full((len(dates), len(series)), np.nan)
+    for k, (_, d, v) in enumerate(series):
+        values[np.searchsorted(dates, d), k] = v
+    return dates, [name for name, _, _ in series], values
+
+
+def build_returns_panel(key=None) -> ReturnsPanel:
+    dates, columns, values = _align_series()
+    return ReturnsPanel(dates, columns, values, key)
+
+
+# Shared across worker processes when enabled; see services/shared_panel.py
+SHARED_PLANE = SharedPanelPlane(default_directory(DATA_STORE)) if SHARED_PANEL else None
+register_cache("shared_panel", lambda: SHARED_PLANE.stats() if SHARED_PLANE is not None else {})
+
+
+def _shared_panel(key) -> ReturnsPanel | None:
+    """The published panel for `key`, building and publishing it if no worker has yet."""
+    try:
+        found = SHARED_PLANE.publish(repr(key), _align_series)
+    except OSError:
+        return None     # unwritable directory, full disk: fall back to a private copy
+    if found is None:
+        return None
+    _, dates, columns, values = found
+    return ReturnsPanel(dates, columns, values, key)
+
+
+def get_returns_panel() -> ReturnsPanel:
+    """
+    The aligned panel, rebuilt only when a strategy file or the factor cache
+    changes. With the shared plane enabled it is a read-only memory map
+    that every worker process attaches to.
+    """
+    key = _panel_key()
+    with _panel_lock:
+        panel = _panel_cache["panel"]
+    if panel is not None and panel.key == key:
+        return panel
+    panel = _shared_panel(key) if SHARED_PLANE is not None else None
+    if panel is None:
+        panel = build_returns_panel(key)
+    with _panel_lock:
+        _panel_cache["panel"] = panel
+    return panel
+
+
+# ── Covariance / correlation engine ───────────────────────────────────────────
+
+def _to_corr(cov: np.ndarray) -> np.ndarray:
+    sd = np.sqrt(np.clip(np.diagonal(cov, axis1=-2, axis2=-1), 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / (sd[..., :, None] * sd[..., None, :])
+    return np.nan_to_num(corr)
+
+
+def full_sample_cov(X: np.ndarray) -> np.ndarray:
+    """Annualized sample covariance (ddof=1) of the rows of X."""
+    if len(X) < 2:
+        return np.full((X.shape[1], X.shape[1]), np.nan)
+    return np.cov(X, rowvar=False).reshape(X.shape[1], X.shape[1]) * TRADING_DAYS
+
+
+def rolling_cov(X: np.ndarray, window: int, ends=None) -> np.ndarray:
+    """
+    Annualized covariance of the trailing `window` rows ending before each
+    index in `ends` (default: every full window), shape (len(ends), k, k).
+    Built from prefix sums of x and x x', so each window is two
+    subtractions. The x x' sums are accumulated chunk by chunk and kept
+    only at window boundaries, so memory is O(len(ends) k²), not O(n k²).
+    """
+    n, k = X.shape
+    ends = np.arange(window, n + 1) if ends is None else np.asarray(ends, dtype=np.int64)
+    starts = ends - window
+    bounds, inverse = np.unique(np.concatenate([starts, ends]), return_inverse=True)
+    sx = np.zeros((n + 1, k))
+    np.cumsum(X, axis=0, out=sx[1:])
+    sxx = np.empty((len(bounds), k, k))
+    acc = np.zeros((k, k))
+    prev = 0
+    for b, pos in enumerate(bounds):
+        if pos > prev:
+            acc += X[prev:pos].T @ X[prev:pos]
+            prev = pos
+        sxx[b] = acc
+    m = sx[ends] - sx[starts]
+    s = sxx[inverse[len(ends):]] - sxx[inverse[:len(ends)]]
+    return (s - np.einsum("wi,wj->wij", m, m) / window) / (window - 1) * TRADING_DAYS
+
+
+def ewma_cov(X: np.ndarray, halflife: float, at=None) -> np.ndarray:
+    """
+    Exponentially weighted covariance after each day in `at` (default:
+    every day), shape (len(at), k, k), annualized. Incremental update:
+    d = x - mean; mean += a*d; cov = (1-a) * (cov + a*d d'). Only the
+    requested days are kept.
+    """
+    n, k = X.shape
+    at = np.arange(n) if at is None else np.asarray(at, dtype=np.int64)
+    alpha = 1.0 - 0.5 ** (1.0 / halflife)
+    out = np.empty((len(at), k, k))
+    mean = X[0].copy() if n else np.zeros(k)
+    cov = np.zeros((k, k))
+    j = 0
+    while j < len(at) and at[j] == 0:
+        out[j] = cov
+        j += 1
+    for t in range(1, (at[-1] + 1) if len(at) else 0):
+        d = X[t] - mean
+        mean += alpha * d
+        cov = (1.0 - alpha) * (cov + alpha * np.outer(d, d))
+        while j < len(at) and at[j] == t:
+            out[j] = cov
+            j += 1
+    return out * TRADING_DAYS
+
+
+# Rolling/EWMA series return one k x k matrix per sample; above this many
+# assets the payload is unreasonable, so such requests are rejected.
+CORRELATION_SERIES_MAX_ASSETS = int(os.getenv("CORRELATION_SERIES_MAX_ASSETS", "60"))
+# Cap on samples x k x k values in one series; the step is widened to fit.
+CORRELATION_SERIES_MAX_VALUES = int(os.getenv("CORRELATION_SERIES_MAX_VALUES", "1000000"))
+
+_matrix_cache = TTLCache(maxsize=64, ttl=3600)
+register_cache("correlation", _matrix_cache.stats)
+
+
+def _matrix_payload(matrix: np.ndarray) -> list:
+    return np.round(matrix, 6).tolist()
+
+
+@timed("correlation")
+def correlation_matrices(kind: str = "corr", method: str = "full", assets=None, window: int = 63,
+                         halflife: float = 21.0, step: int = 21) -> dict:
+    """
+    Correlation or (annualized) covariance across strategies and factors on
+    their common dates. method: full | rolling | ewma. Rolling/EWMA results
+    are computed only at samples every `step` days, always including the
+    latest day, and raise ValueError above CORRELATION_SERIES_MAX_ASSETS.
+    The step is widened when the series would exceed
+    CORRELATION_SERIES_MAX_VALUES values; the result reports the one used.
+    """
+    panel = get_returns_panel()
+    key = (panel.key, kind, method, tuple(assets or ()), window, halflife, step)
+    cached = _matrix_cache.get(key)
+    if cached is not None:
+        return cached
+
+    names, dates, X = panel.common_rows(assets)
+    result = {"kind": kind, "method": method, "assets": names, "observations": int(len(X))}
+    if len(X) > 0:
+        result["start"] = str(dates[0])[:10]
+        result["end"] = str(dates[-1])[:10]
+
+    if method == "full":
+        cov = full_sample_cov(X)
+        result["matrix"] = _matrix_payload(_to_corr(cov) if kind == "corr" else cov)
+    else:
+        if len(names) > CORRELATION_SERIES_MAX_ASSETS:
+            raise ValueError(f"{method} series support at most {CORRELATION_SERIES_MAX_ASSETS} assets, got {len(names)}")
+        span = len(X) - window + 1 if method == "rolling" else len(X)
+        max_samples = max(1, CORRELATION_SERIES_MAX_VALUES // max(1, len(names)) ** 2)
+        if -(-span // step) > max_samples:
+            step = -(-span // max_samples)
+        result["step"] = step
+        if method == "rolling":
+            if len(X) < window:
+                result["series"] = []
+                _matrix_cache.set(key, result)
+                return result
+            # Sample window ends (exclusive row index), always including the latest day
+            ends = np.arange(len(X), window - 1, -step)[::-1]
+            covs, cov_dates = rolling_cov(X, window, ends), dates[ends - 1]
+            result["window"] = window
+        else:
+            at = np.arange(len(X) - 1, -1, -step)[::-1]
+            covs, cov_dates = ewma_cov(X, halflife, at), dates[at]
+            result["halflife"] = halflife
+        mats = _to_corr(covs) if kind == "corr" else covs
+        result["series"] = [
+            {"date": str(d)[:10], "matrix": _matrix_payload(m)} for d, m in zip(cov_dates, mats)
+        ]
+        result["matrix"] = result["series"][-1]["matrix"] if result["series"] else []
+
+    _matrix_cache.set(key, result)
+    return result
@@ -0,0 +1,85 @@
+import math
+import numpy as np
+
+
+def sum_stats(s1: float, s2: float, n: int, periods_in_year: int = 252, annualize: bool = True) -> dict:
+    """
+    Period performance/volatility from the sum and sum of squares of the
+    log-returns in the window. Same output as routes_backtest.calculate_trailing_stats;
+    annualize=False always reports the cumulative return (calendar periods).
+    """
+    if n == 0:
+        return {"performance_pct": 0.0, "volatility_pct": 0.0, "is_annualized": False}
+
+    compound_multiplier = math.exp(s1)
+    cum_ret = (compound_multiplier - 1) * 100
+
+    # Sample std (ddof=1) from the sums; undefined for a single day
+    volatility = 0.0
+    if n > 1:
+        var = max(s2 - s1 * s1 / n, 0.0) / (n - 1)
+        volatility = math.sqrt(var) * math.sqrt(periods_in_year) * 100
+
+    years = n / periods_in_year
+    if annualize and years > 1.0:
+        ann_ret = (compound_multiplier ** (1 / years) - 1) * 100
+        return {"performance_pct": round(ann_ret, 2), "volatility_pct": round(volatility, 2), "is_annualized": True}
+
+    return {"performance_pct": round(cum_ret, 2), "volatility_pct": round(volatility, 2), "is_annualized": False}
+
+
+class PrefixIndex:
+    """
+    Prefix sums of r and r² over one strategy's daily log-returns.
+
+    Any contiguous window (trailing N days, a calendar year, YTD or an
+    arbitrary start/end) reduces to two binary searches and two
+    subtractions, so each period costs O(1) no matter how long it is.
+    """
+
+    __slots__ = ("dates", "cs1", "cs2", "key")
+
+    def __init__(self, dates, returns, key=None):
+        returns = np.asarray(returns, dtype=np.float64)
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.cs1 = np.concatenate(([0.0], np.cumsum(returns)))
+        self.cs2 = np.concatenate(([0.0], np.cumsum(returns * returns)))
+        self.key = key
+
+    def __len__(self):
+        return len(self.dates)
+
+    def sums(self, i: int, j: int):
+        """(sum r, sum r², n) over rows [i, j)."""
+        return float(self.cs1[j] - self.cs1[i]), float(self.cs2[j] - self.cs2[i]), j - i
+
+    def bounds(self, start=None, end=None):
+        """Row range [i, j) covering the inclusive date range start..end (YYYY-MM-DD)."""
+        i = int(np.searchsorted(self.dates, np.datetime64(start, "ns"), side="left")) if start else 0
+        j = int(np.searchsorted(self.dates, np.datetime64(end, "ns") + np.timedelta64(1, "D"), side="left")) if end else len(self)
+        return i, max(i, j)
+
+    def stats(self, i: int, j: int, periods_in_year: int = 252, annualize: bool = True) -> dict:
+        return sum_stats(*self.sums(i, j), periods_in_year=periods_in_year, annualize=annualize)
+
+    def trailing(self, days: int) -> dict:
+        n = len(self)
+        return self.stats(max(0, n - days), n)
+
+    def between(self, start=None, end=None, annualize: bool = True) -> dict:
+        return self.stats(*self.bounds(start, end), annualize=annualize)
+
+    def years(self):
+        """Calendar years present in the series, ascending."""
+        if len(self) == 0:
+            return []
+        first = int(self.dates[0].astype("datetime64[Y]").astype(np.int64)) + 1970
+        last = int(self.dates[-1].astype("datetime64[Y]").astype(np.int64)) + 1970
+        return list(range(first, last + 1))
+
+    def calendar_year(self, year: int) -> dict:
+        return self.between(f"{year}-01-01", f"{year}-12-31", annualize=False)
+
+    def ytd(self) -> dict:
+        years = self.years()
+        return self.calendar_year(years[-1]) if years else sum_stats(0.0, 0.0, 0)
@@ -0,0 +1,56 @@
+import math
+import numpy as np
+
+
+class LogBucketSketch:
+    """
+    Mergeable quantile sketch for many columns at once (one per month), in
+    the style of DDSketch: positive values land in log-spaced buckets
+    gamma^(i-1) < x <= gamma^i with gamma = (1 + a) / (1 - a). Any quantile
+    then comes back within relative error `a`.
+
+    Counts are a dense (columns, buckets) int64 matrix over a fixed value
+    range, so adding a block of samples is one bincount, and merging two
+    sketches is one addition. Memory depends on the range and accuracy,
+    not on how many paths were added. Values outside the range are clamped
+    to the edge buckets; non-positive values get their own bucket.
+    """
+
+    def __init__(self, columns: int, relative_accuracy: float = 0.005,
+                 min_value: float = 1e-2, max_value: float = 1e13):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        # Bucket 0 holds values <= 0; buckets 1.. are log-spaced
+        self.buckets = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 2
+        self.counts = np.zeros((columns, self.buckets), dtype=np.int64)
+
+    def add(self, first_column: int, block: np.ndarray):
+        """Adds samples: row r of `block` (rows, paths) goes to column first_column + r."""
+        rows = block.shape[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            idx = np.ceil(np.log(block.astype(np.float64, copy=False)) / self._log_gamma)
+        idx = np.clip(np.nan_to_num(idx, nan=-np.inf), self._offset, self._offset + self.buckets - 2)
+        idx = (idx - self._offset + 1).astype(np.int64)
+        idx[block <= 0] = 0
+        idx += (np.arange(rows, dtype=np.int64) * self.buckets)[:, None]
+        counts = np.bincount(idx.ravel(), minlength=rows * self.buckets)
+        self.counts[first_column:first_column + rows] += counts.reshape(rows, self.buckets)
+
+    def merge(self, other: "LogBucketSketch"):
+        self.counts += other.counts
+
+    def quantiles(self, qs) -> np.ndarray:
+        """(len(qs), columns) quantile estimates; NaN for empty columns."""
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1]
+        out = np.full((len(qs), len(cum)), np.nan)
+        # Bucket i (>= 1) represents 2 * gamma^k / (gamma + 1) with k = i - 1 + offset
+        centers = 2.0 * self.gamma ** (np.arange(self.buckets) - 1 + self._offset) / (self.gamma + 1)
+        centers[0] = 0.0
+        for qi, q in enumerate(qs):
+            rank = np.floor(q * np.maximum(total - 1, 0))
+            bucket = (cum <= rank[:, None]).sum(axis=1)
+            out[qi] = np.where(total > 0, centers[np.minimum(bucket, self.buckets - 1)], np.nan)
+        return out
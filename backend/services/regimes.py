@@ -0,0 +1,133 @@
+import math
+import os
+import threading
+import numpy as np
+from services.instrumentation import timed
+from services.data_loader import STRATEGY_FILES, STRATEGY_NAMES, RETURNS_STORE, get_prefix_index, _get_factor_design, _get_factor_cache_path
+
+# ── Stress-window registry ────────────────────────────────────────────────────
+# Inclusive calendar bounds of each named market regime (S&P 500 peak -> trough).
+REGIMES = {
+    "dot_com":         {"name": "Dot-Com Bust",            "start": "2000-03-24", "end": "2002-10-09"},
+    "gfc":             {"name": "Global Financial Crisis", "start": "2007-10-09", "end": "2009-03-09"},
+    "covid_crash":     {"name": "COVID Crash",             "start": "2020-02-19", "end": "2020-03-23"},
+    "rate_shock_2022": {"name": "2022 Rate Shock",         "start": "2022-01-01", "end": "2022-10-12"},
+}
+
+
+class _RegimeIndex:
+    """
+    Prefix arrays for one strategy, with SPY aligned to the strategy's dates:
+    counts, sums of r and SPY, and cross/squared products over the days where
+    both exist. Regime return, vol and beta are differences of these arrays.
+    Max drawdown reuses the strategy's cumulative log-return prefix.
+    """
+
+    def __init__(self, prefix, spy_on_dates):
+        self.prefix = prefix
+        has = np.isfinite(spy_on_dates)
+        r = np.diff(prefix.cs1)
+        spy = np.where(has, spy_on_dates, 0.0)
+        rm = np.where(has, r, 0.0)
+
+        def _cum(a):
+            return np.concatenate(([0.0], np.cumsum(a)))
+
+        self.cnt = _cum(has.astype(np.float64))
+        self.r = _cum(rm)
+        self.s = _cum(spy)
+        self.rs = _cum(rm * spy)
+        self.ss = _cum(spy * spy)
+
+    def regime_stats(self, start: str, end: str) -> dict | None:
+        i, j = self.prefix.bounds(start, end)
+        if j - i < 2:
+            return None
+
+        stats = self.prefix.stats(i, j, annualize=False)
+
+        # Max drawdown inside the window, measured from the level at its start
+        path = self.prefix.cs1[i + 1:j + 1] - self.prefix.cs1[i]
+        peak = np.maximum(np.maximum.accumulate(path), 0.0)
+        max_dd = (math.exp(float((path - peak).min())) - 1) * 100
+
+        n = self.cnt[j] - self.cnt[i]
+        beta = None
+        spy_ret = None
+        if n >= 2:
+            sr, ss = self.r[j] - self.r[i], self.s[j] - self.s[i]
+            cov = (self.rs[j] - self.rs[i]) - sr * ss / n
+            var = (self.ss[j] - self.ss[i]) - ss * ss / n
+            beta = round(cov / var, 2) if var > 0 else None
+            spy_ret = round((math.exp(ss) - 1) * 100, 2)
+
+        return {
+            "start":          str(self.prefix.dates[i])[:10],
+            "end":            str(self.prefix.dates[j - 1])[:10],
+            "days":           j - i,
+            "return_pct":     stats["performance_pct"],
+            "volatility_pct": stats["volatility_pct"],
+            "max_dd_pct":     round(max_dd, 2),
+            "beta_spy":       beta,
+            "spy_return_pct": spy_ret,
+        }
+
+
+_regime_cache = {}          # strategy_id -> (key, {regime_id: stats | None})
+_regime_cache_lock = threading.Lock()
+
+
+@timed("regimes.table")
+def _regime_table(strategy_id: str):
+    """Every registered regime resolved for one strategy, cached per data version."""
+    prefix = get_prefix_index(strategy_id)
+    if prefix is None:
+        return None
+    design = _get_factor_design()
+    factor_version = RETURNS_STORE.version(os.path.basename(_get_factor_cache_path()))
+    key = (prefix.key, factor_version, tuple(REGIMES))
+
+    with _regime_cache_lock:
+        cached = _regime_cache.get(strategy_id)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    spy_on_dates = np.full(len(prefix), np.nan)
+    if design is not None:
+        _, strat_idx, factor_idx = np.intersect1d(prefix.dates, design.dates, assume_unique=True, return_indices=True)
+        spy_on_dates[strat_idx] = design.spy[factor_idx]
+
+    index = _RegimeIndex(prefix, spy_on_dates)
+    table = {rid: index.regime_stats(r["start"], r["end"]) for rid, r in REGIMES.items()}
+    with _regime_cache_lock:
+        _regime_cache[strategy_id] = (key, table)
+    return table
+
+
+def get_strategy_regimes(strategy_id: str) -> dict:
+    """Stress-window performance of one strategy across every registered regime."""
+    if strategy_id not in STRATEGY_FILES:
+        return {}
+    table = _regime_table(strategy_id)
+    if table is None:
+        return {}
+    regimes = []
+    for rid, spec in REGIMES.items():
+        stats = table[rid]
+        row = {"regime": rid, "name": spec["name"], "available": stats is not None}
+        if stats is not None:
+            row.update(stats)
+        regimes.append(row)
+    return {"strategy_id": strategy_id, "regimes": regimes}
+
+
+def get_regime_matrix() -> dict:
+    """Strategies x regimes stress-test table, served from the per-strategy cache."""
+    matrix = {}
+    for strategy_id in STRATEGY_NAMES:
+        table = _regime_table(strategy_id) or {}
+        matrix[strategy_id] = {rid: table.get(rid) for rid in REGIMES}
+    return {
+        "regimes": [{"regime": rid, **spec} for rid, spec in REGIMES.items()],
+        "matrix": matrix,
+    }
@@ -0,0 +1,319 @@
+import hashlib
+import io
+import itertools
+import os
+import threading
+import numpy as np
+import pandas as pd
+from services.columnar_store import open_columnar, columnar_signature
+from services.instrumentation import timed
+
+# Bytes remembered from the end of each parsed file, to tell whether it ends
+# in a newline before appending to it.
+_TAIL_BYTES = 64
+
+_lineages = itertools.count(1)
+
+
+class _Entry:
+    """
+    Parsed contents of one data_store file, held as read-only NumPy arrays.
+
+    `dates` and `values` are read-only views of the first n rows of growable
+    buffers. Appends write past n and return a new entry, so views held by
+    earlier callers never change underneath them.
+    """
+
+    __slots__ = ("signature", "dates", "columns", "values", "lineage", "tail", "digest", "_date_buf", "_value_buf")
+
+    def __init__(self, signature, date_buf, value_buf, n, columns, lineage, tail, digest=None):
+        self.signature = signature   # (mtime_ns, size) of the file when it was parsed
+        self.columns = columns       # tuple of column names as written in the file
+        self.lineage = lineage       # same id for every entry extended from one full parse
+        self.tail = tail             # last _TAIL_BYTES of the file at `signature`
+        self.digest = digest         # running sha1 of the file's bytes at `signature`, if known
+        self._date_buf = date_buf
+        self._value_buf = value_buf
+        self.dates = date_buf[:n]    # datetime64[ns], shape (n,)
+        self.values = value_buf[:n]  # float64, shape (n, len(columns))
+        self.dates.setflags(write=False)
+        self.values.setflags(write=False)
+
+    def extended(self, signature, new_dates, new_values, tail, digest) -> "_Entry":
+        n = len(self.dates)
+        k = len(new_dates)
+        date_buf, value_buf = self._date_buf, self._value_buf
+        if n + k > len(date_buf):
+            capacity = max(2 * len(date_buf), n + k)
+            date_buf = np.empty(capacity, dtype=self._date_buf.dtype)
+            value_buf = np.empty((capacity, self._value_buf.shape[1]), dtype=np.float64)
+            date_buf[:n] = self.dates
+            value_buf[:n] = self.values
+        date_buf[n:n + k] = new_dates
+        value_buf[n:n + k] = new_values
+        return _Entry(signature, date_buf, value_buf, n + k, self.columns, self.lineage, tail, digest)
+
+
+class ReturnsStore:
+    """
+    Process-wide cache of the data_store return files.
+
+    Each file is loaded once and kept as compact datetime64/float64 arrays,
+    memory-mapped from its columnar copy when one is current (see
+    services/columnar_store.py) and parsed from the CSV otherwise.
+    Every lookup does a single os.stat(). When a file grows, only the new
+    rows are parsed if every previously parsed byte is unchanged (checked
+    against a running digest, a read and hash rather than a parse);
+    otherwise the whole file is re-read. Rows appended by live_updater are
+    therefore picked up without a restart.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._appends = 0
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.root, filename)
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _hash_prefix(path: str, size: int):
+        """Running sha1 of the first `size` bytes of the file, or None if it is shorter."""
+        with open(path, "rb") as f:
+            prefix = f.read(size)
+        return hashlib.sha1(prefix) if len(prefix) == size else None
+
+    @staticmethod
+    def _read_tail(path: str, size: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(max(0, size - _TAIL_BYTES))
+            return f.read(min(size, _TAIL_BYTES))
+
+    @timed("returns_store.load")
+    def _load(self, filename: str, signature) -> _Entry:
+        """
+        Full load of a file: memory-maps its columnar copy when one was built
+        from this exact CSV version, otherwise parses the CSV.
+        """
+        path = self._path(filename)
+        mapped = open_columnar(self.root, filename, None if signature[0] == "columnar" else signature)
+        if mapped is not None:
+            dates, columns, values = mapped
+            tail = b"" if signature[0] == "columnar" else self._read_tail(path, signature[1])
+            return _Entry(signature, dates, values, len(dates), columns, next(_lineages), tail)
+        return self._parse(path, signature)
+
+    @staticmethod
+    def _parse(path: str, signature) -> _Entry:
+        with open(path, "rb") as f:
+            raw = f.read()
+        # round_trip parses each float exactly as float() does, so rows read
+        # back after append() equal the values that were written
+        df = pd.read_csv(io.BytesIO(raw), index_col=0, parse_dates=True, float_precision="round_trip")
+        dates = np.array(pd.DatetimeIndex(df.index).values, dtype="datetime64[ns]")
+        values = np.array(df.to_numpy(dtype=np.float64, na_value=np.nan), dtype=np.float64, order="C")
+        # Digest exactly what was parsed; if the file grew since the stat, the
+        # signature no longer matches and the next get() re-checks it.
+        signature = (signature[0], len(raw))
+        return _Entry(signature, dates, values, len(dates), tuple(str(c) for c in df.columns), next(_lineages),
+                      raw[-_TAIL_BYTES:], hashlib.sha1(raw))
+
+    @staticmethod
+    def _parse_rows(text: str, width: int):
+        dates, rows = [], []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            fields = line.split(",")
+            if len(fields) != width + 1:
+                return None
+            dates.append(pd.Timestamp(fields[0]).to_datetime64())
+            rows.append([float(v) if v.strip() else np.nan for v in fields[1:]])
+        return np.array(dates, dtype="datetime64[ns]"), np.array(rows, dtype=np.float64).reshape(-1, width)
+
+    def _read_appended(self, path: str, entry: _Entry, signature):
+        """
+        Parses only the bytes added since `entry`; None if the file changed in
+        any other way, including an edit anywhere in the parsed prefix.
+        """
+        old_size, new_size = entry.signature[1], signature[1]
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read(old_size))
+                if digest.digest() != entry.digest.digest():
+                    return None
+                added = f.read(new_size - old_size)
+        except OSError:
+            return None
+        if len(added) != new_size - old_size or not added.endswith(b"\n"):
+            return None
+        try:
+            parsed = self._parse_rows(added.decode(), len(entry.columns))
+        except ValueError:
+            return None
+        if parsed is None:
+            return None
+        new_dates, new_values = parsed
+        if len(new_dates) and len(entry.dates) and new_dates[0] <= entry.dates[-1]:
+            return None
+        digest.update(added)
+        return entry.extended(signature, new_dates, new_values, (entry.tail + added)[-_TAIL_BYTES:], digest)
+
+    def _current_signature(self, filename: str):
+        """Signature of the CSV, or of its standalone columnar copy if the CSV is absent."""
+        signature = self._signature(self._path(filename))
+        if signature is None:
+            signature = columnar_signature(self.root, filename)
+        return signature
+
+    def get(self, filename: str):
+        """Returns the cached entry for `filename`, or None if the file does not exist."""
+        path = self._path(filename)
+        signature = self._current_signature(filename)
+        if signature is None:
+            with self._lock:
+                self._entries.pop(filename, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and entry.signature == signature:
+                self._hits += 1
+                return entry
+
+        # Parse outside the lock so one slow file does not block the others.
+        new_entry = None
+        if entry is not None and entry.digest is not None and signature[0] != "columnar" \
+                and signature[1] > entry.signature[1]:
+            new_entry = self._read_appended(path, entry, signature)
+        appended = new_entry is not None
+        if new_entry is None:
+            new_entry = self._load(filename, signature)
+
+        with self._lock:
+            current = self._entries.get(filename)
+            if current is not None and current.signature == signature:
+                # Another thread finished the same work first.
+                self._hits += 1
+                return current
+            if appended:
+                self._appends += 1
+            elif current is None:
+                self._misses += 1
+            else:
+                self._reloads += 1
+            self._entries[filename] = new_entry
+        return new_entry
+
+    def append(self, filename: str, dates, values):
+        """
+        Appends rows to a data_store CSV with a single O_APPEND write and
+        extends the cached arrays in place. The cost depends only on the
+        number of new rows.
+
+        `dates` must be strictly after the last stored date; `values` has
+        one column per data column in the file.
+        """
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        values = np.asarray(values, dtype=np.float64).reshape(len(dates), -1)
+        if len(dates) == 0:
+            return self.get(filename)
+        if np.any(np.diff(dates) <= np.timedelta64(0)):
+            raise ValueError("Appended dates must be strictly increasing")
+
+        path = self._path(filename)
+        with self._write_lock:
+            entry = self.get(filename)
+            if entry is None:
+                raise FileNotFoundError(path)
+            if values.shape[1] != len(entry.columns):
+                raise ValueError(f"{filename} has {len(entry.columns)} data columns, got {values.shape[1]}")
+            if len(entry.dates) and dates[0] <= entry.dates[-1]:
+                raise ValueError(f"{filename} already has data through {str(entry.dates[-1])[:10]}")
+
+            lines = []
+            for date, row in zip(dates, values):
+                fields = ("" if np.isnan(v) else repr(float(v)) for v in row)
+                lines.append(f"{str(date)[:10]},{','.join(fields)}\n")
+            payload = "".join(lines).encode()
+            if entry.tail and not entry.tail.endswith(b"\n"):
+                payload = b"\n" + payload
+            # Entries mapped from a columnar copy were never read byte-wise
+            digest = entry.digest.copy() if entry.digest is not None else self._hash_prefix(path, entry.signature[1])
+
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, payload)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            signature = self._signature(path)
+            if digest is not None:
+                digest.update(payload)
+            new_entry = entry.extended(signature, dates, values, (entry.tail + payload)[-_TAIL_BYTES:], digest)
+            with self._lock:
+                if self._entries.get(filename) is entry:
+                    self._entries[filename] = new_entry
+                    self._appends += 1
+                else:
+                    self._entries.pop(filename, None)
+        return new_entry
+
+    def get_frame(self, filename: str) -> pd.DataFrame:
+        """Returns a fresh DataFrame view of the file (callers may add columns freely)."""
+        entry = self.get(filename)
+        if entry is None:
+            return pd.DataFrame()
+        index = pd.DatetimeIndex(entry.dates, name="Date")
+        return pd.DataFrame(entry.values.copy(), index=index, columns=list(entry.columns))
+
+    def version(self, filename: str):
+        """(mtime_ns, size) of the file on disk, or None if it is missing."""
+        return self._current_signature(filename)
+
+    def directory_version(self) -> str:
+        """
+        Digest of the (name, mtime, size) of every file in the data_store.
+        Changes whenever any CSV is edited, appended or replaced. Costs a
+        single scandir.
+        """
+        try:
+            with os.scandir(self.root) as it:
+                parts = sorted(
+                    (e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in it if e.is_file()
+                )
+        except OSError:
+            parts = []
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def invalidate(self, filename: str | None = None):
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(filename, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "reloads": self._reloads,
+                "appends": self._appends,
+                "rows": int(sum(len(e.dates) for e in self._entries.values())),
+            }
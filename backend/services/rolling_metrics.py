@@ -0,0 +1,121 @@
+import math
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def _year(date) -> int:
+    return int(np.datetime64(date, "Y").astype(np.int64)) + 1970
+
+
+class RollingMetrics:
+    """
+    Running accumulators behind the headline metrics of one log-return series.
+
+    Appending a day is O(1): the log-sum, Welford mean/variance, running
+    peak of the cumulative log-return, current drawdown and its duration,
+    the worst drawdown and the YTD sum are all updated in place. History is
+    never rescanned. `from_arrays` builds the same state from a full history
+    with vectorized NumPy.
+    """
+
+    __slots__ = ("lineage", "n", "log_sum", "mean", "m2", "peak", "max_dd_log",
+                 "dd_duration", "ytd_year", "ytd_sum", "last_date")
+
+    def __init__(self, lineage=None):
+        self.lineage = lineage        # identifies the source data this state was built from
+        self.n = 0
+        self.log_sum = 0.0            # L_t = sum of log-returns
+        self.mean = 0.0               # Welford running mean
+        self.m2 = 0.0                 # Welford sum of squared deviations
+        self.peak = -math.inf         # max_{s<=t} L_s
+        self.max_dd_log = 0.0         # min_t (L_t - peak_t)
+        self.dd_duration = 0          # days since the last peak
+        self.ytd_year = None
+        self.ytd_sum = 0.0
+        self.last_date = None
+
+    @classmethod
+    def from_arrays(cls, dates, returns, lineage=None) -> "RollingMetrics":
+        state = cls(lineage)
+        n = len(returns)
+        if n == 0:
+            return state
+        returns = np.asarray(returns, dtype=np.float64)
+        cum = np.cumsum(returns)
+        peak = np.maximum.accumulate(cum)
+        drawdown = cum - peak
+        at_peak = np.flatnonzero(drawdown == 0)
+
+        state.n = n
+        state.log_sum = float(cum[-1])
+        state.mean = float(returns.mean())
+        state.m2 = float(((returns - state.mean) ** 2).sum())
+        state.peak = float(peak[-1])
+        state.max_dd_log = float(drawdown.min())
+        state.dd_duration = int(n - 1 - at_peak[-1]) if len(at_peak) else n
+
+        last_date = np.datetime64(dates[-1], "D")
+        state.last_date = last_date
+        state.ytd_year = _year(last_date)
+        year_start = np.datetime64(f"{state.ytd_year}-01-01")
+        first_ytd = int(np.searchsorted(np.asarray(dates, dtype="datetime64[D]"), year_start))
+        state.ytd_sum = float(returns[first_ytd:].sum())
+        return state
+
+    def copy(self) -> "RollingMetrics":
+        other = RollingMetrics.__new__(RollingMetrics)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def update(self, date, r: float):
+        """Folds one new day into the accumulators."""
+        r = float(r)
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+
+        self.log_sum += r
+        if self.log_sum >= self.peak:
+            self.peak = self.log_sum
+            self.dd_duration = 0
+        else:
+            self.dd_duration += 1
+        self.max_dd_log = min(self.max_dd_log, self.log_sum - self.peak)
+
+        date = np.datetime64(date, "D")
+        year = _year(date)
+        if year != self.ytd_year:
+            self.ytd_year = year
+            self.ytd_sum = 0.0
+        self.ytd_sum += r
+        self.last_date = date
+
+    def extend(self, dates, returns):
+        for date, r in zip(dates, returns):
+            self.update(date, r)
+
+    @property
+    def current_drawdown_pct(self) -> float:
+        if self.n == 0:
+            return 0.0
+        return (math.exp(self.log_sum - self.peak) - 1) * 100
+
+    def headline(self, risk_free_rate: float):
+        """(CAGR, Vol, Sharpe, MaxDD, YTD) in percent, rounded like get_strategy_metrics."""
+        if self.n == 0:
+            return 0.0, 0.0, 0.0, 0.0, 0.0
+        cm = math.exp(self.log_sum)
+        yrs = self.n / float(TRADING_DAYS)
+        cagr = (cm ** (1 / yrs) - 1) * 100 if yrs > 0 else 0
+
+        ann_vol = math.sqrt(self.m2 / (self.n - 1)) * math.sqrt(TRADING_DAYS) if self.n > 1 else float("nan")
+        ann_ret_approx = self.mean * TRADING_DAYS
+        sharpe = (ann_ret_approx - risk_free_rate) / ann_vol if ann_vol > 0 else 0
+
+        max_dd = (math.exp(self.max_dd_log) - 1) * 100
+        ytd = (math.exp(self.ytd_sum) - 1) * 100
+
+        return round(cagr, 2), round(ann_vol * 100, 2), round(sharpe, 2), round(max_dd, 2), round(ytd, 2)
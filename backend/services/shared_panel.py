@@ -0,0 +1,179 @@
+"""
+Cross-process publication of the aligned returns/factor panel.
+
+With several uvicorn workers (`--workers N` or WEB_CONCURRENCY), each
+process would otherwise parse every strategy CSV and the factor cache and
+hold a private copy of the (T, K) panel. Instead, the first process to need
+a given panel version writes it once to .npy files in a shared directory,
+and every process maps those files read-only (np.load(mmap_mode="r")). The
+pages live in the OS page cache and are shared by all workers.
+
+Layout of SHARED_PANEL_DIR:
+  values.<generation>.npy   (T, K) float64, NaN where a series has no row
+  dates.<generation>.npy    (T,) datetime64[ns]
+  CURRENT                   JSON: generation, key, columns and file names
+
+Data files are immutable once written. A publish writes them under temp
+names, fsyncs, renames them into place, and then os.replace()s CURRENT.
+Readers therefore see either the previous generation or the next one,
+never a mix. The generation counter increases by one per publish. A worker
+whose own data version no longer matches its panel re-reads CURRENT and
+swaps to the newer generation; if none matches, it builds and publishes
+one. Publishing is serialized with an flock on the directory, so
+concurrent workers build a given version once.
+
+The previous generation is kept on disk so a reader racing a publish can
+still open it. Older files are unlinked; processes that still map them keep
+their pages until they let go.
+
+Configuration (environment):
+  SHARED_PANEL       "1" (default) or "0" to keep the panel per process
+  SHARED_PANEL_DIR   directory for the files (default: one per data_store
+                     under the system temp dir)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:         # not on Windows; publishing is then only thread-serialized
+    fcntl = None
+
+SHARED_PANEL = os.getenv("SHARED_PANEL", "1").lower() in ("1", "true", "yes")
+
+_CURRENT = "CURRENT"
+_KEEP_GENERATIONS = 2
+
+
+def default_directory(data_store: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(data_store).encode()).hexdigest()[:12]
+    return os.getenv("SHARED_PANEL_DIR", os.path.join(tempfile.gettempdir(), f"algoforall-panel-{digest}"))
+
+
+def _write_atomic(path: str, write):
+    fd, tmp = tempfile.mkstemp(prefix=".tmp.", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class SharedPanelPlane:
+    """Publishes and attaches generations of one panel in `directory`."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._attached = None       # (generation, key, dates, columns, values)
+        self._lock = threading.Lock()
+        self.publishes = 0
+        self.attaches = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_current(self):
+        try:
+            with open(self._path(_CURRENT), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _map(self, meta):
+        dates = np.load(self._path(meta["dates"]), mmap_mode="r")
+        values = np.load(self._path(meta["values"]), mmap_mode="r")
+        return dates, values
+
+    def attach(self, key: str):
+        """
+        (generation, dates, columns, values) of the published panel if it was
+        built for `key`, else None. The arrays are read-only memory maps.
+        """
+        with self._lock:
+            attached = self._attached
+        if attached is not None and attached[1] == key:
+            return attached[0], attached[2], attached[3], attached[4]
+
+        meta = self._read_current()
+        if meta is None or meta["key"] != key:
+            return None
+        try:
+            dates, values = self._map(meta)
+        except FileNotFoundError:
+            return None     # superseded and collected between reading CURRENT and opening
+        with self._lock:
+            self._attached = (meta["generation"], key, dates, meta["columns"], values)
+            self.attaches += 1
+        return meta["generation"], dates, meta["columns"], values
+
+    def publish(self, key: str, build):
+        """
+        Attaches the panel for `key`, calling build() -> (dates, columns,
+        values) and publishing the result first if no process has yet.
+        Returns the same tuple as attach().
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                found = self.attach(key)
+                if found is not None:
+                    return found
+                dates, columns, values = build()
+                meta = self._read_current()
+                generation = (meta["generation"] if meta else 0) + 1
+                names = {"dates": f"dates.{generation}.npy", "values": f"values.{generation}.npy"}
+                _write_atomic(self._path(names["dates"]),
+                              lambda f: np.save(f, np.asarray(dates, dtype="datetime64[ns]")))
+                _write_atomic(self._path(names["values"]),
+                              lambda f: np.save(f, np.ascontiguousarray(values, dtype=np.float64)))
+                current = {
+                    "generation": generation,
+                    "key": key,
+                    "columns": list(columns),
+                    "shape": list(np.shape(values)),
+                    "published_at": time.time(),
+                    "pid": os.getpid(),
+                    **names,
+                }
+                _write_atomic(self._path(_CURRENT), lambda f: f.write(json.dumps(current).encode()))
+                with self._lock:
+                    self.publishes += 1
+                self._collect(generation)
+                return self.attach(key)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _collect(self, generation: int):
+        for name in os.listdir(self.directory):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[0] in ("dates", "values") and parts[2] == "npy" and parts[1].isdigit():
+                if int(parts[1]) <= generation - _KEEP_GENERATIONS:
+                    try:
+                        os.unlink(self._path(name))
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self) -> dict:
+        meta = self._read_current()
+        with self._lock:
+            attached = self._attached[0] if self._attached is not None else None
+            return {
+                "directory": self.directory,
+                "published_generation": meta["generation"] if meta else None,
+                "attached_generation": attached,
+                "publishes": self.publishes,
+                "attaches": self.attaches,
+            }
@@ -0,0 +1,171 @@
+"""
+Strategy registry: which strategy ids exist, their display names, and the
+data_store file behind each.
+
+Strategies come from two places, in this order:
+  1. The manifest (backend/strategies.json, or STRATEGY_MANIFEST), listing
+     ids, names, files and comparison baselines. Its order is the default
+     display order.
+  2. With "discover": true, every other backtest_<Stem>.csv in the
+     data_store, registered as id <stem> (snake-cased) with a name derived
+     from the stem. Publishing a model variant then only needs dropping
+     its CSV in.
+
+Discovery is one scandir and parses nothing. Each strategy's returns are
+loaded on first use through the returns store, so registering hundreds of
+strategies costs nothing until they are requested.
+
+`names` and `files` are read-only views of the current (names, files)
+snapshot. A refresh builds a new snapshot and publishes it with one
+reference swap, so modules that imported STRATEGY_NAMES / STRATEGY_FILES
+see the change, and nobody iterating them ever sees a half-applied one.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+_DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "strategies.json")
+STRATEGY_MANIFEST = os.getenv("STRATEGY_MANIFEST", _DEFAULT_MANIFEST)
+# Minimum seconds between manifest/listing checks; refresh() is called per request
+REFRESH_INTERVAL = float(os.getenv("STRATEGY_REFRESH_SECONDS", "2"))
+
+_BACKTEST_FILE = re.compile(r"^backtest_(.+)\.csv$")
+
+
+def _snake(stem: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", stem.lower()).strip("_")
+
+
+def _title(stem: str) -> str:
+    return re.sub(r"[_\s]+", " ", stem).strip()
+
+
+def load_manifest(path: str = STRATEGY_MANIFEST) -> dict:
+    """Parsed manifest, or an empty discovery-only manifest if the file is absent."""
+    if not os.path.exists(path):
+        return {"strategies": [], "discover": True}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _SnapshotView(Mapping):
+    """Read-only mapping over one half of the registry's current snapshot."""
+
+    __slots__ = ("_registry", "_part")
+
+    def __init__(self, registry, part: int):
+        self._registry = registry
+        self._part = part
+
+    def _data(self) -> dict:
+        return self._registry.snapshot()[self._part]
+
+    def __getitem__(self, key):
+        return self._data()[key]
+
+    def __iter__(self):
+        return iter(self._data())
+
+    def __len__(self):
+        return len(self._data())
+
+    def __contains__(self, key):
+        return key in self._data()
+
+    def __repr__(self):
+        return repr(self._data())
+
+
+class StrategyRegistry:
+    def __init__(self, data_store: str, manifest_path: str = STRATEGY_MANIFEST,
+                 min_interval: float = REFRESH_INTERVAL):
+        self.data_store = data_store
+        self.manifest_path = manifest_path
+        self.min_interval = min_interval
+        self._snapshot = ({}, {})
+        self.names = _SnapshotView(self, 0)
+        self.files = _SnapshotView(self, 1)
+        self.generation = 0      # bumped every time a refresh publishes a change
+        self._version = None
+        self._signature = None
+        self._checked = None     # monotonic time of the last check
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """
+        The current (names, files) dicts. They are never mutated, so reading
+        both from one snapshot is consistent across a concurrent refresh.
+        """
+        return self._snapshot
+
+    def _listing(self):
+        try:
+            with os.scandir(self.data_store) as it:
+                return sorted(e.name for e in it if e.is_file() and _BACKTEST_FILE.match(e.name))
+        except FileNotFoundError:
+            return []
+
+    def _manifest_version(self):
+        try:
+            st = os.stat(self.manifest_path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def build(self, listing=None):
+        """(names, files) as the manifest plus discovery define them right now."""
+        manifest = load_manifest(self.manifest_path)
+        default_baseline = manifest.get("default_baseline")
+        names, files = {}, {}
+        for spec in manifest.get("strategies", []):
+            sid = spec["id"]
+            names[sid] = spec.get("name", sid)
+            files[sid] = (spec["file"], spec.get("baseline") or default_baseline or spec["file"])
+
+        if manifest.get("discover", True):
+            claimed = {f for f, _ in files.values()}
+            for filename in self._listing() if listing is None else listing:
+                if filename in claimed:
+                    continue
+                stem = _BACKTEST_FILE.match(filename).group(1)
+                sid = _snake(stem)
+                if sid in names:
+                    continue
+                names[sid] = _title(stem)
+                files[sid] = (filename, default_baseline or filename)
+        return names, files
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-reads the manifest and the data_store listing, at most once per
+        `min_interval` seconds unless forced. When either changed, new dicts
+        are built and swapped in as a whole. Returns True on change.
+        """
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.min_interval:
+            return False
+        listing = self._listing()
+        signature = (self._manifest_version(), tuple(listing))
+        with self._lock:
+            self._checked = now
+            if not force and signature == self._signature:
+                return False
+            names, files = self.build(listing)
+            changed = (names, files) != self._snapshot or list(names) != list(self._snapshot[0])
+            if changed:
+                self._snapshot = (names, files)
+                self._version = hashlib.sha1(repr((list(names.items()), list(files.items()))).encode()).hexdigest()[:12]
+                self.generation += 1
+            self._signature = signature
+            return changed
+
+    def version(self):
+        """Digest of the registered strategies, the same in every worker; part of the HTTP cache version."""
+        return self._version
+
+    def stats(self) -> dict:
+        return {"strategies": len(self.names), "generation": self.generation, "manifest": self.manifest_path}
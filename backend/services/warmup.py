@@ -0,0 +1,144 @@
+"""
+Startup warmup for the API process.
+
+main.py's lifespan hook runs `run_warmup` in the background: it imports the
+analytics stack, loads and validates every data_store file the strategies
+and the factor model depend on, then builds the caches the first requests
+would otherwise pay for (metrics snapshot, equity curves, prefix indices,
+the aligned panel, attribution and regimes). Every stage is timed.
+
+This module imports nothing heavy at import time, so the liveness check can
+answer while pandas and the data are still loading. `/ready` reports
+WARMUP.snapshot() and only returns 200 once the warmup has finished.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class WarmupState:
+    """Progress of the warmup: status, per-stage timings and data problems found."""
+
+    def __init__(self):
+        self.status = "pending"     # pending -> running -> ready | degraded | failed
+        self.stages = {}            # stage -> milliseconds
+        self.problems = []
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "degraded")
+
+    @contextmanager
+    def stage(self, name: str, required: bool = False):
+        """
+        Times a stage. Failures of optional stages are recorded as problems
+        and warmup carries on. The request path then builds that cache
+        lazily, as it always could.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as exc:
+            with self._lock:
+                self.problems.append(f"{name}: {type(exc).__name__}: {exc}")
+            if required:
+                raise
+        finally:
+            with self._lock:
+                self.stages[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def problem(self, message: str):
+        with self._lock:
+            self.problems.append(message)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = None
+            if self.started is not None:
+                elapsed = round(((self.finished or time.time()) - self.started) * 1000, 1)
+            return {
+                "status": self.status,
+                "ready": self.ready,
+                "elapsed_ms": elapsed,
+                "stages_ms": dict(self.stages),
+                "problems": list(self.problems),
+            }
+
+
+WARMUP = WarmupState()
+
+
+def validate_data_store(state: WarmupState = WARMUP):
+    """Loads every file referenced by STRATEGY_FILES and checks it is usable."""
+    import numpy as np
+    from services.data_loader import STRATEGY_FILES, RETURNS_STORE
+
+    for filename in sorted({f for files in STRATEGY_FILES.values() for f in files}):
+        entry = RETURNS_STORE.get(filename)
+        if entry is None:
+            state.problem(f"{filename}: missing")
+            continue
+        if len(entry.dates) == 0:
+            state.problem(f"{filename}: no rows")
+            continue
+        bad = int((~np.isfinite(entry.values)).sum())
+        if bad:
+            state.problem(f"{filename}: {bad} non-finite values")
+        if len(entry.dates) > 1 and not (entry.dates[1:] > entry.dates[:-1]).all():
+            state.problem(f"{filename}: dates not strictly increasing")
+
+
+def run_warmup(state: WarmupState = WARMUP, mount=None):
+    """
+    Blocking; main.py runs it on a worker thread. `mount` imports and
+    includes the API routers and is the first stage. If it fails, warmup
+    ends in "failed" and the instance never reports ready.
+    """
+    with state._lock:
+        state.status = "running"
+        state.started = time.time()
+
+    try:
+        with state.stage("import", required=True):
+            if mount is not None:
+                mount()
+            from services import data_loader, panel, regimes
+    except Exception:
+        with state._lock:
+            state.finished = time.time()
+            state.status = "failed"
+        return
+
+    with state.stage("validate_data_store"):
+        validate_data_store(state)
+
+    with state.stage("factor_cache"):
+        from services.factor_refresh import FACTOR_REFRESHER
+        FACTOR_REFRESHER.start()
+        if data_loader._get_factor_design() is None:
+            state.problem("factor cache unavailable; attribution and SPY overlays are disabled until the background refresh lands")
+
+    with state.stage("metrics_snapshot"):
+        data_loader.METRICS_SNAPSHOT.table()
+
+    with state.stage("equity_curves"):
+        for strategy_id, files in data_loader.STRATEGY_FILES.items():
+            data_loader._get_equity_curve(files[0])
+            data_loader.get_prefix_index(strategy_id)
+            data_loader.get_monthly_return_pool(strategy_id)
+
+    with state.stage("returns_panel"):
+        panel.get_returns_panel()
+
+    with state.stage("attribution"):
+        data_loader.compute_factor_attribution_batch()
+
+    with state.stage("regimes"):
+        regimes.get_regime_matrix()
+
+    with state._lock:
+        state.finished = time.time()
+        state.status = "degraded" if state.problems else "ready"
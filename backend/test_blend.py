@@ -0,0 +1,102 @@
+"""
+Blend optimizers: long-only, fully invested weights and their optimality
+conditions, plus the pairwise moment estimator.
+
+    cd backend && python -m pytest test_blend.py
+"""
+import numpy as np
+import pytest
+from services.blend import _long_only, _risk_parity, _pairwise_moments
+from services.panel import TRADING_DAYS
+
+
+def _random_cov(k, seed):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, 0.01, (500, k)) @ rng.normal(0.0, 1.0, (k, k)) + rng.normal(0.0, 0.005, (500, k))
+    return np.cov(returns, rowvar=False) * TRADING_DAYS
+
+
+def _assert_feasible(w):
+    assert (w >= 0).all()
+    assert w.sum() == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_risk_parity_equalizes_risk_contributions(seed):
+    cov = _random_cov(8, seed)
+    w = _risk_parity(cov)
+    _assert_feasible(w)
+    contributions = w * (cov @ w)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+
+
+def _assert_kkt(cov, target, w):
+    """
+    KKT conditions of min ½ y'Σy s.t. target'y = 1, y >= 0 at y = w / target'w:
+    (Σy)_i - ν target_i is 0 on held assets and >= 0 on excluded ones.
+    """
+    y = w / (target @ w)
+    grad = cov @ y
+    multipliers = grad - (y @ grad) * target
+    tol = 1e-8 * np.abs(grad).max()
+    held = w > 1e-10
+    np.testing.assert_allclose(multipliers[held], 0.0, atol=tol)
+    assert (multipliers[~held] >= -tol).all(), multipliers[~held]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_min_variance_is_long_only_optimum(seed):
+    cov = _random_cov(7, seed)
+    w = _long_only(cov, np.ones(7))
+    _assert_feasible(w)
+    _assert_kkt(cov, np.ones(7), w)
+    # No random long-only portfolio has lower variance
+    candidates = np.random.default_rng(seed).dirichlet(np.ones(7), 5000)
+    assert w @ cov @ w <= np.einsum("ni,ij,nj->n", candidates, cov, candidates).min() + 1e-12
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_max_sharpe_is_long_only_optimum(seed):
+    cov = _random_cov(7, seed)
+    excess = np.random.default_rng(seed + 100).normal(0.05, 0.08, 7)
+    w = _long_only(cov, excess)
+    _assert_feasible(w)
+    if excess.max() <= 0:
+        return
+    _assert_kkt(cov, excess, w)
+    candidates = np.random.default_rng(seed).dirichlet(np.ones(7), 5000)
+    sharpe = (candidates @ excess) / np.sqrt(np.einsum("ni,ij,nj->n", candidates, cov, candidates))
+    assert (w @ excess) / np.sqrt(w @ cov @ w) >= sharpe.max() - 1e-9
+
+
+def test_excluded_assets_can_reenter():
+    # Dropping every negative weight once and never re-admitting an asset
+    # violates KKT on about a fifth of these problems.
+    for seed in range(200):
+        cov = _random_cov(7, 1000 + seed)
+        _assert_kkt(cov, np.ones(7), _long_only(cov, np.ones(7)))
+
+
+def test_long_only_without_positive_excess_stays_feasible():
+    cov = _random_cov(4, 9)
+    _assert_feasible(_long_only(cov, np.array([-0.02, -0.01, -0.03, -0.05])))
+
+
+def test_pairwise_moments_match_sample_moments_without_gaps():
+    rng = np.random.default_rng(1)
+    log_returns = rng.normal(0.0003, 0.01, (400, 4))
+    mu, cov = _pairwise_moments(log_returns)
+    simple = np.expm1(log_returns)
+    np.testing.assert_allclose(mu, simple.mean(axis=0) * TRADING_DAYS)
+    np.testing.assert_allclose(cov, np.cov(simple, rowvar=False) * TRADING_DAYS, rtol=1e-8, atol=1e-14)
+
+
+def test_pairwise_moments_use_each_series_history():
+    rng = np.random.default_rng(2)
+    log_returns = rng.normal(0.0003, 0.01, (400, 3))
+    log_returns[:300, 2] = np.nan          # a short history
+    mu, cov = _pairwise_moments(log_returns)
+    simple = np.expm1(log_returns[:, :2])
+    np.testing.assert_allclose(mu[:2], simple.mean(axis=0) * TRADING_DAYS)
+    np.testing.assert_allclose(cov[:2, :2], np.cov(simple, rowvar=False) * TRADING_DAYS, rtol=1e-6)
+    assert (np.linalg.eigvalsh(cov) > 0).all()
@@ -0,0 +1,64 @@
+"""
+The columnar copy must be interchangeable with the CSV it was built from.
+
+    cd backend && python -m pytest test_columnar_store.py
+"""
+import numpy as np
+import pandas as pd
+from services.columnar_store import convert_csv, open_columnar, write_columnar
+from services.returns_store import ReturnsStore
+
+FILENAME = "backtest_Test.csv"
+
+
+def _write_csv(root, columns=("Return", "Cumulative_Return"), n=250):
+    rng = np.random.default_rng(8)
+    returns = rng.normal(0.0005, 0.01, n)
+    data = {"Return": returns, "Cumulative_Return": np.cumprod(1 + returns), "0": returns}
+    frame = pd.DataFrame({c: data[c] for c in columns},
+                         index=pd.DatetimeIndex(pd.bdate_range("2016-01-01", periods=n), name="Date"))
+    frame.to_csv(root / FILENAME)
+    return frame
+
+
+def _signature(root):
+    st = (root / FILENAME).stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def test_round_trip_matches_csv_parse(tmp_path):
+    for columns in (("Return", "Cumulative_Return"), ("0",)):
+        _write_csv(tmp_path, columns)
+        parsed = ReturnsStore._parse(str(tmp_path / FILENAME), _signature(tmp_path))
+        convert_csv(str(tmp_path), FILENAME)
+
+        mapped = open_columnar(str(tmp_path), FILENAME, _signature(tmp_path))
+        assert mapped is not None
+        dates, names, values = mapped
+        assert names == parsed.columns == columns
+        np.testing.assert_array_equal(dates, parsed.dates)
+        np.testing.assert_array_equal(values, parsed.values)
+
+
+def test_copy_with_other_columns_is_refused(tmp_path):
+    frame = _write_csv(tmp_path)
+    # A copy that dropped Cumulative_Return, as the first format version did
+    write_columnar(str(tmp_path), FILENAME, frame.index.values, ["Return"],
+                   frame[["Return"]].to_numpy(), _signature(tmp_path))
+    assert open_columnar(str(tmp_path), FILENAME, _signature(tmp_path)) is None
+
+
+def test_append_after_mapped_load_keeps_csv_width(tmp_path):
+    frame = _write_csv(tmp_path)
+    convert_csv(str(tmp_path), FILENAME)
+    store = ReturnsStore(str(tmp_path))
+    assert store.get(FILENAME).columns == ("Return", "Cumulative_Return")
+
+    day = (frame.index[-1] + pd.offsets.BDay(1)).to_datetime64()
+    store.append(FILENAME, np.array([day]), np.array([[0.01, 1.5]]))
+
+    last_line = (tmp_path / FILENAME).read_text().splitlines()[-1]
+    assert last_line.count(",") == 2
+    reparsed = pd.read_csv(tmp_path / FILENAME, index_col=0, parse_dates=True)
+    assert list(reparsed.columns) == ["Return", "Cumulative_Return"]
+    assert reparsed.iloc[-1].tolist() == [0.01, 1.5]
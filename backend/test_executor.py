@@ -0,0 +1,78 @@
+"""
+Executor admission control: a route runs at most N calls with Q waiting,
+rejects the rest with ExecutorSaturated, and main.py answers those with a
+retryable 503.
+
+    cd backend && python -m pytest test_executor.py
+"""
+import asyncio
+import json
+import threading
+import pytest
+from services import executor
+from services.executor import ExecutorSaturated, run_blocking
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(executor, "_limiters", {})
+    monkeypatch.setitem(executor.ROUTE_LIMITS, "saturation_test", (1, 1))
+
+
+def test_calls_beyond_slots_and_queue_are_rejected(limits):
+    release = threading.Event()
+
+    def work(x):
+        release.wait(5)
+        return x * 2
+
+    async def scenario():
+        running = asyncio.create_task(run_blocking("saturation_test", work, 1))
+        queued = asyncio.create_task(run_blocking("saturation_test", work, 2))
+        await asyncio.sleep(0.05)
+        stats = executor.executor_stats()["routes"]["saturation_test"]
+        assert (stats["active"], stats["waiting"]) == (1, 1)
+
+        with pytest.raises(ExecutorSaturated) as exc:
+            await run_blocking("saturation_test", work, 3)
+        assert exc.value.route == "saturation_test"
+
+        release.set()
+        assert await asyncio.gather(running, queued) == [2, 4]
+        # Freed slots admit new calls again
+        assert await run_blocking("saturation_test", work, 5) == 10
+
+    asyncio.run(scenario())
+    stats = executor.executor_stats()["routes"]["saturation_test"]
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+    assert (stats["active"], stats["waiting"]) == (0, 0)
+
+
+def test_failed_call_frees_its_slot(limits):
+    def boom():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                await run_blocking("saturation_test", boom)
+
+    asyncio.run(scenario())
+    assert executor.executor_stats()["routes"]["saturation_test"]["active"] == 0
+
+
+def test_saturation_maps_to_retryable_503():
+    import main
+    response = asyncio.run(main.executor_saturated(None, ExecutorSaturated("simulate")))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert json.loads(response.body) == {"error": "Server busy, please retry", "route": "simulate"}
+
+
+def test_route_limit_overrides():
+    limits = executor._parse_route_limits("simulate=1/0, blend=8/32, bad, other=x/1")
+    assert limits["simulate"] == (1, 0)
+    assert limits["blend"] == (8, 32)
+    assert limits["equity_curve"] == executor.DEFAULT_ROUTE_LIMITS["equity_curve"]
+    assert "other" not in limits
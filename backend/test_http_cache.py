@@ -0,0 +1,89 @@
+"""
+HTTPCacheMiddleware: 304s and cached bodies without running the handler,
+per-encoding ETags, and the body cache's byte bound.
+
+    cd backend && python -m pytest test_http_cache.py
+"""
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from api.http_cache import HTTPCacheMiddleware
+
+PREFIX = "/api/v1/backtest"
+
+
+def _client(version, calls, **options):
+    app = FastAPI()
+
+    @app.get(PREFIX + "/rows")
+    def rows(n: int = 10):
+        calls.append(n)
+        return {"rows": list(range(n))}
+
+    @app.get(PREFIX + "/missing")
+    def missing():
+        calls.append("missing")
+        return JSONResponse({"error": "unknown"}, status_code=404)
+
+    cache = HTTPCacheMiddleware(app, prefix=PREFIX, version_fn=lambda: version["v"], **options)
+    return TestClient(cache), cache
+
+
+def test_if_none_match_skips_handler():
+    version, calls = {"v": "1"}, []
+    client, _ = _client(version, calls)
+    first = client.get(PREFIX + "/rows", headers={"accept-encoding": "identity"})
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and calls == [10]
+
+    again = client.get(PREFIX + "/rows", headers={"if-none-match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert calls == [10]
+
+    # New data, new ETag: the stale validator no longer matches
+    version["v"] = "2"
+    fresh = client.get(PREFIX + "/rows", headers={"if-none-match": etag, "accept-encoding": "identity"})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert calls == [10, 10]
+
+
+def test_repeat_is_served_from_body_cache():
+    calls = []
+    client, _ = _client({"v": "1"}, calls)
+    gz = client.get(PREFIX + "/rows?n=500", headers={"accept-encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["etag"].endswith('-gzip"')
+    assert client.get(PREFIX + "/rows?n=500", headers={"accept-encoding": "gzip"}).json() == gz.json()
+    assert calls == [500]
+
+    plain = client.get(PREFIX + "/rows?n=500", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == gz.json() and plain.headers["etag"] != gz.headers["etag"]
+    assert calls == [500, 500]
+
+
+def test_errors_are_not_cached():
+    calls = []
+    client, _ = _client({"v": "1"}, calls)
+    assert client.get(PREFIX + "/missing").status_code == 404
+    assert client.get(PREFIX + "/missing").status_code == 404
+    assert calls == ["missing", "missing"]
+
+
+def test_body_cache_is_byte_bounded():
+    calls = []
+    client, cache = _client({"v": "1"}, calls, cache_bytes=4000, max_cached_body=3000)
+    headers = {"accept-encoding": "identity"}
+    big = client.get(PREFIX + "/rows?n=1000", headers=headers)
+    assert len(big.content) > 3000
+    client.get(PREFIX + "/rows?n=1000", headers=headers)
+    assert calls == [1000, 1000]         # over max_cached_body: never kept
+
+    for n in (400, 401, 402):            # ~1.5 KB each, two fit
+        client.get(PREFIX + f"/rows?n={n}", headers=headers)
+    assert cache.stats()["bytes"] <= 4000
+    assert cache.stats()["size"] == 2
+    client.get(PREFIX + "/rows?n=402", headers=headers)
+    client.get(PREFIX + "/rows?n=400", headers=headers)
+    # The oldest body made room; the newest is still cached
+    assert calls[-4:] == [400, 401, 402, 400]
@@ -0,0 +1,61 @@
+"""
+Request latency labels: the full route template, also for responses that
+never reach the router.
+
+    cd backend && python -m pytest test_instrumentation.py
+"""
+import asyncio
+from fastapi import APIRouter
+from services import instrumentation
+from services.instrumentation import InstrumentationMiddleware, REQUEST_SECONDS, register_routes
+
+router = APIRouter()
+
+
+@router.get("/equity-curve/{strategy_id}")
+async def _equity_curve(strategy_id: str):
+    pass
+
+
+@router.get("/metrics")
+async def _metrics():
+    pass
+
+
+async def _not_modified(scope, receive, send):
+    # Answers before routing, as the HTTP cache does on a 304
+    await send({"type": "http.response.start", "status": 304, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _count(route, status):
+    with REQUEST_SECONDS._lock:
+        # Each series is [bucket counts..., +Inf count, sum]
+        return sum(sum(series[:-1]) for (r, _, s), series in REQUEST_SECONDS._series.items()
+                   if r == route and s == status)
+
+
+def _request(path):
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b""}
+    asyncio.run(InstrumentationMiddleware(_not_modified, profiling=False)(scope, receive, send))
+
+
+def test_short_circuited_response_keeps_route_template(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_ROUTE_TEMPLATES", [])
+    register_routes("/api/v1/backtest", router.routes)
+    template = "/api/v1/backtest/equity-curve/{strategy_id}"
+    before = _count(template, 304)
+    _request("/api/v1/backtest/equity-curve/mag7_momentum")
+    _request("/api/v1/backtest/equity-curve/dynamic_alpha")
+    assert _count(template, 304) == before + 2
+
+    before = _count("unmatched", 304)
+    _request("/api/v1/backtest/nowhere")
+    assert _count("unmatched", 304) == before + 1
+    instrumentation._match_route.cache_clear()
@@ -0,0 +1,89 @@
+"""
+Live appends: rows written through append_strategy_returns must read back
+exactly as a fresh parse of the CSV, with derived columns continued and
+the headline metrics equal to a from-scratch computation.
+
+    cd backend && python -m pytest test_live_updater.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from services import data_loader, live_updater
+from services.metrics_snapshot import MetricsSnapshot
+from services.returns_store import ReturnsStore
+from services.strategy_registry import StrategyRegistry
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    rng = np.random.default_rng(21)
+    for stem, columns in (("Two_Col", ("Return", "Cumulative_Return")), ("One_Col", ("0",)),
+                          ("Other", ("Return", "Turnover"))):
+        returns = rng.normal(0.0004, 0.01, 400)
+        data = {"Return": returns, "0": returns, "Cumulative_Return": np.cumprod(1 + returns),
+                "Turnover": np.full(400, 0.1)}
+        frame = pd.DataFrame({c: data[c] for c in columns},
+                             index=pd.DatetimeIndex(pd.bdate_range("2020-01-01", periods=400), name="Date"))
+        frame.to_csv(tmp_path / f"backtest_{stem}.csv")
+
+    registry = StrategyRegistry(str(tmp_path), str(tmp_path / "strategies.json"), min_interval=0.0)
+    registry.refresh()
+    returns_store = ReturnsStore(str(tmp_path))
+    monkeypatch.setattr(data_loader, "STRATEGY_REGISTRY", registry)
+    monkeypatch.setattr(data_loader, "STRATEGY_FILES", registry.files)
+    monkeypatch.setattr(data_loader, "RETURNS_STORE", returns_store)
+    snapshot = MetricsSnapshot(data_loader._metrics_sources, returns_store.version, data_loader._compute_metrics_row)
+    monkeypatch.setattr(live_updater, "STRATEGY_FILES", registry.files)
+    monkeypatch.setattr(live_updater, "RETURNS_STORE", returns_store)
+    monkeypatch.setattr(live_updater, "METRICS_SNAPSHOT", snapshot)
+    snapshot.table()
+    return returns_store
+
+
+def _next_days(store, filename, n):
+    last = pd.Timestamp(store.get(filename).dates[-1])
+    return [d.date() for d in pd.bdate_range(last + pd.Timedelta(days=1), periods=n)]
+
+
+def test_append_continues_derived_columns(store):
+    filename = "backtest_Two_Col.csv"
+    before = store.get(filename)
+    rows = list(zip(_next_days(store, filename, 3), [0.01, -0.02, 0.005]))
+    row = live_updater.append_strategy_returns("two_col", rows)
+
+    after = store.get(filename)
+    fresh = ReturnsStore(store.root).get(filename)
+    assert after.lineage == before.lineage
+    np.testing.assert_array_equal(after.dates, fresh.dates)
+    np.testing.assert_array_equal(after.values, fresh.values)
+    expected = before.values[-1, 1] * np.cumprod(1.0 + np.array([0.01, -0.02, 0.005]))
+    np.testing.assert_allclose(after.values[-3:, 1], expected, rtol=1e-15)
+
+    # The incrementally folded metrics match a computation from scratch
+    scratch, _ = data_loader._compute_metrics_row("two_col", row["name"])
+    assert row == pytest.approx(scratch)
+
+
+def test_single_column_append(store):
+    filename = "backtest_One_Col.csv"
+    rows = list(zip(_next_days(store, filename, 2), [0.003, 0.004]))
+    live_updater.append_strategy_returns("one_col", rows)
+    reparsed = pd.read_csv(store._path(filename), index_col=0)
+    assert list(reparsed.columns) == ["0"]
+    assert reparsed.iloc[-2:, 0].tolist() == [0.003, 0.004]
+
+
+def test_underivable_column_is_refused(store):
+    filename = "backtest_Other.csv"
+    size = store.version(filename)[1]
+    with pytest.raises(ValueError, match="Turnover"):
+        live_updater.append_strategy_returns("other", [(_next_days(store, filename, 1)[0], 0.01)])
+    assert store.version(filename)[1] == size
+
+
+def test_live_job_skips_rows_on_disk_and_unknown_ids(store):
+    filename = "backtest_One_Col.csv"
+    last = pd.Timestamp(store.get(filename).dates[-1]).date()
+    n = len(store.get(filename).dates)
+    assert live_updater.run_live_update_job({"one_col": [(last, 0.5)], "nope": [(last, 0.1)]}) == {}
+    assert len(store.get(filename).dates) == n
@@ -0,0 +1,105 @@
+"""
+Simulation building blocks: stationary bootstrap indices and the
+log-bucket quantile sketch.
+
+    cd backend && python -m pytest test_monte_carlo.py
+"""
+import numpy as np
+import pytest
+from services.monte_carlo import stationary_bootstrap_indices
+from services.quantile_sketch import LogBucketSketch
+
+
+def _draw(pool_size, paths, months, mean_block, chunks, seed=11):
+    next_indices = stationary_bootstrap_indices(np.random.default_rng(seed), pool_size, paths, mean_block)
+    bounds = [0, *chunks, months]
+    return np.concatenate([next_indices(a, b) for a, b in zip(bounds[:-1], bounds[1:])])
+
+
+@pytest.mark.parametrize("mean_block", [1.0, 6.0, 24.0])
+def test_bootstrap_indices_stay_in_pool(mean_block):
+    idx = _draw(pool_size=97, paths=2000, months=240, mean_block=mean_block, chunks=[13, 100])
+    assert idx.shape == (240, 2000)
+    assert idx.dtype == np.int64
+    assert idx.min() >= 0 and idx.max() < 97
+
+
+@pytest.mark.parametrize("mean_block", [3.0, 6.0, 12.0])
+def test_bootstrap_expected_block_length(mean_block):
+    pool_size = 500
+    # Chunk boundaries must not break blocks: anchors carry across calls
+    idx = _draw(pool_size, paths=20000, months=120, mean_block=mean_block, chunks=[7, 30, 61])
+    continued = idx[1:] == (idx[:-1] + 1) % pool_size
+    # A block restarts with probability 1/b, so blocks average b months; a
+    # restart lands on the next index by chance with probability 1/N
+    p_break = (1.0 / mean_block) * (1.0 - 1.0 / pool_size)
+    assert 1.0 - continued.mean() == pytest.approx(p_break, rel=0.03)
+
+
+def test_bootstrap_without_blocks_is_uniform():
+    idx = _draw(pool_size=10, paths=50000, months=4, mean_block=1.0, chunks=[])
+    counts = np.bincount(idx.ravel(), minlength=10) / idx.size
+    np.testing.assert_allclose(counts, 0.1, atol=0.005)
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.005])
+def test_sketch_quantiles_within_relative_accuracy(accuracy):
+    rng = np.random.default_rng(5)
+    columns = 6
+    samples = rng.lognormal(mean=np.linspace(8, 14, columns)[:, None], sigma=0.8, size=(columns, 30000))
+
+    sketch = LogBucketSketch(columns, relative_accuracy=accuracy)
+    other = LogBucketSketch(columns, relative_accuracy=accuracy)
+    sketch.add(0, samples[:, :10000])
+    sketch.add(2, samples[2:, 10000:20000])
+    sketch.add(0, samples[:2, 10000:20000])
+    other.add(0, samples[:, 20000:])
+    sketch.merge(other)
+
+    qs = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+    estimate = sketch.quantiles(qs)
+    exact = np.quantile(samples, qs, axis=1, method="lower")
+    np.testing.assert_array_less(np.abs(estimate - exact) / exact, accuracy + 1e-9)
+
+
+def test_sketch_handles_non_positive_and_empty_columns():
+    sketch = LogBucketSketch(3)
+    sketch.add(0, np.array([[-5.0, 0.0, 0.0, 0.0, 100.0]]))
+    q = sketch.quantiles([0.5, 1.0])
+    assert q[0, 0] == 0.0
+    assert q[1, 0] == pytest.approx(100.0, rel=0.005)
+    assert np.isnan(q[:, 1:]).all()
+
+
+def test_bootstrap_requests_do_not_need_or_key_on_gbm_parameters():
+    from pydantic import ValidationError
+    from api.routes_simulation import SimulationRequest, _cache_key
+    base = {"initial_investment": 10000, "monthly_contribution": 500}
+    with pytest.raises(ValidationError):
+        SimulationRequest(**base)
+
+    bare = SimulationRequest(**base, mode="bootstrap", strategy_id="dynamic_alpha")
+    slider = SimulationRequest(**base, mode="bootstrap", strategy_id="dynamic_alpha", cagr=12.3, volatility=18.0)
+    assert _cache_key(bare) == _cache_key(slider)
+    gbm = [_cache_key(SimulationRequest(**base, cagr=c, volatility=18.0)) for c in (12.3, 12.4)]
+    assert gbm[0] != gbm[1]
+
+
+def test_seeded_gbm_matches_loop_over_time_major_draws():
+    from services.monte_carlo import gbm_quantile_bands
+    initial, contribution, cagr, vol, years, n = 10000.0, 250.0, 9.0, 16.0, 3, 4000
+    months = years * 12
+    shocks = np.random.default_rng(42).standard_normal((months, n))
+    dt = 1 / 12.0
+    growth = np.exp((cagr / 100 - 0.5 * (vol / 100) ** 2) * dt + vol / 100 * np.sqrt(dt) * shocks)
+    paths = np.empty((months + 1, n))
+    paths[0] = initial
+    for m in range(1, months + 1):
+        paths[m] = (paths[m - 1] + contribution) * growth[m - 1]
+    expected = np.quantile(paths, (0.10, 0.50, 0.90), axis=1)
+
+    bands = [gbm_quantile_bands(initial, contribution, cagr, vol, years, num_simulations=n, seed=42,
+                                max_bytes=max_bytes) for max_bytes in (1, 10 * 4 * n * 8, 1 << 30)]
+    np.testing.assert_allclose(bands[0], expected, rtol=1e-12)
+    for other in bands[1:]:
+        np.testing.assert_array_equal(other, bands[0])
@@ -0,0 +1,86 @@
+"""
+Prefix-sum windows must agree with the direct pandas computation they
+replaced (routes_backtest.calculate_trailing_stats) on every window.
+
+    cd backend && python -m pytest test_prefix_index.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from api.routes_backtest import calculate_trailing_stats
+from services.prefix_index import PrefixIndex, sum_stats
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(13)
+    dates = pd.bdate_range("2014-03-05", "2024-08-20")
+    return pd.Series(rng.normal(0.0004, 0.012, len(dates)), index=dates)
+
+
+def _assert_stats(actual, expected):
+    assert actual["is_annualized"] == expected["is_annualized"]
+    # Both sides round to 2 decimals; sums and pandas may land either side of a tie
+    assert actual["performance_pct"] == pytest.approx(expected["performance_pct"], abs=0.011)
+    assert actual["volatility_pct"] == pytest.approx(expected["volatility_pct"], abs=0.011)
+
+
+@pytest.mark.parametrize("days", [1, 2, 5, 21, 63, 252, 253, 756, 1260, 2520, 100000])
+def test_trailing_matches_direct(series, days):
+    index = PrefixIndex(series.index.values, series.values)
+    _assert_stats(index.trailing(days), calculate_trailing_stats(series.iloc[-days:]))
+
+
+@pytest.mark.parametrize("start,end", [
+    ("2016-01-01", "2016-12-31"), ("2014-01-01", None), (None, "2015-06-30"),
+    ("2019-02-02", "2019-02-03"),           # a weekend: empty window
+    ("2020-03-09", "2023-11-17"),
+])
+def test_between_matches_date_slice(series, start, end):
+    index = PrefixIndex(series.index.values, series.values)
+    _assert_stats(index.between(start, end), calculate_trailing_stats(series.loc[start:end]))
+
+
+def test_calendar_years_are_cumulative(series):
+    index = PrefixIndex(series.index.values, series.values)
+    assert index.years() == list(range(2014, 2025))
+    for year in index.years():
+        window = series.loc[str(year)]
+        stats = index.calendar_year(year)
+        assert stats["is_annualized"] is False
+        assert stats["performance_pct"] == pytest.approx((np.exp(window.sum()) - 1) * 100, abs=0.006)
+    assert index.ytd() == index.calendar_year(2024)
+
+
+def test_bounds_are_inclusive(series):
+    index = PrefixIndex(series.index.values, series.values)
+    i, j = index.bounds("2018-05-01", "2018-05-31")
+    assert str(index.dates[i])[:10] == "2018-05-01"
+    assert str(index.dates[j - 1])[:10] == "2018-05-31"
+    assert index.bounds("2030-01-01", "2031-01-01") == (len(series), len(series))
+
+
+def test_empty_and_single_day():
+    empty = PrefixIndex(np.array([], dtype="datetime64[ns]"), np.array([]))
+    assert empty.years() == []
+    assert empty.ytd() == sum_stats(0.0, 0.0, 0)
+    one = PrefixIndex(np.array(["2024-01-02"], dtype="datetime64[ns]"), np.array([0.01]))
+    assert one.trailing(5) == {"performance_pct": round((np.exp(0.01) - 1) * 100, 2),
+                               "volatility_pct": 0.0, "is_annualized": False}
+
+
+def test_cached_index_follows_appends(tmp_path, monkeypatch, series):
+    from services import data_loader
+    from services.returns_store import ReturnsStore
+    series.iloc[:300].rename("Return").rename_axis("Date").to_frame().to_csv(tmp_path / "backtest_P.csv")
+    store = ReturnsStore(str(tmp_path))
+    monkeypatch.setattr(data_loader, "RETURNS_STORE", store)
+    monkeypatch.setattr(data_loader, "STRATEGY_FILES", {"p": ("backtest_P.csv", "backtest_P.csv")})
+    monkeypatch.setattr(data_loader, "_prefix_cache", {})
+
+    first = data_loader.get_prefix_index("p")
+    assert data_loader.get_prefix_index("p") is first
+    store.append("backtest_P.csv", series.index.values[300:310], series.values[300:310])
+    second = data_loader.get_prefix_index("p")
+    assert len(second) == 310
+    _assert_stats(second.trailing(20), calculate_trailing_stats(series.iloc[290:310]))
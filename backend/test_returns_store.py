@@ -0,0 +1,96 @@
+"""
+ReturnsStore tail appends must leave the cache identical to a full reparse.
+
+    cd backend && python -m pytest test_returns_store.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from services.returns_store import ReturnsStore
+
+FILENAME = "backtest_Test.csv"
+
+
+def _write_history(root, n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-01", periods=n)
+    returns = rng.normal(0.0004, 0.01, n)
+    frame = pd.DataFrame({"Return": returns, "Cumulative_Return": np.cumprod(1 + returns)},
+                         index=pd.DatetimeIndex(dates, name="Date"))
+    frame.to_csv(root / FILENAME)
+    return dates[-1]
+
+
+def _assert_same(entry, reference):
+    assert entry.columns == reference.columns
+    np.testing.assert_array_equal(entry.dates, reference.dates)
+    np.testing.assert_array_equal(entry.values, reference.values)
+
+
+def test_external_append_matches_full_parse(tmp_path):
+    last = _write_history(tmp_path)
+    store = ReturnsStore(str(tmp_path))
+    before = store.get(FILENAME)
+
+    new_dates = pd.bdate_range(last + pd.Timedelta(days=1), periods=5)
+    with open(tmp_path / FILENAME, "a") as f:
+        for i, d in enumerate(new_dates):
+            f.write(f"{d.date()},{0.001 * (i - 2)!r},{1.0 + i / 100!r}\n")
+
+    after = store.get(FILENAME)
+    assert store.stats()["appends"] == 1
+    assert after.lineage == before.lineage
+    assert len(after.dates) == len(before.dates) + 5
+    _assert_same(after, ReturnsStore(str(tmp_path)).get(FILENAME))
+
+
+def test_store_append_matches_full_parse(tmp_path):
+    last = _write_history(tmp_path)
+    store = ReturnsStore(str(tmp_path))
+    store.get(FILENAME)
+
+    new_dates = pd.bdate_range(last + pd.Timedelta(days=1), periods=3).values
+    values = np.array([[0.0123456789, 1.01], [-0.002, np.nan], [1e-9, 0.99]])
+    store.append(FILENAME, new_dates, values)
+
+    _assert_same(store.get(FILENAME), ReturnsStore(str(tmp_path)).get(FILENAME))
+
+
+def test_rewrite_falls_back_to_full_parse(tmp_path):
+    _write_history(tmp_path)
+    store = ReturnsStore(str(tmp_path))
+    before = store.get(FILENAME)
+
+    # Rewriting history (not just appending) must not be treated as a tail append
+    _write_history(tmp_path, n=320, seed=4)
+    after = store.get(FILENAME)
+    assert after.lineage != before.lineage
+    _assert_same(after, ReturnsStore(str(tmp_path)).get(FILENAME))
+
+
+def test_append_rejects_old_dates(tmp_path):
+    last = _write_history(tmp_path)
+    store = ReturnsStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.append(FILENAME, np.array([last.to_datetime64()]), np.array([[0.0, 1.0]]))
+
+
+def test_edit_then_append_falls_back_to_full_parse(tmp_path):
+    last = _write_history(tmp_path)
+    store = ReturnsStore(str(tmp_path))
+    before = store.get(FILENAME)
+
+    # Change one digit well before the tail, keeping the size, then append a row
+    text = (tmp_path / FILENAME).read_text()
+    lines = text.splitlines(keepends=True)
+    date, value, cumulative = lines[10].split(",")
+    digit = "5" if value[4] != "5" else "6"
+    lines[10] = f"{date},{value[:4] + digit + value[5:]},{cumulative}"
+    next_day = (last + pd.offsets.BDay(1)).date()
+    (tmp_path / FILENAME).write_text("".join(lines) + f"{next_day},0.001,1.5\n")
+
+    after = store.get(FILENAME)
+    assert store.stats()["appends"] == 0
+    assert after.lineage != before.lineage
+    assert after.values[9, 0] != before.values[9, 0]
+    _assert_same(after, ReturnsStore(str(tmp_path)).get(FILENAME))
@@ -0,0 +1,77 @@
+"""
+Shared panel plane: one process publishes a panel version, every other
+process attaches to the same read-only files, and a newer version swaps in
+as a new generation.
+
+    cd backend && python -m pytest test_shared_panel.py
+"""
+import multiprocessing
+import numpy as np
+from services.shared_panel import SharedPanelPlane
+
+
+def _panel(seed, rows=50):
+    rng = np.random.default_rng(seed)
+    dates = np.arange("2020-01-01", rows, dtype="datetime64[D]").astype("datetime64[ns]")
+    return dates, ["a", "b", "c"], rng.normal(0.0, 0.01, (rows, 3))
+
+
+def _builder(seed, calls):
+    def build():
+        calls.append(seed)
+        return _panel(seed)
+    return build
+
+
+def test_published_panel_is_attached_elsewhere(tmp_path):
+    calls = []
+    writer, reader = SharedPanelPlane(str(tmp_path)), SharedPanelPlane(str(tmp_path))
+    generation, dates, columns, values = writer.publish("v1", _builder(1, calls))
+    assert generation == 1 and calls == [1]
+
+    # A second worker finds the published version instead of building it
+    assert reader.publish("v1", _builder(1, calls))[0] == 1
+    assert calls == [1]
+    attached = reader.attach("v1")
+    expected = _panel(1)
+    np.testing.assert_array_equal(attached[1], expected[0])
+    assert attached[2] == expected[1]
+    np.testing.assert_array_equal(attached[3], expected[2])
+    assert isinstance(attached[3], np.memmap) and not attached[3].flags.writeable
+    assert reader.attach("other") is None
+
+
+def test_new_version_is_a_new_generation(tmp_path):
+    calls = []
+    writer, reader = SharedPanelPlane(str(tmp_path)), SharedPanelPlane(str(tmp_path))
+    writer.publish("v1", _builder(1, calls))
+    old = reader.attach("v1")
+
+    for generation, key in ((2, "v2"), (3, "v3")):
+        assert writer.publish(key, _builder(generation, calls))[0] == generation
+    assert reader.attach("v1") is not None      # still mapped by this reader
+    assert SharedPanelPlane(str(tmp_path)).attach("v1") is None
+    assert reader.attach("v3")[0] == 3
+    assert reader.stats()["published_generation"] == 3
+    np.testing.assert_array_equal(old[3], _panel(1)[2])
+
+    # Only the previous generation is kept on disk
+    files = sorted(p.name for p in tmp_path.glob("*.npy"))
+    assert files == ["dates.2.npy", "dates.3.npy", "values.2.npy", "values.3.npy"]
+
+
+def _publish_in_process(directory, counter):
+    def build():
+        with open(counter, "a") as f:
+            f.write("built\n")
+        return _panel(7)
+    return SharedPanelPlane(directory).publish("shared", build)[0]
+
+
+def test_concurrent_processes_build_once(tmp_path):
+    counter = tmp_path / "builds.txt"
+    directory = str(tmp_path / "plane")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        generations = pool.starmap(_publish_in_process, [(directory, str(counter))] * 8)
+    assert generations == [1] * 8
+    assert counter.read_text().count("built") == 1
@@ -0,0 +1,109 @@
+"""
+Strategy registry: manifest order, discovery, and refreshes published as
+one snapshot swap.
+
+    cd backend && python -m pytest test_strategy_registry.py
+"""
+import json
+import threading
+from services.metrics_snapshot import MetricsSnapshot
+from services.strategy_registry import StrategyRegistry
+
+
+def _touch(root, *stems):
+    for stem in stems:
+        (root / f"backtest_{stem}.csv").write_text("Date,Return\n")
+
+
+def _registry(tmp_path, manifest=None):
+    path = tmp_path / "strategies.json"
+    if manifest is not None:
+        path.write_text(json.dumps(manifest))
+    return StrategyRegistry(str(tmp_path), str(path), min_interval=0.0)
+
+
+def test_manifest_order_then_discovery(tmp_path):
+    _touch(tmp_path, "Zeta_Model", "Alpha", "SPY")
+    registry = _registry(tmp_path, {
+        "default_baseline": "backtest_SPY.csv",
+        "strategies": [{"id": "spy", "name": "S&P 500", "file": "backtest_SPY.csv"},
+                       {"id": "alpha", "name": "Alpha", "file": "backtest_Alpha.csv"}],
+    })
+    assert registry.refresh()
+    assert list(registry.names) == ["spy", "alpha", "zeta_model"]
+    assert registry.names["zeta_model"] == "Zeta Model"
+    assert registry.files["zeta_model"] == ("backtest_Zeta_Model.csv", "backtest_SPY.csv")
+    # The same strategies give the same version in every process
+    other = _registry(tmp_path)
+    other.refresh()
+    assert other.version() == registry.version()
+
+
+def test_refresh_swaps_snapshot(tmp_path):
+    _touch(tmp_path, "A", "B")
+    registry = _registry(tmp_path)
+    registry.refresh()
+    names, files = registry.snapshot()
+    generation = registry.generation
+    assert not registry.refresh()
+
+    (tmp_path / "backtest_A.csv").unlink()
+    _touch(tmp_path, "C")
+    assert registry.refresh()
+    assert registry.generation == generation + 1
+    # Views follow the new snapshot; the old dicts were never touched
+    assert list(registry.names) == ["b", "c"]
+    assert "a" not in registry.files
+    assert list(names) == ["a", "b"] and list(files) == ["a", "b"]
+
+
+def test_iteration_survives_concurrent_refresh(tmp_path):
+    registry = _registry(tmp_path)
+    stop = threading.Event()
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            _touch(tmp_path, f"S{i % 50}")
+            if i % 3 == 0:
+                (tmp_path / f"backtest_S{(i * 7) % 50}.csv").unlink(missing_ok=True)
+            registry.refresh()
+            i += 1
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for _ in range(2000):
+            for sid in registry.names:
+                pass
+            names, files = registry.snapshot()
+            assert all(files[sid][0] for sid in names)
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_refresh_is_throttled(tmp_path):
+    _touch(tmp_path, "A")
+    registry = StrategyRegistry(str(tmp_path), str(tmp_path / "strategies.json"), min_interval=3600)
+    registry.refresh()
+    _touch(tmp_path, "B")
+    assert not registry.refresh()
+    assert registry.refresh(force=True)
+    assert list(registry.names) == ["a", "b"]
+
+
+def test_metrics_table_reused_per_version():
+    calls = []
+
+    def sources():
+        calls.append(1)
+        return {"a": ("A", "a.csv"), "b": ("B", "b.csv")}
+
+    snapshot = MetricsSnapshot(sources, lambda f: 1, lambda sid, name, state: ({"name": name}, None))
+    etag, rows = snapshot.table(version=(1, "x"))
+    assert snapshot.table(version=(1, "x")) == (etag, rows)
+    assert snapshot.page("name", True, 0, 1, version=(1, "x"))[2] == [("b", {"name": "B"})]
+    assert len(calls) == 1
+    snapshot.table(version=(2, "x"))
+    assert len(calls) == 2
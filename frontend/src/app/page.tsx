@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { API_URL } from '../lib/api';
+import { fetchAllMetrics } from '../lib/api';
 import StrategyCard from '../components/StrategyCard';
 import PerformanceTable from '../components/PerformanceTable';
 import ProjectionCalc from '../components/ProjectionCalc';
@@ -51,8 +51,7 @@ export default function Home() {
     const [chartPeriod, setChartPeriod] = useState<Period>('10y');
 
     useEffect(() => {
-        fetch(`${API_URL}/api/v1/backtest/metrics`)
-            .then(r => r.json())
+        fetchAllMetrics()
             .then(setMetrics)
             .catch(() => console.error('Failed to load metrics'));
     }, []);
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect, useMemo } from 'react';
 import { motion } from 'framer-motion';
-import { API_URL } from '../lib/api';
+import { fetchStrategyDetail } from '../lib/api';
 import {
     LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip,
     ResponsiveContainer, Legend
@@ -43,22 +43,14 @@ export default function ChartInteractive({
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        const fetchCurve = async () => {
-            try {
-                setLoading(true);
-                const response = await fetch(
-                    `${API_URL}/api/v1/backtest/equity-curve/${strategyId}`
-                );
-                const result = await response.json();
-                setAllData(result.timeseries || []);
-                setMetrics(result.metrics || null);
-            } catch (error) {
-                console.error('Failed to fetch equity curve:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchCurve();
+        setLoading(true);
+        fetchStrategyDetail(strategyId)
+            .then(data => {
+                setAllData(data.curve?.timeseries || []);
+                setMetrics(data.curve?.metrics || null);
+            })
+            .catch(error => console.error('Failed to fetch equity curve:', error))
+            .finally(() => setLoading(false));
     }, [strategyId]);
 
     // Slice data to selected period and rebase to 0% at period start
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
-import { API_URL } from '../lib/api';
+import { fetchStrategyDetail } from '../lib/api';
 
 interface PerformanceStat {
     period: string;
@@ -21,21 +21,11 @@ export default function PerformanceTable({ strategyId = 'sector_rotation' }) {
     const [showShort, setShowShort] = useState(false);
 
     useEffect(() => {
-        const fetchPerformance = async () => {
-            try {
-                setLoading(true);
-                const response = await fetch(
-                    `${API_URL}/api/v1/backtest/strategy/${strategyId}/performance`
-                );
-                const data = await response.json();
-                setPerformanceData(data.performance_analysis || []);
-            } catch (error) {
-                console.error('Failed to fetch performance stats:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchPerformance();
+        setLoading(true);
+        fetchStrategyDetail(strategyId)
+            .then(data => setPerformanceData(data.performance?.performance_analysis || []))
+            .catch(error => console.error('Failed to fetch performance stats:', error))
+            .finally(() => setLoading(false));
     }, [strategyId]);
 
     const getPeriod = (label: string) => performanceData.find(p => p.period === label);
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { API_URL } from '../lib/api';
+import { fetchStrategyDetail } from '../lib/api';
 
 // ── Types ────────────────────────────────────────────────────────────────────
 
@@ -133,15 +133,12 @@ export default function StrategyAnalyticsPanel({
 
     useEffect(() => {
         setLoading(true);
-        Promise.all([
-            fetch(`${API_URL}/api/v1/backtest/strategy/${strategyId}/performance`).then(r => r.json()),
-            fetch(`${API_URL}/api/v1/backtest/equity-curve/${strategyId}`).then(r => r.json()),
-            fetch(`${API_URL}/api/v1/backtest/strategy/${strategyId}/attribution`).then(r => r.json()),
-        ])
-            .then(([perfJson, curveJson, attribJson]) => {
-                setPerfData(perfJson.performance_analysis || []);
-                setCurveMetrics(curveJson.metrics || null);
-                setAttribution(attribJson.error ? null : attribJson);
+        // The same batch request the chart and performance table use
+        fetchStrategyDetail(strategyId)
+            .then(data => {
+                setPerfData(data.performance?.performance_analysis || []);
+                setCurveMetrics(data.curve?.metrics || null);
+                setAttribution(!data.attribution || data.attribution.error ? null : data.attribution);
             })
             .catch(console.error)
             .finally(() => setLoading(false));
@@ -52,13 +52,15 @@ export default function StrategyDetailPanel({ strategy }: Props) {
     useEffect(() => {
         setLoading(true);
         const base = process.env.NEXT_PUBLIC_API_URL;
-        Promise.all([
-            fetch(`${base}/api/v1/backtest/strategy/${strategy.id}/performance`).then(r => r.json()),
-            fetch(`${base}/api/v1/backtest/equity-curve/${strategy.id}`).then(r => r.json()),
-        ]).then(([perfJson, curveJson]) => {
-            setPerfData(perfJson.performance_analysis || []);
-            setAdvMetrics(curveJson.metrics || null);
-        }).catch(console.error).finally(() => setLoading(false));
+        fetch(`${base}/api/v1/backtest/batch?strategies=${encodeURIComponent(strategy.id)}&sections=performance,curve&max_points=0`)
+            .then(r => r.json())
+            .then(json => {
+                const data = json.strategies?.[strategy.id] ?? {};
+                setPerfData(data.performance?.performance_analysis || []);
+                setAdvMetrics(data.curve?.metrics || null);
+            })
+            .catch(console.error)
+            .finally(() => setLoading(false));
     }, [strategy.id]);
 
     const periodOrder = ['1 Day', '1 Week', '1 Month', '1 Quarter', '1 Year', '3 Years', '5 Years', '10 Years', 'Max'];
@@ -6,3 +6,43 @@
  */
 export const API_URL =
     process.env.NEXT_PUBLIC_API_URL ?? 'https://algoforall-api.onrender.com';
+
+const inflight = new Map<string, Promise<any>>();
+
+/**
+ * GET a JSON endpoint, sharing one request between components that ask for
+ * the same URL at the same time. Repeats after it settles go through the
+ * browser's HTTP cache (the backend sends ETags).
+ */
+export function fetchShared(url: string): Promise<any> {
+    let pending = inflight.get(url);
+    if (!pending) {
+        pending = fetch(url)
+            .then(r => r.json())
+            .finally(() => inflight.delete(url));
+        inflight.set(url, pending);
+    }
+    return pending;
+}
+
+/**
+ * Everything the dashboard shows for one strategy, from a single
+ * /backtest/batch call: trailing performance, the equity curve at full
+ * resolution (the chart slices periods client-side) with its metrics, and
+ * factor attribution.
+ */
+export function fetchStrategyDetail(strategyId: string): Promise<any> {
+    const id = encodeURIComponent(strategyId);
+    return fetchShared(
+        `${API_URL}/api/v1/backtest/batch?strategies=${id}&sections=performance,curve,attribution&max_points=20000`
+    ).then(json => json.strategies?.[strategyId] ?? {});
+}
+
+/** Headline metrics for every strategy, keyed by id. */
+export function fetchAllMetrics(): Promise<Record<string, any>> {
+    return fetchShared(`${API_URL}/api/v1/backtest/batch?sections=metrics&max_points=0`).then(json =>
+        Object.fromEntries(
+            Object.entries(json.strategies ?? {}).map(([id, data]: [string, any]) => [id, data.metrics])
+        )
+    );
+}